@@ -0,0 +1,77 @@
+import asyncio
+import os
+import time
+
+from application.services.items_cache import CachedRange, ItemsCache
+
+# Cada cuántos segundos se reescribe el snapshot, si el caché cambió desde el último
+CACHE_SNAPSHOT_INTERVAL = int(os.getenv("CACHE_SNAPSHOT_INTERVAL", "300"))
+
+
+class CacheSnapshotter:
+    """
+    Arranque en caliente: guarda los rangos del caché en un snapshot binario
+    (al apagar y periódicamente tras cada refresco) y los recarga al arrancar,
+    para que un redeploy no deje a los primeros usuarios esperando a Graph.
+
+    `snapshot` es cualquier objeto con save(blobs) -> bytes escritos y
+    load(decode) -> (objetos, escrito_en), como infrastructure.cache.snapshot.CacheSnapshot.
+    """
+
+    def __init__(self, cache: ItemsCache, snapshot, interval: int = CACHE_SNAPSHOT_INTERVAL):
+        self.cache = cache
+        self.snapshot = snapshot
+        self.interval = interval
+        self._saved_version = None
+        self.last_load: dict = {}
+        self.last_save: dict = {}
+
+    def load(self) -> dict:
+        started = time.perf_counter()
+        try:
+            entries, written_at = self.snapshot.load(CachedRange.from_bytes)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer el snapshot de caché: {e}. Se arranca en frío")
+            entries, written_at = [], None
+        loaded = self.cache.import_entries(entries)
+        self._saved_version = self.cache.version
+        self.last_load = {
+            "ranges": loaded,
+            "items": sum(len(e.items) for e in entries),
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+            "snapshot_age": round(time.time() - written_at, 1) if written_at else None,
+        }
+        if loaded:
+            print(f"♨️ Snapshot cargado: {loaded} rangos, {self.last_load['items']} items en {self.last_load['ms']} ms "
+                  f"(escrito hace {int(self.last_load['snapshot_age'])}s)")
+        return self.last_load
+
+    def save(self, force: bool = False) -> bool:
+        """Escribe el snapshot si el caché cambió desde la última vez (o siempre con force)."""
+        version = self.cache.version
+        if not force and version == self._saved_version:
+            return False
+        started = time.perf_counter()
+        blobs = self.cache.export_blobs()
+        size = self.snapshot.save(blobs)
+        self._saved_version = version
+        self.last_save = {
+            "ranges": len(blobs),
+            "bytes": size,
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+            "at": time.time(),
+        }
+        print(f"📸 Snapshot de caché guardado: {len(blobs)} rangos, {size / 1024:.0f} KB en {self.last_save['ms']} ms")
+        return True
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Serializar 50k items lleva un rato: fuera del event loop
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                print(f"⚠️ Error guardando el snapshot de caché: {e}")
+
+    def stats(self) -> dict:
+        return {"load": self.last_load, "save": self.last_save}
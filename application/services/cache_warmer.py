@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from application.services.replica_sync import ReplicaSync
+from application.use_cases.async_get_filtered_items import AsyncGetFilteredItemsUseCase
+
+# Cada cuántos segundos se revisa qué hay que refrescar
+CACHE_WARM_INTERVAL = int(os.getenv("CACHE_WARM_INTERVAL", "30"))
+# Un rango se refresca cuando consumió esta fracción del TTL (0.8 = a los 240s de 300s)
+CACHE_WARM_AHEAD = float(os.getenv("CACHE_WARM_AHEAD", "0.8"))
+# Rangos que nadie pidió en este tiempo dejan de calentarse
+CACHE_WARM_IDLE = int(os.getenv("CACHE_WARM_IDLE", "1800"))
+
+# (from_date, to_date, limit)
+Dataset = Tuple[Optional[str], Optional[str], int]
+
+
+class CacheWarmer:
+    """
+    Tarea de fondo del API: refresca los rangos del caché que se están usando
+    antes de que venzan, para que ningún pedido tenga que esperar a Graph.
+    Con réplica local, en cambio, corre el sync delta antes de que quede vieja.
+    """
+
+    def __init__(
+        self,
+        use_case_factory: Callable[[], AsyncGetFilteredItemsUseCase],
+        replica: Optional[ReplicaSync] = None,
+        startup_datasets: Optional[List[Dataset]] = None,
+        interval: int = CACHE_WARM_INTERVAL,
+        ahead: float = CACHE_WARM_AHEAD,
+        idle: int = CACHE_WARM_IDLE
+    ):
+        self.use_case_factory = use_case_factory
+        self.replica = replica
+        self.startup_datasets = startup_datasets or []
+        self.interval = interval
+        self.ahead = ahead
+        self.idle = idle
+        self.runs = 0
+        self.refreshed = 0
+        self.last_run: Optional[float] = None
+
+    async def warm_once(self, datasets: Optional[List[Dataset]] = None, only_missing: bool = False) -> int:
+        """
+        Refresca lo que toque (o `datasets`, si se indican; con only_missing, solo
+        las listas que no estén vigentes en caché). Devuelve cuántos rangos se revisaron.
+        """
+        self.runs += 1
+        self.last_run = time.time()
+        if self.replica is not None:
+            await asyncio.to_thread(self.replica.sync_all)
+            return 0
+
+        use_case = self.use_case_factory()
+        due: Dict[Dataset, List[str]] = {}
+        if datasets is not None:
+            due = {dataset: None for dataset in datasets}
+        else:
+            for source, from_date, to_date, limit in use_case.due_for_refresh(self.ahead, self.idle):
+                due.setdefault((from_date, to_date, limit), []).append(source)
+
+        for (from_date, to_date, limit), sources in due.items():
+            print(f"🔥 Calentando caché: {from_date or '…'} → {to_date or '…'} (límite {limit}) {', '.join(sources or ['todas las listas'])}")
+            await use_case.refresh(from_date, to_date, limit, sources, only_missing=only_missing)
+        self.refreshed += len(due)
+        return len(due)
+
+    async def run(self) -> None:
+        if self.replica is not None:
+            await self._safe_warm()
+        else:
+            # Al arrancar: lo que falte de la vista inicial (puede venir del snapshot) y
+            # enseguida revalidar lo cargado que ya esté vencido o por vencer
+            await self._safe_warm(self.startup_datasets, only_missing=True)
+            await self._safe_warm()
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._safe_warm()
+
+    async def _safe_warm(self, datasets: Optional[List[Dataset]] = None, only_missing: bool = False) -> None:
+        try:
+            await self.warm_once(datasets, only_missing)
+        except Exception as e:
+            # Un fallo de Graph no debe matar el scheduler: se reintenta en la próxima vuelta
+            print(f"⚠️ Error calentando caché: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "refreshed": self.refreshed,
+            "last_run_age": round(time.time() - self.last_run, 1) if self.last_run else None,
+        }
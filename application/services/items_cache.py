@@ -0,0 +1,689 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.cache_backend import CacheBackend
+from application.services.list_fetcher import FetchResult, ListQuery
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json de la librería estándar
+    orjson = None
+
+ITEMS_CACHE_TTL = int(os.getenv("ITEMS_CACHE_TTL", "300"))  # 5 minutos
+# Pasado el TTL se sigue sirviendo la copia vieja durante este margen mientras se refresca en segundo plano
+ITEMS_CACHE_STALE_GRACE = int(os.getenv("ITEMS_CACHE_STALE_GRACE", "1800"))
+# Con Graph degradado (throttling, circuito abierto) se sirve una copia de hasta esta edad
+ITEMS_CACHE_DEGRADED_MAX_AGE = int(os.getenv("ITEMS_CACHE_DEGRADED_MAX_AGE", "86400"))
+# Tope de rangos guardados y de items en total (entre todas las listas)
+ITEMS_CACHE_MAX_ENTRIES = int(os.getenv("ITEMS_CACHE_MAX_ENTRIES", "32"))
+ITEMS_CACHE_MAX_ITEMS = int(os.getenv("ITEMS_CACHE_MAX_ITEMS", "200000"))
+# Con backend compartido: cuánto dura como máximo el lock de "este worker está descargando"
+ITEMS_CACHE_LOCK_TTL = int(os.getenv("ITEMS_CACHE_LOCK_TTL", "120"))
+REMOTE_POLL_INTERVAL = 0.25
+# zlib 3: ~10x más chico que el JSON y bastante más rápido que el nivel por defecto (6)
+COMPRESSION_LEVEL = 3
+
+KEY_PREFIX = "items:"
+LOCK_PREFIX = "lock:items:"
+
+
+def _dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw: bytes):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _day(value: Optional[str]) -> Optional[str]:
+    return value.strip() or None if value else None
+
+
+def range_key(source_name: str, from_date: Optional[str], to_date: Optional[str], limit: int) -> str:
+    return f"{KEY_PREFIX}{source_name}:{from_date or '*'}:{to_date or '*'}:{limit}"
+
+
+def parse_range_key(key: str) -> Tuple[str, Optional[str], Optional[str], int]:
+    source_name, from_date, to_date, limit = key[len(KEY_PREFIX):].rsplit(":", 3)
+    return source_name, None if from_date == "*" else from_date, None if to_date == "*" else to_date, int(limit)
+
+
+def _covers(outer_from, outer_to, inner_from, inner_to) -> bool:
+    # None = rango abierto por ese lado
+    return (outer_from is None or (inner_from is not None and inner_from >= outer_from)) and \
+           (outer_to is None or (inner_to is not None and inner_to <= outer_to))
+
+
+class CachedRange:
+    """
+    Lo que devolvió una descarga de una lista para un rango de fechas: los items
+    de [from_date, to_date] en orden Created desc, cortados en `limit`. Sin filtrar
+    por estado, así que sirve para pendientes, procesados y todos a la vez.
+    """
+
+    def __init__(
+        self,
+        source_name: str,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        limit: int,
+        items: List[SharePointItem],
+        fetched_at: Optional[float] = None
+    ):
+        self.source_name = source_name
+        self.from_date = from_date
+        self.to_date = to_date
+        self.limit = limit
+        self.items = items
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.last_used = time.time()
+
+    @property
+    def key(self) -> str:
+        return range_key(self.source_name, self.from_date, self.to_date, self.limit)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialización compacta para el backend compartido: columnas (ids, títulos,
+        campos) en JSON y comprimidas con zlib. La lista de origen va una sola vez.
+        """
+        payload = {
+            "v": 1,
+            "source": self.source_name, "from": self.from_date, "to": self.to_date,
+            "limit": self.limit, "fetched_at": self.fetched_at,
+            "ids": [item.id for item in self.items],
+            "titles": [item.title for item in self.items],
+            "fields": [item.raw_fields for item in self.items],
+        }
+        return zlib.compress(_dumps(payload), COMPRESSION_LEVEL)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "CachedRange":
+        payload = _loads(zlib.decompress(blob))
+        source = payload["source"]
+        items = [
+            SharePointItem(id=item_id, title=title, raw_fields=fields, source_list=source)
+            for item_id, title, fields in zip(payload["ids"], payload["titles"], payload["fields"])
+        ]
+        return cls(source, payload["from"], payload["to"], payload["limit"], items, fetched_at=payload["fetched_at"])
+
+    @property
+    def truncated(self) -> bool:
+        # Si se llegó al tope puede haber items más viejos dentro del rango que no se bajaron
+        return len(self.items) >= self.limit
+
+    def age(self, now: float) -> float:
+        return now - self.fetched_at
+
+    def slice(self, from_date: Optional[str], to_date: Optional[str], limit: int, force: bool = False) -> Optional[List[SharePointItem]]:
+        """
+        Los primeros `limit` items de [from_date, to_date], o None si este rango
+        no alcanza para responder con certeza (estaba truncado antes de llegar).
+        """
+        if not _covers(self.from_date, self.to_date, from_date, to_date):
+            return None
+        if from_date is None and to_date is None:
+            sliced, reached_floor = self.items[:limit], False
+        else:
+            low = f"{from_date}T00:00:00Z" if from_date else None
+            high = f"{to_date}T23:59:59Z" if to_date else None
+            sliced, reached_floor = [], False
+            for item in self.items:
+                created = item.raw_fields.get("Created") or ""
+                if high and created > high:
+                    continue
+                if low and created < low:
+                    reached_floor = True
+                    continue
+                sliced.append(item)
+            sliced = sliced[:limit]
+        if force or not self.truncated or len(sliced) >= limit or reached_floor:
+            return sliced
+        return None
+
+
+class _Flight:
+    """Descarga en curso de una lista; los pedidos que caen dentro de su rango la esperan."""
+
+    def __init__(self, source_name: str, from_date: Optional[str], to_date: Optional[str], limit: int):
+        self.source_name = source_name
+        self.from_date = from_date
+        self.to_date = to_date
+        self.limit = limit
+        self.future = Future()
+
+    def serves(self, source_name: str, from_date: Optional[str], to_date: Optional[str], limit: int) -> bool:
+        return source_name == self.source_name and limit <= self.limit and \
+            _covers(self.from_date, self.to_date, from_date, to_date)
+
+
+class ItemsCache:
+    """
+    Caché por lista y rango de fechas, compartido por todas las instancias del caso de uso.
+
+    - Un pedido se responde recortando cualquier rango guardado que lo contenga:
+      otro estado, un rango más angosto o un límite menor no vuelven a Graph.
+    - Si ya hay una descarga en curso que cubre el pedido, se espera a esa en vez de
+      lanzar otra (single-flight): diez "Actualizar" simultáneos = una descarga.
+    - Vencido el TTL, durante `stale_grace` se sigue respondiendo con la copia vieja
+      y se lanza un único refresco en segundo plano (stale-while-revalidate).
+    - Si Graph está degradado, `fallback` sirve la última copia aunque haya pasado
+      el margen (hasta `degraded_max_age`): mejor datos viejos que un error.
+    - LRU acotado por cantidad de rangos y de items en memoria.
+    - Con un backend (CacheBackend), cada descarga se publica ahí serializada y los
+      demás workers la toman en lugar de ir a Graph; un lock en el backend hace que
+      un solo worker descargue cada rango.
+    """
+
+    def __init__(
+        self,
+        ttl: int = ITEMS_CACHE_TTL,
+        max_entries: int = ITEMS_CACHE_MAX_ENTRIES,
+        max_items: int = ITEMS_CACHE_MAX_ITEMS,
+        stale_grace: int = ITEMS_CACHE_STALE_GRACE,
+        backend: Optional[CacheBackend] = None,
+        degraded_max_age: int = ITEMS_CACHE_DEGRADED_MAX_AGE
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_grace = stale_grace
+        self.degraded_max_age = max(degraded_max_age, ttl + stale_grace)
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self._entries: "OrderedDict[tuple, CachedRange]" = OrderedDict()
+        self._flights: List[_Flight] = []
+        self._lock = threading.Lock()
+        self._background = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.remote_hits = 0
+        self.remote_waits = 0
+        self.degraded_hits = 0
+        # Sube con cada rango guardado: sirve para saber si vale la pena reescribir el snapshot
+        self.version = 0
+
+    # --- Consulta y guardado ---------------------------------------------------
+
+    def lookup(self, source_name: str, from_date: Optional[str], to_date: Optional[str], limit: int) -> Optional[Tuple[List[SharePointItem], float]]:
+        """(items, edad en segundos) si algún rango guardado responde el pedido, aunque esté vencido dentro del margen."""
+        from_date, to_date = _day(from_date), _day(to_date)
+        with self._lock:
+            hit = self._lookup(source_name, from_date, to_date, limit, time.time())
+        return (hit[0], hit[1].age(time.time())) if hit else None
+
+    def _lookup(self, source_name, from_date, to_date, limit, now) -> Optional[Tuple[List[SharePointItem], CachedRange]]:
+        stale = None
+        for key, entry in reversed(list(self._entries.items())):
+            if entry.source_name != source_name:
+                continue
+            age = entry.age(now)
+            if age >= self.ttl + self.stale_grace:
+                # Fuera del margen ya no se sirve normalmente, pero queda para `fallback`
+                if age >= self.degraded_max_age:
+                    del self._entries[key]
+                continue
+            if stale is not None and age >= self.ttl:
+                continue
+            sliced = entry.slice(from_date, to_date, limit)
+            if sliced is None:
+                continue
+            if age >= self.ttl:
+                # Vencido: se usa solo si no aparece uno vigente
+                stale = (key, sliced, entry)
+                continue
+            return self._touch(key, sliced, entry, now)
+        if stale is not None:
+            self.stale_hits += 1
+            return self._touch(*stale, now)
+        return None
+
+    def _touch(self, key, sliced, entry: CachedRange, now: float):
+        self._entries.move_to_end(key)
+        entry.last_used = now
+        self.hits += 1
+        label = "caché" if entry.age(now) < self.ttl else "caché vencido (refrescando en segundo plano)"
+        print(f"🚀 [{entry.source_name}] Sirviendo {len(sliced)} items desde {label} (Edad: {int(entry.age(now))}s)")
+        return sliced, entry
+
+    def fallback(self, source_name: str, from_date: Optional[str], to_date: Optional[str], limit: int) -> Optional[Tuple[List[SharePointItem], float]]:
+        """(items, edad) de la copia más nueva que responda el pedido, sin mirar el TTL ni el margen."""
+        from_date, to_date = _day(from_date), _day(to_date)
+        now = time.time()
+        with self._lock:
+            best = None
+            for entry in self._entries.values():
+                if entry.source_name != source_name or entry.age(now) >= self.degraded_max_age:
+                    continue
+                if best is not None and entry.fetched_at <= best[1].fetched_at:
+                    continue
+                sliced = entry.slice(from_date, to_date, limit)
+                if sliced is not None:
+                    best = (sliced, entry)
+            if best is None:
+                return None
+            self.degraded_hits += 1
+        print(f"🛟 [{source_name}] Graph degradado: sirviendo {len(best[0])} items de una copia de {int(best[1].age(now))}s")
+        return best[0], best[1].age(now)
+
+    def due_for_refresh(self, ahead: float, idle: int) -> List[Tuple[str, Optional[str], Optional[str], int]]:
+        """
+        Rangos usados en los últimos `idle` segundos a los que les queda menos de
+        (1 - ahead) del TTL (o ya vencidos dentro del margen), y que nadie está refrescando.
+        """
+        now = time.time()
+        due = []
+        with self._lock:
+            for entry in self._entries.values():
+                age = entry.age(now)
+                if now - entry.last_used > idle or age < self.ttl * ahead or age >= self.ttl + self.stale_grace:
+                    continue
+                if any(f.serves(entry.source_name, entry.from_date, entry.to_date, entry.limit) for f in self._flights):
+                    continue
+                due.append((entry.source_name, entry.from_date, entry.to_date, entry.limit))
+        return due
+
+    def _put(self, entry: CachedRange) -> None:
+        # Un rango nuevo que contiene a otro más viejo de la misma lista lo reemplaza
+        for key, old in list(self._entries.items()):
+            if old.source_name == entry.source_name and entry.limit >= old.limit and \
+                    _covers(entry.from_date, entry.to_date, old.from_date, old.to_date):
+                del self._entries[key]
+        self._entries[(entry.source_name, entry.from_date, entry.to_date, entry.limit)] = entry
+        self.version += 1
+        total = sum(len(e.items) for e in self._entries.values())
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or total > self.max_items):
+            _, evicted = self._entries.popitem(last=False)
+            total -= len(evicted.items)
+            self.evictions += 1
+        print(f"💾 [{entry.source_name}] Guardado en caché ({len(entry.items)} items). Expira en {self.ttl}s")
+
+    def is_fresh(self, source_name: str, from_date: Optional[str], to_date: Optional[str], limit: int) -> bool:
+        """Si hay un rango vigente que responde el pedido (sin contar como hit)."""
+        from_date, to_date = _day(from_date), _day(to_date)
+        now = time.time()
+        with self._lock:
+            return any(
+                e.source_name == source_name and e.age(now) < self.ttl and e.slice(from_date, to_date, limit) is not None
+                for e in self._entries.values()
+            )
+
+    def export_blobs(self) -> List[bytes]:
+        """Los rangos todavía servibles, serializados (para el snapshot de arranque en caliente)."""
+        now = time.time()
+        with self._lock:
+            entries = [e for e in self._entries.values() if e.age(now) < self.ttl + self.stale_grace]
+        return [entry.to_bytes() for entry in entries]
+
+    def import_entries(self, entries: List[CachedRange]) -> int:
+        """Carga rangos (p. ej. del snapshot); los ya vencidos fuera del margen se ignoran."""
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for entry in sorted(entries, key=lambda e: e.fetched_at):
+                if entry.age(now) < self.ttl + self.stale_grace:
+                    self._put(entry)
+                    loaded += 1
+        return loaded
+
+    def use_backend(self, backend: Optional[CacheBackend]) -> None:
+        self.backend = backend
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        backend = self._backend_stats()
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "items": sum(len(e.items) for e in self._entries.values()),
+                "in_flight": len(self._flights),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "remote_hits": self.remote_hits,
+                "remote_waits": self.remote_waits,
+                "degraded_hits": self.degraded_hits,
+                "backend": backend,
+            }
+
+    # --- Backend compartido --------------------------------------------------------
+    # El backend es opcional y de mejor esfuerzo: si falla, se sigue con el caché local.
+
+    def _backend_call(self, operation: str, fn, *args, default=None):
+        try:
+            return fn(*args)
+        except Exception as e:
+            print(f"⚠️ Backend de caché no disponible ({operation}): {e}")
+            return default
+
+    def _backend_stats(self) -> Optional[dict]:
+        if self.backend is None:
+            return None
+        return self._backend_call("stats", self.backend.stats, default={})
+
+    def _shared_backend(self) -> bool:
+        # Sin backend (CACHE_BACKEND=memory) el worker solo tiene los rangos en _entries
+        return self.backend is not None
+
+    async def _offload(self, fn, *args):
+        # Un backend compartido hace I/O (disco, red): fuera del event loop
+        if self._shared_backend():
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _pull(self, queries: List[ListQuery], from_date, to_date, limit) -> None:
+        """
+        Trae del backend los rangos que otro worker ya descargó y que responden el
+        pedido, si localmente no hay uno vigente. Así un worker recién levantado
+        no vuelve a Graph por lo que ya tiene otro.
+        """
+        if not self._shared_backend():
+            return
+        now = time.time()
+        for query in queries:
+            source = query.source_name
+            with self._lock:
+                local = [e for e in self._entries.values() if e.source_name == source and e.age(now) < self.ttl]
+                if any(e.slice(from_date, to_date, limit) is not None for e in local):
+                    continue
+                known = {e.key: e.fetched_at for e in self._entries.values()}
+            for key in self._backend_call("scan", self.backend.scan, f"{KEY_PREFIX}{source}:", default=[]):
+                _, key_from, key_to, _ = parse_range_key(key)
+                if not _covers(key_from, key_to, from_date, to_date):
+                    continue
+                blob = self._backend_call("get", self.backend.get, key)
+                if blob is None:
+                    continue
+                entry = CachedRange.from_bytes(blob)
+                if entry.fetched_at <= known.get(key, 0) or entry.age(now) >= self.ttl + self.stale_grace:
+                    continue
+                with self._lock:
+                    self._put(entry)
+                    self.remote_hits += 1
+                if entry.age(now) < self.ttl and entry.slice(from_date, to_date, limit) is not None:
+                    break
+
+    async def pull_async(self, queries: List[ListQuery], from_date: Optional[str], to_date: Optional[str], limit: int) -> None:
+        await self._offload(self._pull, queries, _day(from_date), _day(to_date), limit)
+
+    def _acquire(self, queries: List[ListQuery], group, from_date, to_date, limit):
+        """Separa los rangos que descarga este worker (tomó el lock) de los que ya está bajando otro."""
+        mine, theirs = [], []
+        for index, _ in group:
+            name = LOCK_PREFIX + range_key(queries[index].source_name, from_date, to_date, limit)[len(KEY_PREFIX):]
+            if not self._shared_backend():
+                mine.append((index, name, None))
+                continue
+            # Si el backend no responde se descarga igual: mejor repetir trabajo que no responder
+            token = self._backend_call("lock", self.backend.acquire_lock, name, ITEMS_CACHE_LOCK_TTL, default="")
+            if token is None:
+                theirs.append((index, name))
+            else:
+                mine.append((index, name, token or None))
+        return mine, theirs
+
+    def _publish(self, queries: List[ListQuery], indices: List[int], fetched, from_date, to_date, limit, locks=()) -> dict:
+        outcomes = {}
+        for index, result in zip(indices, fetched):
+            if isinstance(result, BaseException):
+                outcomes[index] = result
+                continue
+            entry = CachedRange(queries[index].source_name, from_date, to_date, limit, result)
+            if self._shared_backend():
+                self._backend_call("set", self.backend.set, entry.key, entry.to_bytes(), self.ttl + self.stale_grace)
+            outcomes[index] = entry
+        for _, name, token in locks:
+            if token:
+                self._backend_call("unlock", self.backend.release_lock, name, token)
+        return outcomes
+
+    def _poll_remote(self, key: str, lock_name: str):
+        """(rango, sigue_bloqueado): lo que publicó el worker que tiene el lock, si ya terminó."""
+        blob = self._backend_call("get", self.backend.get, key)
+        if blob is not None:
+            entry = CachedRange.from_bytes(blob)
+            if entry.age(time.time()) < self.ttl:
+                return entry, False
+        return None, bool(self._backend_call("lock", self.backend.is_locked, lock_name, default=False))
+
+    def _fetch_shared(self, queries: List[ListQuery], group, from_date, to_date, limit, fetch) -> list:
+        """
+        Descarga los rangos de `group` coordinando con los demás workers. Devuelve,
+        en el orden de `group`, el CachedRange resultante o la excepción.
+        """
+        mine, theirs = self._acquire(queries, group, from_date, to_date, limit)
+        outcomes = {}
+        if mine:
+            try:
+                fetched = fetch([queries[index] for index, _, _ in mine])
+            except BaseException:
+                self._publish(queries, [], [], from_date, to_date, limit, mine)
+                raise
+            outcomes.update(self._publish(queries, [i for i, _, _ in mine], fetched, from_date, to_date, limit, mine))
+        fallback = []
+        for index, lock_name in theirs:
+            self.remote_waits += 1
+            print(f"⏳ [{queries[index].source_name}] Otro worker está descargando este rango. Esperando...")
+            key = range_key(queries[index].source_name, from_date, to_date, limit)
+            deadline = time.time() + ITEMS_CACHE_LOCK_TTL
+            entry, locked = self._poll_remote(key, lock_name)
+            while entry is None and locked and time.time() < deadline:
+                time.sleep(REMOTE_POLL_INTERVAL)
+                entry, locked = self._poll_remote(key, lock_name)
+            if entry is None:
+                fallback.append(index)
+            else:
+                outcomes[index] = entry
+        if fallback:
+            # El otro worker falló o murió sin publicar: se descarga acá
+            fetched = fetch([queries[index] for index in fallback])
+            outcomes.update(self._publish(queries, fallback, fetched, from_date, to_date, limit))
+        return [outcomes[index] for index, _ in group]
+
+    async def _fetch_shared_async(self, queries: List[ListQuery], group, from_date, to_date, limit, fetch) -> list:
+        mine, theirs = await self._offload(self._acquire, queries, group, from_date, to_date, limit)
+        outcomes = {}
+        if mine:
+            try:
+                fetched = await fetch([queries[index] for index, _, _ in mine])
+            except BaseException:
+                await self._offload(self._publish, queries, [], [], from_date, to_date, limit, mine)
+                raise
+            outcomes.update(await self._offload(
+                self._publish, queries, [i for i, _, _ in mine], fetched, from_date, to_date, limit, mine
+            ))
+        fallback = []
+        for index, lock_name in theirs:
+            self.remote_waits += 1
+            print(f"⏳ [{queries[index].source_name}] Otro worker está descargando este rango. Esperando...")
+            key = range_key(queries[index].source_name, from_date, to_date, limit)
+            deadline = time.time() + ITEMS_CACHE_LOCK_TTL
+            entry, locked = await self._offload(self._poll_remote, key, lock_name)
+            while entry is None and locked and time.time() < deadline:
+                await asyncio.sleep(REMOTE_POLL_INTERVAL)
+                entry, locked = await self._offload(self._poll_remote, key, lock_name)
+            if entry is None:
+                fallback.append(index)
+            else:
+                outcomes[index] = entry
+        if fallback:
+            fetched = await fetch([queries[index] for index in fallback])
+            outcomes.update(await self._offload(self._publish, queries, fallback, fetched, from_date, to_date, limit))
+        return [outcomes[index] for index, _ in group]
+
+    # --- Single-flight -----------------------------------------------------------
+
+    def _claim(self, queries: List[ListQuery], pending: List[int], from_date, to_date, limit, force_refresh, results, ages):
+        """
+        Resuelve lo que se pueda desde caché y reparte el resto entre esperar una
+        descarga en curso y descargar. `refresh` son los servidos vencidos que
+        hay que refrescar en segundo plano.
+        """
+        lead, waits, refresh = [], [], []
+        with self._lock:
+            now = time.time()
+            for index in pending:
+                source = queries[index].source_name
+                flight = next((f for f in self._flights if f.serves(source, from_date, to_date, limit)), None)
+                if not force_refresh:
+                    hit = self._lookup(source, from_date, to_date, limit, now)
+                    if hit is not None:
+                        results[index], entry = hit
+                        ages[index] = entry.age(now)
+                        if ages[index] >= self.ttl and flight is None:
+                            flight = _Flight(source, from_date, to_date, limit)
+                            self._flights.append(flight)
+                            refresh.append((index, flight))
+                        continue
+                if flight is not None:
+                    self.coalesced += 1
+                    print(f"⏳ [{source}] Esperando una descarga en curso que cubre el pedido")
+                    waits.append((index, flight))
+                    continue
+                self.misses += 1
+                flight = _Flight(source, from_date, to_date, limit)
+                self._flights.append(flight)
+                lead.append((index, flight))
+        return lead, waits, refresh
+
+    def _land(self, queries: List[ListQuery], lead, fetched, from_date, to_date, limit, results=None) -> None:
+        with self._lock:
+            for (index, flight), result in zip(lead, fetched):
+                if isinstance(result, CachedRange):
+                    self._put(result)
+                elif results is None:
+                    print(f"⚠️ [{queries[index].source_name}] Falló el refresco en segundo plano: {result}. Se sigue sirviendo la copia vencida")
+                if results is not None:
+                    results[index] = result if isinstance(result, BaseException) else result.slice(from_date, to_date, limit, force=True)
+                self._flights.remove(flight)
+                flight.future.set_result(result)
+
+    def _abort(self, lead, error: BaseException) -> None:
+        with self._lock:
+            for _, flight in lead:
+                if flight in self._flights:
+                    self._flights.remove(flight)
+                if not flight.future.done():
+                    flight.future.set_result(error)
+
+    @staticmethod
+    def _follow(index: int, outcome, from_date, to_date, limit, results, pending: List[int]) -> None:
+        if isinstance(outcome, BaseException):
+            results[index] = outcome
+            return
+        sliced = outcome.slice(from_date, to_date, limit)
+        if sliced is None:
+            # La descarga que esperamos cubría el rango pero quedó truncada: hay que bajar lo nuestro
+            pending.append(index)
+        else:
+            results[index] = sliced
+
+    def run_in_background(self, coroutine) -> None:
+        # Se guarda la referencia para que la tarea no se recolecte antes de terminar
+        task = asyncio.ensure_future(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _revalidate(self, queries: List[ListQuery], refresh, from_date, to_date, limit, fetch) -> None:
+        try:
+            fetched = self._fetch_shared(queries, refresh, from_date, to_date, limit, fetch)
+        except BaseException as e:
+            print(f"⚠️ Falló el refresco en segundo plano: {e}")
+            self._abort(refresh, e)
+            return
+        self._land(queries, refresh, fetched, from_date, to_date, limit)
+
+    async def _revalidate_async(self, queries: List[ListQuery], refresh, from_date, to_date, limit, fetch) -> None:
+        try:
+            fetched = await self._fetch_shared_async(queries, refresh, from_date, to_date, limit, fetch)
+        except BaseException as e:
+            print(f"⚠️ Falló el refresco en segundo plano: {e}")
+            self._abort(refresh, e)
+            return
+        self._land(queries, refresh, fetched, from_date, to_date, limit)
+
+    def get_or_fetch(
+        self,
+        queries: List[ListQuery],
+        from_date: Optional[str],
+        to_date: Optional[str],
+        limit: int,
+        fetch: Callable[[List[ListQuery]], List[FetchResult]],
+        force_refresh: bool = False
+    ) -> Tuple[List[FetchResult], List[float]]:
+        """
+        Un resultado por consulta (items recortados o la excepción), como fetch_lists,
+        y la edad en segundos de cada uno (0 si se acaba de descargar).
+        """
+        from_date, to_date = _day(from_date), _day(to_date)
+        results: List[FetchResult] = [None] * len(queries)
+        ages = [0.0] * len(queries)
+        if not force_refresh:
+            self._pull(queries, from_date, to_date, limit)
+        pending = list(range(len(queries)))
+        while pending:
+            lead, waits, refresh = self._claim(queries, pending, from_date, to_date, limit, force_refresh, results, ages)
+            pending = []
+            if refresh:
+                threading.Thread(
+                    target=self._revalidate, args=(queries, refresh, from_date, to_date, limit, fetch), daemon=True
+                ).start()
+            if lead:
+                try:
+                    fetched = self._fetch_shared(queries, lead, from_date, to_date, limit, fetch)
+                except BaseException as e:
+                    self._abort(lead, e)
+                    raise
+                self._land(queries, lead, fetched, from_date, to_date, limit, results)
+            for index, flight in waits:
+                self._follow(index, flight.future.result(), from_date, to_date, limit, results, pending)
+        return results, ages
+
+    async def get_or_fetch_async(
+        self,
+        queries: List[ListQuery],
+        from_date: Optional[str],
+        to_date: Optional[str],
+        limit: int,
+        fetch,
+        force_refresh: bool = False
+    ) -> Tuple[List[FetchResult], List[float]]:
+        from_date, to_date = _day(from_date), _day(to_date)
+        results: List[FetchResult] = [None] * len(queries)
+        ages = [0.0] * len(queries)
+        if not force_refresh:
+            await self._offload(self._pull, queries, from_date, to_date, limit)
+        pending = list(range(len(queries)))
+        while pending:
+            lead, waits, refresh = self._claim(queries, pending, from_date, to_date, limit, force_refresh, results, ages)
+            pending = []
+            if refresh:
+                self.run_in_background(self._revalidate_async(queries, refresh, from_date, to_date, limit, fetch))
+            if lead:
+                try:
+                    fetched = await self._fetch_shared_async(queries, lead, from_date, to_date, limit, fetch)
+                except BaseException as e:
+                    self._abort(lead, e)
+                    raise
+                self._land(queries, lead, fetched, from_date, to_date, limit, results)
+            for index, flight in waits:
+                outcome = await asyncio.wrap_future(flight.future)
+                self._follow(index, outcome, from_date, to_date, limit, results, pending)
+        return results, ages
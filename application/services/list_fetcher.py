@@ -0,0 +1,304 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from application.services.query_plans import shared_plans
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.async_sharepoint_reader import AsyncSharePointReader
+from domain.ports.sharepoint_reader import ItemFilter, ItemsRequest, QueryRejectedError, SharePointReader, SourceUnavailableError
+
+# Máximo de listas descargándose a la vez
+LIST_FETCH_WORKERS = int(os.getenv("LIST_FETCH_WORKERS", "4"))
+
+FetchResult = Union[List[SharePointItem], Exception]
+
+
+@dataclass
+class ListQuery:
+    """Consulta de una lista con su cascada de filtros OData (T1 → T2 → T3)."""
+    label: str
+    list_id: str
+    source_name: str
+    select_query: str
+    max_items: int
+    min_date_threshold: Optional[str] = None
+    orderby_query: str = "fields/Created desc"
+    # (nombre del intento, filtro OData). Un filtro vacío = sin filtros.
+    tiers: List[Tuple[str, str]] = field(default_factory=list)
+    # Condiciones que se chequean acá sobre cada item: las que no se pudieron empujar al $filter
+    # y, por si la cascada terminó en un filtro más laxo, también las empujadas (cuesta poco).
+    # El reader las aplica al paginar, así los descartados no cuentan para max_items
+    local_filter: Optional[ItemFilter] = None
+    # El último intento va pelado: sin $select ni local_filter, por si la lista rechaza
+    # alguna columna del $select (la consulta que hacía el reporte antes de la cascada)
+    bare_last_tier: bool = False
+
+
+def _start_tier(query: ListQuery) -> int:
+    # Los filtros que la lista ya rechazó se saltan (hasta que toque volver a probarlos)
+    return shared_plans().first_tier(query.label, query.list_id, query.select_query, query.orderby_query, query.tiers)
+
+
+class _TierCascade:
+    """
+    La cascada de filtros de una consulta: qué filtro toca, y qué registrar cuando
+    funciona o falla. La comparten todas las formas de descargar una lista (sync,
+    async, en streaming y en rondas de $batch); cada una solo hace la llamada.
+    """
+
+    def __init__(self, query: ListQuery):
+        self.query = query
+        self.index = _start_tier(query)
+        self.started = 0.0
+
+    def _bare(self) -> bool:
+        return self.query.bare_last_tier and self.index == len(self.query.tiers) - 1
+
+    @property
+    def select_query(self) -> str:
+        return "" if self._bare() else self.query.select_query
+
+    def request(self) -> ItemsRequest:
+        query = self.query
+        tier, filter_query = query.tiers[self.index]
+        bare = self._bare()
+        print(f"🔍 [{query.label}] Intentando OData ({tier}): {filter_query or 'sin filtros'}{' ni $select' if bare else ''}")
+        self.started = time.perf_counter()
+        return ItemsRequest(
+            query.list_id, query.source_name,
+            filter_query=filter_query, select_query=self.select_query,
+            orderby_query=query.orderby_query, max_items=query.max_items,
+            min_date_threshold=query.min_date_threshold, item_filter=None if bare else query.local_filter
+        )
+
+    def worked(self, count: int) -> None:
+        tier, filter_query = self.query.tiers[self.index]
+        query = self.query
+        shared_plans().record_success(
+            query.list_id, tier, filter_query, self.select_query, query.orderby_query, time.perf_counter() - self.started, count
+        )
+
+    def advance(self, error: Exception) -> bool:
+        """
+        Tras un fallo: True si hay que probar el filtro siguiente. Si Graph está degradado
+        (SourceUnavailableError) no se prueban los siguientes: son consultas más pesadas y
+        empeoran el throttling. Tampoco si era el último.
+        """
+        if isinstance(error, SourceUnavailableError):
+            return False
+        query = self.query
+        tier, filter_query = query.tiers[self.index]
+        # Solo un rechazo de la consulta (400) dice algo del filtro; un 500, un 401 o una
+        # conexión cortada pasan al filtro siguiente sin que se recuerde
+        if isinstance(error, QueryRejectedError):
+            shared_plans().record_failure(query.list_id, tier, filter_query, self.select_query, query.orderby_query, error)
+        if self.index == len(query.tiers) - 1:
+            return False
+        print(f"⚠️ Error en {tier} {query.label}: {error}. Intentando {query.tiers[self.index + 1][0]}...")
+        self.index += 1
+        return True
+
+
+def fetch_list(reader: SharePointReader, query: ListQuery) -> List[SharePointItem]:
+    """Recorre la cascada de filtros de la lista hasta que uno funcione, empezando por el que indique el plan conocido."""
+    cascade = _TierCascade(query)
+    while True:
+        try:
+            items = reader.get_items(**vars(cascade.request()))
+        except Exception as e:
+            if cascade.advance(e):
+                continue
+            raise
+        cascade.worked(len(items))
+        return items
+
+
+async def fetch_list_async(reader: AsyncSharePointReader, query: ListQuery) -> List[SharePointItem]:
+    cascade = _TierCascade(query)
+    while True:
+        try:
+            items = await reader.get_items(**vars(cascade.request()))
+        except Exception as e:
+            if cascade.advance(e):
+                continue
+            raise
+        cascade.worked(len(items))
+        return items
+
+
+async def stream_list_async(reader: AsyncSharePointReader, query: ListQuery) -> AsyncIterator[List[SharePointItem]]:
+    """
+    Igual que fetch_list_async pero entrega cada página apenas llega. Solo se
+    pasa al siguiente filtro si el actual falla antes de entregar la primera
+    página; a mitad de camino ya no se puede reintentar sin duplicar filas.
+    """
+    cascade = _TierCascade(query)
+    while True:
+        count = 0
+        try:
+            async for page in reader.iter_pages(**vars(cascade.request())):
+                count += len(page)
+                if page:
+                    yield page
+        except Exception as e:
+            if not count and cascade.advance(e):
+                continue
+            raise
+        cascade.worked(count)
+        return
+
+
+_END = object()
+
+
+async def stream_lists_async(
+    reader: AsyncSharePointReader, queries: List[ListQuery], workers: int = LIST_FETCH_WORKERS
+) -> AsyncIterator[Tuple[ListQuery, List[SharePointItem]]]:
+    """
+    Descarga las listas en paralelo pero entrega las páginas en el orden de las
+    consultas (primero toda L1, luego L2), igual que la mezcla de fetch_lists.
+    Cada lista deja a lo sumo una página esperando en su cola, así que la memoria
+    queda acotada a unas pocas páginas aunque el resultado sea enorme.
+    Si una lista falla antes de entregar su primera página se registra y se sigue
+    con las demás (si fallan todas, se relanza). Si falla a mitad de camino se
+    relanza: seguir con la siguiente dejaría la lista cortada sin aviso.
+    """
+    semaphore = asyncio.Semaphore(max(1, workers))
+    queues = [asyncio.Queue(maxsize=1) for _ in queries]
+
+    async def produce(query: ListQuery, queue: asyncio.Queue):
+        async with semaphore:
+            try:
+                async for page in stream_list_async(reader, query):
+                    await queue.put(page)
+                await queue.put(_END)
+            except Exception as e:
+                await queue.put(e)
+
+    tasks = [asyncio.ensure_future(produce(q, queue)) for q, queue in zip(queries, queues)]
+    errors = []
+    try:
+        for query, queue in zip(queries, queues):
+            emitted = False
+            while True:
+                page = await queue.get()
+                if page is _END:
+                    break
+                if isinstance(page, Exception):
+                    print(f"❌ [{query.label}] No se pudo descargar la lista: {page}")
+                    if emitted:
+                        raise page
+                    errors.append(page)
+                    break
+                emitted = True
+                yield query, page
+        if errors and len(errors) == len(queries):
+            raise errors[0]
+    finally:
+        # Si el cliente corta la conexión, no seguimos bajando páginas para nadie
+        for task in tasks:
+            task.cancel()
+
+
+def _settle_round(
+    cascades: List[_TierCascade], pending: List[int], outcomes: List[FetchResult], results: List[FetchResult]
+) -> List[int]:
+    """Guarda lo que resolvió la ronda y devuelve las consultas que pasan a su filtro siguiente."""
+    retry = []
+    for i, outcome in zip(pending, outcomes):
+        if not isinstance(outcome, Exception):
+            cascades[i].worked(len(outcome))
+            results[i] = outcome
+        elif cascades[i].advance(outcome):
+            retry.append(i)
+        else:
+            results[i] = outcome
+    return retry
+
+
+def fetch_lists_batched(reader: SharePointReader, queries: List[ListQuery]) -> List[FetchResult]:
+    """
+    Como fetch_lists, pero para readers que agrupan consultas (get_items_many): las
+    cascadas avanzan en rondas. En la primera van juntas todas las listas con su
+    primer filtro (T1, o el que indique el plan conocido); las que fallan prueban
+    su filtro siguiente en la ronda que sigue, las demás no vuelven a pedirse.
+    """
+    results: List[FetchResult] = [None] * len(queries)
+    pending = [i for i, query in enumerate(queries) if query.tiers]
+    cascades = [_TierCascade(query) if query.tiers else None for query in queries]
+    while pending:
+        requests = [cascades[i].request() for i in pending]
+        try:
+            outcomes = reader.get_items_many(requests)
+        except Exception as e:
+            outcomes = [e] * len(pending)
+        pending = _settle_round(cascades, pending, outcomes, results)
+    return results
+
+
+async def fetch_lists_batched_async(reader: AsyncSharePointReader, queries: List[ListQuery]) -> List[FetchResult]:
+    results: List[FetchResult] = [None] * len(queries)
+    pending = [i for i, query in enumerate(queries) if query.tiers]
+    cascades = [_TierCascade(query) if query.tiers else None for query in queries]
+    while pending:
+        requests = [cascades[i].request() for i in pending]
+        try:
+            outcomes = await reader.get_items_many(requests)
+        except Exception as e:
+            outcomes = [e] * len(pending)
+        pending = _settle_round(cascades, pending, outcomes, results)
+    return results
+
+
+def fetch_lists(reader: SharePointReader, queries: List[ListQuery], workers: int = LIST_FETCH_WORKERS) -> List[FetchResult]:
+    """
+    Descarga todas las listas en paralelo (cada una con su propia cascada).
+    Devuelve un resultado por consulta, en el mismo orden; si una lista falla
+    su posición contiene la excepción y las demás siguen su curso.
+    Si el reader agrupa consultas ($batch), van todas juntas en cada round trip.
+    """
+    if not queries:
+        return []
+    if reader.supports_batch:
+        return fetch_lists_batched(reader, queries)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(queries)))) as pool:
+        futures = [pool.submit(fetch_list, reader, query) for query in queries]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+async def fetch_lists_async(reader: AsyncSharePointReader, queries: List[ListQuery], workers: int = LIST_FETCH_WORKERS) -> List[FetchResult]:
+    if queries and reader.supports_batch:
+        return await fetch_lists_batched_async(reader, queries)
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def bounded(query: ListQuery):
+        async with semaphore:
+            return await fetch_list_async(reader, query)
+
+    return list(await asyncio.gather(*(bounded(q) for q in queries), return_exceptions=True))
+
+
+def split_results(queries: List[ListQuery], results: List[FetchResult]) -> Tuple[List[Tuple[ListQuery, List[SharePointItem]]], List[Exception]]:
+    """
+    Separa los resultados exitosos de los errores, manteniendo el orden de las consultas
+    para que la mezcla sea determinista. Si fallan todas las listas, relanza el primer error.
+    """
+    succeeded, errors = [], []
+    for query, result in zip(queries, results):
+        if isinstance(result, BaseException):
+            print(f"❌ [{query.label}] No se pudo descargar la lista: {result}")
+            errors.append(result)
+        else:
+            succeeded.append((query, result))
+    if errors and not succeeded:
+        raise errors[0]
+    return succeeded, errors
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from domain.entities.sharepoint_item import ITEM_FIELDS, SharePointItem
+from domain.ports.sharepoint_reader import ListColumn
+
+# Cada cuánto se vuelven a leer las columnas e índices de cada lista
+LIST_SCHEMA_TTL = int(os.getenv("LIST_SCHEMA_TTL", "86400"))
+# Si no se pudieron leer, cuánto esperar antes de reintentar (mientras tanto, la cascada de siempre)
+LIST_SCHEMA_RETRY = int(os.getenv("LIST_SCHEMA_RETRY", "300"))
+# Campos extra a pedir además de los que usan las reglas (CSV), p. ej. para proyectar fields.eEstado
+ITEMS_EXTRA_FIELDS = os.getenv("ITEMS_EXTRA_FIELDS", "")
+
+
+@dataclass
+class Predicate:
+    """
+    Una condición de la consulta en sus dos formas: como cláusula OData (si el
+    servidor la puede resolver) y como chequeo sobre el item (si no).
+    """
+    name: str
+    columns: Tuple[str, ...]
+    odata: str
+    local: Callable[[SharePointItem], bool]
+
+
+@dataclass
+class ListSchema:
+    columns: Dict[str, ListColumn]
+    fetched_at: float
+    error: Optional[str] = None
+
+
+class QueryPlanner:
+    """
+    Decide qué parte de cada consulta resuelve SharePoint y qué se evalúa acá,
+    según los metadatos de la lista (columnas y cuáles están indexadas). En
+    listas grandes SharePoint rechaza filtros sobre columnas sin índice, así que
+    split() separa los predicados cuyas columnas tienen índice (van al $filter)
+    del resto, que el reader evalúa al paginar. También arma un $select con lo
+    que usan las reglas (ITEM_FIELDS) y existe en la lista.
+
+    Los metadatos se leen con reader.get_columns y se guardan LIST_SCHEMA_TTL.
+    Sin metadatos (reader que no los expone, o error) no hay plan y se usa la
+    cascada de filtros de siempre.
+    """
+
+    def __init__(self, ttl: int = LIST_SCHEMA_TTL, retry: int = LIST_SCHEMA_RETRY, extra_fields: str = ITEMS_EXTRA_FIELDS):
+        self.ttl = ttl
+        self.retry = retry
+        self.extra_fields = tuple(f.strip() for f in extra_fields.split(",") if f.strip())
+        self._schemas: Dict[str, ListSchema] = {}
+        self._loading = set()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_errors = 0
+
+    # --- Metadatos -----------------------------------------------------------------
+
+    def _due(self, list_ids: Iterable[str]) -> List[str]:
+        # Las que ya está leyendo otra consulta (p. ej. el calentado) no se vuelven a pedir
+        now = time.time()
+        due = []
+        with self._lock:
+            for list_id in filter(None, list_ids):
+                schema = self._schemas.get(list_id)
+                if list_id in self._loading:
+                    continue
+                if schema is None or now - schema.fetched_at >= (self.retry if schema.error else self.ttl):
+                    self._loading.add(list_id)
+                    due.append(list_id)
+        return due
+
+    def _store(self, list_id: str, columns: Optional[List[ListColumn]], error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self._loading.discard(list_id)
+            if isinstance(error, NotImplementedError):
+                # Reader sin metadatos (p. ej. uno de pruebas): no hay plan, sin que cuente como error
+                return
+            if error is not None:
+                self.load_errors += 1
+                previous = self._schemas.get(list_id)
+                print(f"⚠️ No se pudieron leer las columnas de {list_id}: {error}")
+                # Si había metadatos se siguen usando; si no, se reintenta más tarde
+                if previous is not None and not previous.error:
+                    previous.fetched_at = time.time() - self.ttl + self.retry
+                else:
+                    self._schemas[list_id] = ListSchema({}, time.time(), error=str(error)[:200])
+                return
+            self.loads += 1
+            self._schemas[list_id] = ListSchema({c.name: c for c in columns}, time.time())
+            indexed = sorted(c.name for c in columns if c.indexed)
+            print(f"🗂️ Columnas de {list_id}: {len(columns)} ({len(indexed)} indexadas: {', '.join(indexed) or 'ninguna'})")
+
+    def ensure(self, reader, list_ids: Iterable[str]) -> None:
+        """Lee (o refresca) los metadatos de las listas que lo necesiten."""
+        for list_id in self._due(list_ids):
+            try:
+                self._store(list_id, reader.get_columns(list_id))
+            except Exception as e:
+                # Incluye Graph degradado: se sigue con lo que haya y se reintenta más tarde
+                self._store(list_id, None, e)
+
+    async def ensure_async(self, reader, list_ids: Iterable[str]) -> None:
+        for list_id in self._due(list_ids):
+            try:
+                self._store(list_id, await reader.get_columns(list_id))
+            except Exception as e:
+                self._store(list_id, None, e)
+            finally:
+                # Si se canceló la consulta, que la próxima pueda volver a leerlas
+                self._loading.discard(list_id)
+
+    def columns(self, list_id: str) -> Optional[Dict[str, ListColumn]]:
+        schema = self._schemas.get(list_id)
+        if schema is None or schema.error:
+            return None
+        return schema.columns
+
+    # --- Plan --------------------------------------------------------------------
+
+    def split(self, list_id: str, predicates: List[Predicate]) -> Optional[Tuple[List[Predicate], List[Predicate]]]:
+        """(los que resuelve el servidor, los que se evalúan acá), o None si no se conocen los índices."""
+        columns = self.columns(list_id)
+        if columns is None:
+            return None
+        pushed, local = [], []
+        for predicate in predicates:
+            indexed = all(name in columns and columns[name].indexed for name in predicate.columns)
+            (pushed if indexed else local).append(predicate)
+        return pushed, local
+
+    def select(self, list_id: str, default: str) -> str:
+        """$select con los campos que usan las reglas (y los extra configurados) que existen en la lista."""
+        columns = self.columns(list_id)
+        if columns is None:
+            return default
+        wanted = ITEM_FIELDS + self.extra_fields
+        return ",".join(name for name in dict.fromkeys(wanted) if name in columns)
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "lists": {
+                list_id: {
+                    "age": round(now - schema.fetched_at, 1),
+                    "columns": len(schema.columns),
+                    "indexed": sorted(c.name for c in schema.columns.values() if c.indexed),
+                    "error": schema.error,
+                }
+                for list_id, schema in self._schemas.items()
+            },
+        }
+
+
+def odata_filter(predicates: List[Predicate]) -> str:
+    if len(predicates) == 1:
+        return predicates[0].odata
+    # Un "or" suelto cambiaría el significado al unir con "and"
+    return " and ".join(f"({p.odata})" if " or " in p.odata else p.odata for p in predicates)
+
+
+def local_filter(predicates: List[Predicate]) -> Optional[Callable[[SharePointItem], bool]]:
+    checks = [p.local for p in predicates]
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda item: all(check(item) for check in checks)
+
+
+_shared = QueryPlanner()
+
+
+def shared_planner() -> QueryPlanner:
+    """Los metadatos de las listas se leen una vez por proceso (los comparten /items, reportes y el CLI)."""
+    return _shared
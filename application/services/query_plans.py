@@ -0,0 +1,155 @@
+import os
+import re
+import threading
+import time
+from typing import Dict, List
+
+# Cada cuánto se vuelve a probar un filtro que la lista rechazó (p. ej. si después indexaron la columna)
+QUERY_PLAN_REPROBE = int(os.getenv("QUERY_PLAN_REPROBE", "21600"))
+# Peso de la última medición en el promedio de duración
+QUERY_PLAN_SMOOTHING = 0.3
+
+_FIELD_RE = re.compile(r"fields/(\w+)")
+
+
+def plan_key(list_id: str, filter_query: str, select_query: str, orderby_query: str) -> str:
+    """
+    Forma de la consulta: qué columnas filtra, qué trae y cómo ordena. Los valores
+    (fechas, servicios) no importan: SharePoint acepta o rechaza según las columnas.
+    """
+    columns = ",".join(sorted(set(_FIELD_RE.findall(filter_query or ""))))
+    return f"{list_id}|{columns}|{select_query}|{orderby_query}"
+
+
+class QueryPlanCache:
+    """
+    Recuerda, por lista, qué combinación de filtro/select/orderby aceptó Graph y
+    cuánto tardó. Así la cascada T1 → T2 → T3 no se redescubre en cada consulta:
+    los filtros que la lista rechazó se saltan hasta que pasa QUERY_PLAN_REPROBE y
+    se vuelve a probar con ellos.
+
+    `store` (opcional) es cualquier objeto con load() -> dict y save(dict), como
+    infrastructure.cache.plan_store.JsonPlanStore, para conservar los planes entre reinicios.
+    """
+
+    def __init__(self, reprobe: int = QUERY_PLAN_REPROBE, store=None):
+        self.reprobe = reprobe
+        self.store = None
+        self._plans: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.reprobed = 0
+        if store is not None:
+            self.use_store(store)
+
+    def use_store(self, store) -> None:
+        self.store = store
+        try:
+            plans = store.load() or {}
+        except Exception as e:
+            print(f"⚠️ No se pudieron leer los planes de consulta: {e}. Se redescubren")
+            plans = {}
+        with self._lock:
+            for key, plan in plans.items():
+                self._plans.setdefault(key, plan)
+        if plans:
+            print(f"🧭 {len(plans)} planes de consulta cargados")
+
+    def first_tier(self, label: str, list_id: str, select_query: str, orderby_query: str, tiers: List[tuple]) -> int:
+        """Índice del primer filtro de la cascada que vale la pena intentar (el último nunca se salta)."""
+        now = time.time()
+        with self._lock:
+            for index, (tier, filter_query) in enumerate(tiers[:-1]):
+                plan = self._plans.get(plan_key(list_id, filter_query, select_query, orderby_query))
+                if plan is None or plan["accepted"]:
+                    return index
+                if now - plan["checked_at"] >= self.reprobe:
+                    self.reprobed += 1
+                    print(f"🧭 [{label}] Se vuelve a probar {tier} (rechazado hace {int(now - plan['checked_at'])}s)")
+                    return index
+                self.skipped += 1
+                print(f"🧭 [{label}] Se salta {tier}: la lista lo rechazó ({plan.get('error') or 'error'})")
+        return max(0, len(tiers) - 1)
+
+    def record_success(
+        self, list_id: str, tier: str, filter_query: str, select_query: str, orderby_query: str, seconds: float, count: int
+    ) -> None:
+        key = plan_key(list_id, filter_query, select_query, orderby_query)
+        with self._lock:
+            plan = self._plans.get(key)
+            changed = plan is None or not plan["accepted"]
+            ms = seconds * 1000
+            if plan is not None and plan.get("ms") is not None and not changed:
+                ms = plan["ms"] + QUERY_PLAN_SMOOTHING * (ms - plan["ms"])
+            self._plans[key] = {
+                "list_id": list_id,
+                "tier": tier,
+                "accepted": True,
+                "checked_at": time.time(),
+                "ms": round(ms, 1),
+                "items": count,
+                "runs": (plan or {}).get("runs", 0) + 1 if not changed else 1,
+                "error": None,
+            }
+        if changed:
+            self._save()
+
+    def record_failure(
+        self, list_id: str, tier: str, filter_query: str, select_query: str, orderby_query: str, error: Exception
+    ) -> None:
+        key = plan_key(list_id, filter_query, select_query, orderby_query)
+        with self._lock:
+            self._plans[key] = {
+                "list_id": list_id,
+                "tier": tier,
+                "accepted": False,
+                "checked_at": time.time(),
+                "ms": None,
+                "items": 0,
+                "runs": 0,
+                "error": str(error)[:200],
+            }
+        # Se guarda siempre: si no, tras un reinicio se volvería a probar antes de tiempo
+        self._save()
+
+    def _save(self) -> None:
+        if self.store is None:
+            return
+        with self._lock:
+            plans = {key: dict(plan) for key, plan in self._plans.items()}
+        try:
+            self.store.save(plans)
+        except Exception as e:
+            print(f"⚠️ No se pudieron guardar los planes de consulta: {e}")
+
+    def save(self) -> None:
+        """Guarda también las duraciones (que por sí solas no disparan una escritura)."""
+        self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+        self._save()
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            plans = [
+                {"key": key, **plan, "age": round(now - plan["checked_at"], 1)}
+                for key, plan in sorted(self._plans.items())
+            ]
+        return {
+            "reprobe_seconds": self.reprobe,
+            "skipped_tiers": self.skipped,
+            "reprobed": self.reprobed,
+            "persisted": self.store is not None,
+            "plans": plans,
+        }
+
+
+_shared = QueryPlanCache()
+
+
+def shared_plans() -> QueryPlanCache:
+    """Los planes que comparten /items, los reportes y el CLI del proceso."""
+    return _shared
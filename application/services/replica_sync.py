@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from domain.ports.item_store import ItemStore
+from domain.ports.sharepoint_reader import DeltaTokenExpiredError, SharePointReader
+
+# Cada cuántos segundos se pide a Graph el delta de cambios
+REPLICA_SYNC_INTERVAL = int(os.getenv("REPLICA_SYNC_INTERVAL", "60"))
+
+# Campos que guarda la réplica (la unión de lo que usan el API y el reporte)
+REPLICA_LIST1_SELECT = (
+    "Title,eServicio,eRetencionEfectiva,eTipoGestion,eFormularioPendiente,"
+    "eDeudaPendiente,eRegularizadoCompleto,eBajaRealizada,eTipoBaja,eEstado,Created,Modified,"
+    "nLineaContacto,sLineaContacto,dFechaFormRegularizado"
+)
+REPLICA_LIST2_SELECT = "Title,BajaRealizada,TipodeBaja,Created,Modified"
+
+
+@dataclass
+class ReplicaList:
+    label: str
+    list_id: str
+    source_name: str
+    select_query: str
+
+
+def configured_replica_lists() -> List[ReplicaList]:
+    lists = []
+    if os.getenv("SP_LIST_ID"):
+        lists.append(ReplicaList("L1", os.getenv("SP_LIST_ID"), "gestion_baja", REPLICA_LIST1_SELECT))
+    if os.getenv("SP_LIST_ID_2"):
+        lists.append(ReplicaList("L2", os.getenv("SP_LIST_ID_2"), "migracion_post_pre", REPLICA_LIST2_SELECT))
+    return lists
+
+
+class ReplicaSync:
+    """
+    Motor de sincronización incremental: mantiene una réplica local de cada lista
+    usando /items/delta. La primera vez descarga todo; después solo lo creado,
+    modificado o borrado desde el último token delta.
+    """
+
+    def __init__(
+        self,
+        reader: SharePointReader,
+        store: ItemStore,
+        lists: Optional[List[ReplicaList]] = None,
+        interval: int = REPLICA_SYNC_INTERVAL,
+        stats_index=None
+    ):
+        self.reader = reader
+        self.store = store
+        self.lists = lists if lists is not None else configured_replica_lists()
+        self.interval = interval
+        # Índice de estadísticas opcional, actualizado con cada delta aplicado
+        self.stats_index = stats_index
+        self._indexed = set()
+        self._lock = threading.Lock()
+        self.last_sync: Dict[str, float] = {}
+
+    def sync_list(self, replica_list: ReplicaList) -> dict:
+        delta_link = self.store.get_delta_link(replica_list.list_id)
+        full = delta_link is None
+        try:
+            delta = self.reader.get_delta(
+                replica_list.list_id, replica_list.source_name,
+                select_query=replica_list.select_query, delta_link=delta_link
+            )
+        except DeltaTokenExpiredError:
+            print(f"♻️ [{replica_list.label}] Token delta expirado. Resincronizando desde cero...")
+            full = True
+            delta = self.reader.get_delta(replica_list.list_id, replica_list.source_name, select_query=replica_list.select_query)
+
+        if full:
+            self.store.replace_all(replica_list.source_name, delta.items)
+        else:
+            self.store.apply_changes(replica_list.source_name, delta.items, delta.deleted_ids)
+        self._index(replica_list.source_name, full, delta)
+        self.store.set_delta_link(replica_list.list_id, delta.delta_link)
+        self.last_sync[replica_list.list_id] = time.time()
+        return {
+            "list": replica_list.label,
+            "full": full,
+            "upserts": len(delta.items),
+            "deleted": len(delta.deleted_ids),
+        }
+
+    def _index(self, source_name: str, full: bool, delta) -> None:
+        if self.stats_index is None:
+            return
+        if full or source_name not in self._indexed:
+            # Primera vez en este proceso (la réplica puede venir de disco): indexar la lista entera
+            self.stats_index.replace_source(source_name, self.store.query(source_name, in_scope_only=False))
+            self._indexed.add(source_name)
+        else:
+            self.stats_index.upsert(delta.items)
+            self.stats_index.remove(source_name, delta.deleted_ids)
+
+    def sync_all(self) -> List[dict]:
+        with self._lock:
+            return [self.sync_list(replica_list) for replica_list in self.lists]
+
+    def is_fresh(self) -> bool:
+        now = time.time()
+        return all(now - self.last_sync.get(rl.list_id, 0) < self.interval for rl in self.lists)
+
+    def ensure_fresh(self, force: bool = False) -> None:
+        """Sincroniza si la réplica es más vieja que el intervalo. Los hilos concurrentes esperan al mismo sync."""
+        if not force and self.is_fresh():
+            return
+        with self._lock:
+            if not force and self.is_fresh():
+                return
+            for replica_list in self.lists:
+                self.sync_list(replica_list)
@@ -0,0 +1,267 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.async_sharepoint_reader import AsyncSharePointReader
+from domain.ports.report_writer import ReportWriter
+
+# Reportes que se generan a la vez (el resto espera su turno)
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+# Trabajos en cola o en curso a partir de los cuales se rechazan pedidos nuevos
+REPORT_MAX_PENDING = int(os.getenv("REPORT_MAX_PENDING", "8"))
+# Dónde quedan los archivos generados y cuántos se conservan
+REPORTS_DIR = os.getenv("REPORTS_DIR", "data/reports")
+REPORT_KEEP_ARTIFACTS = int(os.getenv("REPORT_KEEP_ARTIFACTS", "20"))
+# Cuánto se recuerda un trabajo terminado
+REPORT_JOB_TTL = int(os.getenv("REPORT_JOB_TTL", "3600"))
+
+
+class ReportQueueFullError(Exception):
+    pass
+
+
+class PageCountingReader(AsyncSharePointReader):
+    """Envuelve un reader y avisa cada página que baja de Graph (para el progreso del trabajo)."""
+
+    def __init__(self, reader: AsyncSharePointReader, on_page: Callable[[int], None]):
+        self.reader = reader
+        self.on_page = on_page
+
+    async def iter_pages(self, *args, **kwargs) -> AsyncIterator[List[SharePointItem]]:
+        async for page in self.reader.iter_pages(*args, **kwargs):
+            self.on_page(len(page))
+            yield page
+
+    async def get_items(self, *args, **kwargs) -> List[SharePointItem]:
+        items = []
+        async for page in self.iter_pages(*args, **kwargs):
+            items.extend(page)
+        return items
+
+    async def get_columns(self, list_id: str):
+        return await self.reader.get_columns(list_id)
+
+
+def data_version(items: List[SharePointItem]) -> str:
+    """Huella de lo que termina en el reporte: mismo contenido, misma versión (y mismo archivo)."""
+    digest = hashlib.blake2b(digest_size=8)
+    for item in items:
+        digest.update(
+            f"{item.source_list}\x1f{item.id}\x1f{item.status}\x1f{item.estado_baja}\x1f"
+            f"{item.phone_number}\x1f{item.raw_fields.get('Created')}\x1e".encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+def _touch(path: str) -> bool:
+    """Marca el archivo como recién usado (la poda borra primero los más viejos). False si no existe."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+@dataclass
+class ReportJob:
+    id: str
+    format: str
+    params: Dict[str, Any]
+    status: str = "queued"  # queued | loading | writing | done | failed
+    pages: int = 0
+    items_loaded: int = 0
+    rows_written: int = 0
+    rows_total: Optional[int] = None
+    data_version: Optional[str] = None
+    data_token: Any = None
+    cached: bool = False
+    path: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "format": self.format,
+            "params": self.params,
+            "status": self.status,
+            "progress": {
+                "pages": self.pages,
+                "items_loaded": self.items_loaded,
+                "rows_written": self.rows_written,
+                "rows_total": self.rows_total,
+            },
+            "data_version": self.data_version,
+            "cached": self.cached,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "seconds": round((self.finished_at or time.time()) - self.created_at, 3),
+        }
+
+
+class ReportJobs:
+    """
+    Generación de reportes en segundo plano para el API. Cada pedido es un trabajo
+    con id: primero carga los items (`load`, normalmente desde el caché de /items),
+    después escribe el archivo en un pool de hilos acotado.
+
+    Los archivos se guardan por versión de datos: si el contenido no cambió se
+    reutiliza el que ya existe. Y si `data_token()` (barato, sin cargar nada) es el
+    mismo que tenía el último trabajo igual terminado, se responde ese trabajo al
+    instante sin encolar nada.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[Dict[str, Any], Callable[[int], None]], Awaitable[List[SharePointItem]]],
+        writer_factory: Callable[[str], ReportWriter],
+        data_token: Callable[[], Any] = lambda: None,
+        directory: str = REPORTS_DIR,
+        workers: int = REPORT_WORKERS,
+        max_pending: int = REPORT_MAX_PENDING,
+        keep_artifacts: int = REPORT_KEEP_ARTIFACTS,
+        job_ttl: int = REPORT_JOB_TTL
+    ):
+        self.load = load
+        self.writer_factory = writer_factory
+        self.data_token = data_token
+        self.directory = directory
+        self.max_pending = max_pending
+        self.keep_artifacts = keep_artifacts
+        self.job_ttl = job_ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._slots = asyncio.Semaphore(workers)
+        self._jobs: Dict[str, ReportJob] = {}
+        self._latest: Dict[tuple, ReportJob] = {}
+        self._tasks = set()
+        self.generated = 0
+        self.reused = 0
+
+    @staticmethod
+    def _key(fmt: str, params: Dict[str, Any]) -> tuple:
+        return (fmt,) + tuple(sorted(params.items()))
+
+    def submit(self, fmt: str, params: Dict[str, Any]) -> ReportJob:
+        self._prune()
+        key = self._key(fmt, params)
+        token = self.data_token()
+        latest = self._latest.get(key)
+        if latest is not None and not latest.finished:
+            # Ya hay uno igual en curso: se comparte
+            return latest
+        if latest is not None and latest.status == "done" and token is not None and \
+                latest.data_token == token and _touch(latest.path):
+            self.reused += 1
+            return latest
+
+        if sum(1 for job in self._jobs.values() if not job.finished) >= self.max_pending:
+            raise ReportQueueFullError(f"Hay {self.max_pending} reportes en curso o en cola. Reintentá en unos segundos")
+        job = ReportJob(id=uuid.uuid4().hex, format=fmt, params=dict(params))
+        self._jobs[job.id] = job
+        self._latest[key] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[ReportJob]:
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    async def _run(self, job: ReportJob) -> None:
+        async with self._slots:
+            try:
+                job.status = "loading"
+
+                def on_page(count: int) -> None:
+                    job.pages += 1
+                    job.items_loaded += count
+
+                items = await self.load(job.params, on_page)
+                # El token se toma después de cargar: es el estado de los datos que van al archivo
+                job.data_token = self.data_token()
+                job.items_loaded = job.rows_total = len(items)
+                # Hashear los items y escribir es CPU: ambos van al pool, fuera del event loop
+                if await asyncio.get_running_loop().run_in_executor(self._pool, self._materialize, job, items):
+                    self.reused += 1
+                else:
+                    self.generated += 1
+                job.status = "done"
+                print(f"📑 Reporte {job.id[:8]} listo: {job.rows_total} filas{' (reutilizado)' if job.cached else ''}")
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                print(f"🔥 Reporte {job.id[:8]} falló: {e}")
+            finally:
+                job.finished_at = time.time()
+
+    def _materialize(self, job: ReportJob, items: List[SharePointItem]) -> bool:
+        """Deja el archivo del reporte en `job.path`. True si ya existía y se reutilizó."""
+        job.data_version = data_version(items)
+        job.path = os.path.join(self.directory, f"reporte-{job.data_version}.{job.format}")
+        if _touch(job.path):
+            # Mismos datos que un reporte anterior: el archivo ya está (y pasa a ser el más reciente)
+            job.cached = True
+            job.rows_written = len(items)
+            return True
+        job.status = "writing"
+
+        def on_rows(rows: int) -> None:
+            job.rows_written = rows
+
+        self.writer_factory(job.path).write_stream(items, on_rows)
+        self._prune_artifacts()
+        return False
+
+    def _prune(self) -> None:
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and now - job.finished_at > self.job_ttl:
+                del self._jobs[job_id]
+                for key, latest in list(self._latest.items()):
+                    if latest is job:
+                        del self._latest[key]
+
+    def _prune_artifacts(self) -> None:
+        try:
+            names = [n for n in os.listdir(self.directory) if n.startswith("reporte-") and not n.endswith(".tmp")]
+        except FileNotFoundError:
+            return
+        reports = sorted(
+            (n for n in names if not n.endswith(".summary.json")),
+            key=lambda n: os.path.getmtime(os.path.join(self.directory, n)),
+            reverse=True
+        )
+        for name in reports[self.keep_artifacts:]:
+            for path in (os.path.join(self.directory, name), os.path.join(self.directory, f"{name}.summary.json")):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._pool.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "jobs": len(self._jobs),
+            "running": sum(1 for job in self._jobs.values() if not job.finished),
+            "generated": self.generated,
+            "reused": self.reused,
+        }
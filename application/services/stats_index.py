@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from domain.entities.sharepoint_item import LIST_DISPLAY_NAMES, SharePointItem
+
+STATUSES = ("Pendiente", "Procesado", "Desconocido")
+
+# Antigüedad de los pendientes (días desde su creación) para el resumen del backlog
+BACKLOG_BUCKETS = ((7, "0-7"), (30, "8-30"), (90, "31-90"), (None, "90+"))
+
+# (lista, estado, día 'YYYY-MM-DD' o '' si el item no tiene fecha)
+Bucket = Tuple[str, str, str]
+
+
+def _bucket(item: SharePointItem) -> Bucket:
+    created = item.raw_fields.get("Created") or ""
+    return item.source_list, item.status, created[:10]
+
+
+class StatsIndex:
+    """
+    Contadores agregados por (lista, estado, día) que se actualizan a medida que
+    entran o cambian items, para que /stats responda sin recorrer ni transferir
+    filas. Cada item se recuerda por (lista, id): si vuelve a llegar con otro
+    estado o fecha se mueve de un contador a otro en vez de contarse dos veces.
+
+    Solo cuenta los items dentro del alcance del dashboard (SharePointItem.en_alcance).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Dict[Tuple[str, str], Bucket] = {}
+        self._daily: Dict[Bucket, int] = defaultdict(int)
+        self._totals: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.version = 0
+        self.updated_at: Optional[float] = None
+
+    def _move(self, key: Tuple[str, str], bucket: Optional[Bucket]) -> bool:
+        old = self._items.get(key)
+        if old == bucket:
+            return False
+        if old is not None:
+            self._add(old, -1)
+            del self._items[key]
+        if bucket is not None:
+            self._add(bucket, 1)
+            self._items[key] = bucket
+        return True
+
+    def _add(self, bucket: Bucket, delta: int) -> None:
+        source, status, day = bucket
+        self._daily[bucket] += delta
+        if not self._daily[bucket]:
+            del self._daily[bucket]
+        self._totals[(source, status)] += delta
+        if not self._totals[(source, status)]:
+            del self._totals[(source, status)]
+
+    def _changed(self, changed: bool) -> None:
+        if changed:
+            self.version += 1
+            self.updated_at = time.time()
+
+    def upsert(self, items: Iterable[SharePointItem]) -> None:
+        changed = False
+        with self._lock:
+            for item in items:
+                bucket = _bucket(item) if item.en_alcance else None
+                changed = self._move((item.source_list, item.id), bucket) or changed
+            self._changed(changed)
+
+    def remove(self, source_list: str, ids: Iterable[str]) -> None:
+        changed = False
+        with self._lock:
+            for item_id in ids:
+                changed = self._move((source_list, item_id), None) or changed
+            self._changed(changed)
+
+    def replace_source(self, source_list: str, items: List[SharePointItem]) -> None:
+        """Reemplaza todo lo indexado de una lista (resincronización completa de la réplica)."""
+        with self._lock:
+            stale = [item_id for source, item_id in self._items if source == source_list]
+        self.remove(source_list, stale)
+        self.upsert(items)
+
+    def summary(
+        self,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        source_list: Optional[str] = None,
+        today: Optional[date] = None
+    ) -> dict:
+        """
+        Totales por lista y estado, serie diaria y mensual y backlog de pendientes.
+        El costo depende de cuántos días/listas hay, no de cuántos items.
+        Con fechas (YYYY-MM-DD) las series y los totales se limitan a ese rango.
+        """
+        with self._lock:
+            daily = [
+                (bucket, count) for bucket, count in self._daily.items()
+                if (source_list is None or bucket[0] == source_list)
+            ]
+            if from_date is None and to_date is None:
+                totals = [(key, count) for key, count in self._totals.items() if source_list is None or key[0] == source_list]
+            else:
+                totals = None
+            version, updated_at = self.version, self.updated_at
+
+        if from_date or to_date:
+            daily = [
+                (bucket, count) for bucket, count in daily
+                if bucket[2] and (not from_date or bucket[2] >= from_date) and (not to_date or bucket[2] <= to_date)
+            ]
+        if totals is None:
+            by_key: Dict[Tuple[str, str], int] = defaultdict(int)
+            for (source, status, _), count in daily:
+                by_key[(source, status)] += count
+            totals = list(by_key.items())
+
+        by_list: Dict[str, Dict[str, int]] = {}
+        by_status = {status: 0 for status in STATUSES}
+        for (source, status), count in totals:
+            entry = by_list.setdefault(LIST_DISPLAY_NAMES.get(source, source), {"total": 0, **{s: 0 for s in STATUSES}})
+            entry[status] += count
+            entry["total"] += count
+            by_status[status] += count
+
+        days: Dict[str, Dict[str, int]] = {}
+        months: Dict[str, Dict[str, int]] = {}
+        for (_, status, day), count in daily:
+            if not day:
+                continue
+            for key, series in ((day, days), (day[:7], months)):
+                row = series.setdefault(key, {"total": 0, **{s: 0 for s in STATUSES}})
+                row[status] += count
+                row["total"] += count
+
+        return {
+            "version": version,
+            "updated_at": updated_at,
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_list": by_list,
+            "backlog": self._backlog(daily, today or datetime.utcnow().date()),
+            "daily": [{"day": day, **days[day]} for day in sorted(days)],
+            "monthly": [{"month": month, **months[month]} for month in sorted(months)],
+        }
+
+    @staticmethod
+    def _backlog(daily, today: date) -> dict:
+        """Pendientes por lista y por antigüedad, y el día del más viejo."""
+        by_list: Dict[str, int] = defaultdict(int)
+        by_age = {label: 0 for _, label in BACKLOG_BUCKETS}
+        oldest = None
+        for (source, status, day), count in daily:
+            if status != "Pendiente":
+                continue
+            by_list[LIST_DISPLAY_NAMES.get(source, source)] += count
+            if not day:
+                continue
+            oldest = day if oldest is None or day < oldest else oldest
+            try:
+                age = (today - date.fromisoformat(day)).days
+            except ValueError:
+                continue
+            for limit, label in BACKLOG_BUCKETS:
+                if limit is None or age <= limit:
+                    by_age[label] += count
+                    break
+        return {"total": sum(by_list.values()), "by_list": dict(by_list), "by_age": by_age, "oldest_day": oldest}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"items": len(self._items), "buckets": len(self._daily), "version": self.version}
@@ -0,0 +1,142 @@
+from typing import AsyncIterator, List, Optional
+import asyncio
+
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.async_sharepoint_reader import AsyncSharePointReader
+from domain.ports.sharepoint_reader import SourceUnavailableError
+from application.services.list_fetcher import fetch_lists_async, stream_lists_async
+from application.services.query_planner import shared_planner
+from application.services.replica_sync import ReplicaSync
+from application.use_cases.get_filtered_items import GetFilteredItemsUseCase
+
+
+class AsyncGetFilteredItemsUseCase(GetFilteredItemsUseCase):
+    """
+    Variante asíncrona de GetFilteredItemsUseCase para el API.
+    Comparte caché, plan de consultas y filtrado; solo cambia la descarga.
+    """
+
+    def __init__(self, reader: AsyncSharePointReader, replica: Optional[ReplicaSync] = None):
+        super().__init__(reader, replica)
+
+    async def execute(
+        self,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        limit: int = 1000,
+        force_refresh: bool = False
+    ) -> List[SharePointItem]:
+        if self.replica is not None:
+            # El sync delta usa el reader síncrono: se ejecuta fuera del event loop
+            return await asyncio.to_thread(self._execute_from_replica, status, from_date, to_date, limit, force_refresh)
+
+        await shared_planner().ensure_async(self.reader, self._list_ids())
+        queries = self._plan_queries(from_date, to_date, limit)
+        results, ages = await self._cache.get_or_fetch_async(
+            queries, from_date, to_date, limit, self._fetch, force_refresh=force_refresh
+        )
+        degraded = self._serve_degraded(queries, results, ages, from_date, to_date, limit)
+        self._record_age(ages, degraded)
+        return self._merge(status, queries, results)
+
+    async def _fetch(self, queries):
+        return await fetch_lists_async(self.reader, queries)
+
+    async def refresh(
+        self,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        limit: int,
+        sources: Optional[List[str]] = None,
+        only_missing: bool = False
+    ) -> None:
+        """
+        Vuelve a descargar un rango (solo las listas de `sources`, si se indica) y lo
+        deja en caché. Con only_missing se saltea lo que ya está vigente en caché.
+        """
+        await shared_planner().ensure_async(self.reader, self._list_ids())
+        queries = [q for q in self._plan_queries(from_date, to_date, limit) if sources is None or q.source_name in sources]
+        if only_missing:
+            queries = [q for q in queries if not self._cache.is_fresh(q.source_name, from_date, to_date, limit)]
+        if queries:
+            await self._cache.get_or_fetch_async(queries, from_date, to_date, limit, self._fetch, force_refresh=True)
+
+    def due_for_refresh(self, ahead: float, idle: int):
+        return self._cache.due_for_refresh(ahead, idle)
+
+    async def stream(
+        self,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        limit: int = 1000,
+        force_refresh: bool = False
+    ) -> AsyncIterator[List[SharePointItem]]:
+        """
+        Igual que execute pero entrega los items por páginas a medida que llegan
+        de Graph. No acumula el resultado, así que tampoco lo guarda en caché.
+        """
+        if self.replica is not None:
+            # La réplica ya tiene todo en local: se entrega de una vez
+            items = await self.execute(status, from_date, to_date, limit, force_refresh)
+            if items:
+                yield items
+            return
+
+        # Las listas que ya están en caché se entregan de ahí; el resto se baja en streaming
+        await shared_planner().ensure_async(self.reader, self._list_ids())
+        queries = self._plan_queries(from_date, to_date, limit)
+        cached, ages, stale = {}, [], []
+        if not force_refresh:
+            await self._cache.pull_async(queries, from_date, to_date, limit)
+            for index, query in enumerate(queries):
+                hit = self._cache.lookup(query.source_name, from_date, to_date, limit)
+                if hit is not None:
+                    cached[index] = self._filter_status(hit[0], status)
+                    ages.append(hit[1])
+                    if hit[1] >= self._cache.ttl:
+                        stale.append(query)
+        if stale:
+            # Lo vencido se entrega igual y se refresca aparte (single-flight, como en execute)
+            self._cache.run_in_background(self.refresh(from_date, to_date, limit, [q.source_name for q in stale]))
+        missing = [query for index, query in enumerate(queries) if index not in cached]
+        # Se cuenta al final: si Graph se cae antes de entregar nada, el request pasa a degraded
+        self._record_age(ages + [0.0] * len(missing), count=False)
+
+        next_index = 0
+        streamed = False
+        if missing:
+            try:
+                async for query, page in stream_lists_async(self.reader, missing):
+                    streamed = True
+                    # Respetar el orden de las listas: antes de la primera página de una,
+                    # se entregan las que estaban en caché y van antes
+                    index = queries.index(query)
+                    for previous in range(next_index, index):
+                        if cached.get(previous):
+                            yield cached[previous]
+                    next_index = index + 1
+                    page = self._filter_status(page, status)
+                    if page:
+                        yield page
+            except SourceUnavailableError:
+                # Graph degradado antes de entregar nada: lo que falta sale de la última copia
+                if streamed:
+                    raise
+                for query in missing:
+                    hit = self._cache.fallback(query.source_name, from_date, to_date, limit)
+                    if hit is not None:
+                        cached[queries.index(query)] = self._filter_status(hit[0], status)
+                        ages.append(hit[1])
+                if not cached:
+                    raise
+                self._record_age(ages, degraded=True, count=False)
+            except Exception:
+                # A mitad de camino no se puede seguir como si nada: el cliente recibe el error
+                if streamed or not cached:
+                    raise
+        self._count_cache_status()
+        for index in range(next_index, len(queries)):
+            if cached.get(index):
+                yield cached[index]
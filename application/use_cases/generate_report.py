@@ -1,25 +1,36 @@
+import asyncio
 import os
-from domain.ports.sharepoint_reader import SharePointReader
+from collections import Counter
+from itertools import chain
+from domain.entities.sharepoint_item import SharePointItem, select_fields
+from domain.ports.async_sharepoint_reader import AsyncSharePointReader
 from domain.ports.report_writer import ReportWriter
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+from application.services.list_fetcher import ListQuery, stream_lists_async
+from application.services.query_planner import Predicate, local_filter, odata_filter, shared_planner
+from application.services.replica_sync import ReplicaSync
+
+# Tope por lista (el mismo que aplica el reader por defecto)
+REPORT_MAX_ITEMS = 1000
 
 class GenerateReportUseCase:
 
     def __init__(
         self,
-        reader: SharePointReader,
+        reader: AsyncSharePointReader,
         writer: ReportWriter,
+        replica: Optional[ReplicaSync] = None,
     ):
         self.reader = reader
         self.writer = writer
+        self.replica = replica
 
-    def execute(self) -> None:
+    async def execute(self) -> Optional[dict]:
         print("🚀 Iniciando proceso de generación de reporte OPTIMIZADO...")
         
         list1_id = os.getenv("SP_LIST_ID")
         list2_id = os.getenv("SP_LIST_ID_2")
-        
-        all_items = []
-        
+
         # --- Configuración de Optimización para Lista 1 ---
         # Solo traemos campos necesarios
         list1_select = (
@@ -41,46 +52,123 @@ class GenerateReportUseCase:
         # Filtramos para ignorar aquellos que no tengan ni Title ni BajaRealizada (si los hay).
         list2_filter = "fields/Title ne null"
 
-        # Procesar Lista 1
+        await shared_planner().ensure_async(self.reader, [list1_id, list2_id])
+        queries = self._plan_queries(list1_id, list2_id, list1_select, list1_filter, list2_select, list2_filter)
+        if self.replica is not None:
+            # La réplica y el writer son bloqueantes: van a un hilo
+            items = await asyncio.to_thread(self._items_from_replica, queries)
+            return await asyncio.to_thread(self._write, items)
+
+        # Las listas se bajan en paralelo y sus páginas llegan al writer en orden (primero L1,
+        # luego L2) a medida que llegan: el dataset nunca está entero en memoria
+        pages = stream_lists_async(self.reader, queries)
+        try:
+            return await asyncio.to_thread(self._write, _blocking_items(pages, asyncio.get_running_loop()))
+        finally:
+            await pages.aclose()
+
+    def _items_from_replica(self, queries: List[ListQuery]) -> List[SharePointItem]:
+        """
+        El mismo dataset que el camino en vivo, armado desde la réplica: mismas consultas
+        (nombre de fuente, $select, filtro y tope por lista). La réplica guarda la Lista 2
+        como `migracion_post_pre` y con su propio $select; acá cada item se rehace con el
+        nombre y los campos del reporte, así estado y Dashboard no dependen de dónde salió.
+        """
+        self.replica.ensure_fresh()
+        replicated = {replica_list.list_id: replica_list.source_name for replica_list in self.replica.lists}
+        all_items = []
+        for query in queries:
+            if query.list_id not in replicated:
+                continue
+            stored = self.replica.store.query(replicated[query.list_id], in_scope_only=False)
+            # Graph entrega sin $orderby por ID ascendente: el tope se corta en el mismo orden
+            stored.sort(key=lambda i: (len(i.id), i.id))
+            keep = select_fields(query.select_query)
+            items = []
+            for item in stored:
+                item = SharePointItem(item.id, item.title, item.raw_fields, query.source_name, keep_fields=keep)
+                if query.local_filter is None or query.local_filter(item):
+                    items.append(item)
+                    if len(items) >= query.max_items:
+                        break
+            all_items.extend(items)
+        print(f"🗂️ {len(all_items)} items leídos de la réplica local")
+        return all_items
+
+    def _plan_queries(self, list1_id, list2_id, list1_select, list1_filter, list2_select, list2_filter) -> list:
+        queries = []
+        # Lista 1: si el filtro optimizado falla, se filtra al paginar; como último recurso, sin filtro ni $select
         if list1_id:
-            try:
-                all_items.extend(self.reader.get_items(
-                    list1_id, 
-                    "gestion_baja", 
-                    filter_query=list1_filter, 
-                    select_query=list1_select
-                ))
-            except Exception as e:
-                print(f"⚠️ Error optimizado en Lista 1, reintentando sin filtro: {e}")
-                all_items.extend(self.reader.get_items(list1_id, "gestion_baja"))
-        
-        # Procesar Lista 2
+            scope = Predicate(
+                "alcance", ("eServicio", "eBajaRealizada"), list1_filter,
+                lambda item: item.en_alcance or bool(item.estado_baja)
+            )
+            queries.append(self._query("L1", list1_id, "gestion_baja", list1_select, scope))
+        # Lista 2
         if list2_id:
-            try:
-                all_items.extend(self.reader.get_items(
-                    list2_id, 
-                    "formulario_baja_hogar",
-                    filter_query=list2_filter,
-                    select_query=list2_select
-                ))
-            except Exception as e:
-                print(f"⚠️ Error optimizado en Lista 2, reintentando sin filtro: {e}")
-                all_items.extend(self.reader.get_items(list2_id, "formulario_baja_hogar"))
-
-        if not all_items:
+            title = Predicate("Title", ("Title",), list2_filter, lambda item: item.raw_fields.get("Title") is not None)
+            queries.append(self._query("L2", list2_id, "formulario_baja_hogar", list2_select, title))
+        return queries
+
+    @staticmethod
+    def _query(label: str, list_id: str, source_name: str, select: str, predicate: Predicate) -> ListQuery:
+        planner = shared_planner()
+        split = planner.split(list_id, [predicate])
+        if split is None:
+            # Sin metadatos de la lista: la cascada de siempre
+            return ListQuery(
+                label, list_id, source_name, select, REPORT_MAX_ITEMS, orderby_query="",
+                tiers=[("optimizado", predicate.odata), ("en memoria", ""), ("sin filtro", "")],
+                local_filter=predicate.local, bare_last_tier=True
+            )
+        pushed, local = split
+        tiers = []
+        if local:
+            print(f"🧮 [{label}] Columnas sin índice: {', '.join(p.name for p in local)} (si la lista no las acepta en el filtro, se evalúan acá)")
+            # Bajo el umbral de vista de SharePoint (5000 items) la lista acepta filtrar columnas sin índice:
+            # se prueba con todo; si la rechaza (400), el plan lo recuerda y las próximas arrancan en el siguiente
+            tiers.append(("completo", predicate.odata))
+        if pushed:
+            tiers.append(("indexado", odata_filter(pushed)))
+        # Sin $filter pero con el $select y las condiciones evaluadas al paginar; y si la lista
+        # rechaza hasta eso (p. ej. una columna del $select), la consulta pelada de siempre
+        tiers += [("en memoria", ""), ("sin filtro", "")]
+        # El $select es el del reporte de siempre (no el ampliado del planner): las columnas
+        # que trae definen el estado de cada item y, con él, los números del Dashboard
+        return ListQuery(
+            label, list_id, source_name, select, REPORT_MAX_ITEMS, orderby_query="",
+            tiers=tiers, local_filter=local_filter([predicate]), bare_last_tier=True
+        )
+
+    def _write(self, items: Iterable[SharePointItem]) -> Optional[dict]:
+        items = iter(items)
+        first = next(items, None)
+        if first is None:
             print("⚠️ No se encontraron items.")
-            return
+            return None
 
-        print("🔍 Aplicando filtros finales en memoria...")
-        pendientes = [i for i in all_items if i.es_pendiente()]
-        procesados = [i for i in all_items if i.es_procesado()]
+        # Cada item trae su estado calculado desde la ingesta: se cuenta al pasar hacia el writer
+        counts = Counter()
 
-        print(f"📊 Resumen Optimizado: {len(all_items)} traídos, {len(pendientes)} pendientes, {len(procesados)} procesados.")
+        def counted() -> Iterator[SharePointItem]:
+            for item in chain([first], items):
+                counts[item.status] += 1
+                yield item
 
-        print("💾 Guardando reporte Excel...")
-        self.writer.write(
-            all_items=all_items,
-            pendientes=pendientes,
-            procesados=procesados,
-        )
+        print("💾 Guardando reporte...")
+        result = self.writer.write_stream(counted())
+        print(f"📊 Resumen Optimizado: {sum(counts.values())} traídos, {counts['Pendiente']} pendientes, {counts['Procesado']} procesados.")
         print("✨ Proceso OPTIMIZADO finalizado.")
+        return result
+
+
+def _blocking_items(
+    pages: AsyncIterator[Tuple[ListQuery, List[SharePointItem]]], loop: asyncio.AbstractEventLoop
+) -> Iterator[SharePointItem]:
+    """Los items de `pages` para el writer, que corre en otro hilo: cada página se pide al event loop."""
+    while True:
+        try:
+            _, page = asyncio.run_coroutine_threadsafe(pages.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
+        yield from page
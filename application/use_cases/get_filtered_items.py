@@ -1,65 +1,144 @@
 from typing import List, Optional
 from domain.entities.sharepoint_item import SharePointItem
-from domain.ports.sharepoint_reader import SharePointReader
+from domain.ports.metrics import metrics, timed
+from domain.ports.sharepoint_reader import SharePointReader, SourceUnavailableError
+from application.services.items_cache import ItemsCache
+from application.services.list_fetcher import ListQuery, fetch_lists, split_results
+from application.services.query_planner import Predicate, local_filter, odata_filter, shared_planner
+from application.services.replica_sync import ReplicaSync
 import os
-
 import time
 
+# OData Selects
+LIST1_SELECT = (
+    "Title,eServicio,eRetencionEfectiva,eTipoGestion,eFormularioPendiente,"
+    "eDeudaPendiente,eRegularizadoCompleto,eBajaRealizada,eTipoBaja,eEstado,Created,Modified,"
+    "nLineaContacto,sLineaContacto"
+)
+LIST2_SELECT = "Title,BajaRealizada,TipodeBaja,Created,Modified"
+
+# Universo del dashboard en Lista 1 (mismo criterio que SharePointItem.en_alcance)
+LIST1_SERVICE_FILTER = "fields/eServicio eq 'Móvil' or fields/eServicio eq 'Móvil B2B'"
+
+
 class GetFilteredItemsUseCase:
-    # Cache simple en memoria: {(params_tuple): (timestamp, data)}
-    _cache = {}
-    CACHE_TTL = 300  # 5 minutos
+    # Caché por lista y rango de fechas, compartido entre instancias (y con la variante async)
+    _cache = ItemsCache()
 
-    def __init__(self, reader: SharePointReader):
+    def __init__(self, reader: SharePointReader, replica: Optional[ReplicaSync] = None):
         self.reader = reader
+        # Si hay réplica local (sincronizada por delta) se consulta ahí en lugar de Graph
+        self.replica = replica
+        # Tras execute: edad en segundos del dato más viejo servido y de dónde salió
+        # (hit | stale | miss | replica | degraded: Graph no respondía y se sirvió la última copia)
+        self.data_age: Optional[float] = None
+        self.cache_status: Optional[str] = None
 
     def execute(
-        self, 
-        status: Optional[str] = None, 
-        from_date: Optional[str] = None, 
+        self,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
         to_date: Optional[str] = None,
         limit: int = 1000,
         force_refresh: bool = False
     ) -> List[SharePointItem]:
-        # Clave del caché única por parámetros
-        cache_key = (status, from_date, to_date, limit)
-        now = time.time()
+        if self.replica is not None:
+            return self._execute_from_replica(status, from_date, to_date, limit, force_refresh)
 
-        # 1. Intentar servir del caché
-        if not force_refresh:
-            if cache_key in self._cache:
-                timestamp, cached_data = self._cache[cache_key]
-                if now - timestamp < self.CACHE_TTL:
-                    print(f"🚀 Sirviendo {len(cached_data)} items desde caché (Edad: {int(now - timestamp)}s)")
-                    return cached_data
-                else:
-                    print("⌛ Caché expirado. Recargando...")
-            else:
-                print("🆕 Sin caché previo. Consultando SharePoint...")
+        # Las listas que falten en caché se descargan en paralelo; el tiempo total ≈ la lista más lenta
+        shared_planner().ensure(self.reader, self._list_ids())
+        queries = self._plan_queries(from_date, to_date, limit)
+        results, ages = self._cache.get_or_fetch(
+            queries, from_date, to_date, limit,
+            lambda missing: fetch_lists(self.reader, missing), force_refresh=force_refresh
+        )
+        degraded = self._serve_degraded(queries, results, ages, from_date, to_date, limit)
+        self._record_age(ages, degraded)
+        return self._merge(status, queries, results)
+
+    def _serve_degraded(self, queries: List[ListQuery], results, ages: List[float], from_date, to_date, limit) -> bool:
+        """Las listas que fallaron porque Graph está degradado se responden con la última copia en caché."""
+        degraded = False
+        for index, result in enumerate(results):
+            if not isinstance(result, SourceUnavailableError):
+                continue
+            hit = self._cache.fallback(queries[index].source_name, from_date, to_date, limit)
+            if hit is not None:
+                results[index], ages[index] = hit
+                degraded = True
+        return degraded
+
+    def _record_age(self, ages: List[float], degraded: bool = False, count: bool = True) -> None:
+        """Estado del caché para los headers; con count=False todavía no va a las métricas (una vez por request)."""
+        self.data_age = max(ages, default=0.0)
+        if degraded:
+            self.cache_status = "degraded"
+        elif any(age == 0 for age in ages):
+            self.cache_status = "miss"
+        elif self.data_age >= self._cache.ttl:
+            self.cache_status = "stale"
         else:
-            print("🔄 Forzando recarga de datos...")
+            self.cache_status = "hit"
+        if count:
+            self._count_cache_status()
 
-        list1_id = os.getenv("SP_LIST_ID")
-        list2_id = os.getenv("SP_LIST_ID_2")
-        
+    def _count_cache_status(self) -> None:
+        recorder = metrics()
+        recorder.inc("items_cache_requests_total", labels={"result": self.cache_status})
+        recorder.observe("items_cache_data_age_seconds", self.data_age)
+
+    @classmethod
+    def configure_cache(cls, backend) -> None:
+        """Backend compartido del caché (disco o Redis, None = solo en proceso); se llama una vez al arrancar."""
+        cls._cache.use_backend(backend)
+
+    @classmethod
+    def shared_cache(cls) -> ItemsCache:
+        return cls._cache
+
+    def _execute_from_replica(
+        self,
+        status: Optional[str],
+        from_date: Optional[str],
+        to_date: Optional[str],
+        limit: int,
+        force_refresh: bool
+    ) -> List[SharePointItem]:
+        # Solo viaja por la red lo que cambió desde el último sync
+        try:
+            self.replica.ensure_fresh(force=force_refresh)
+            self.cache_status = "replica"
+        except SourceUnavailableError as e:
+            # La réplica local sigue sirviendo aunque no se pueda sincronizar
+            print(f"🛟 No se pudo sincronizar la réplica ({e}). Sirviendo la última copia local")
+            self.cache_status = "degraded"
+        now = time.time()
+        self.data_age = max((now - self.replica.last_sync.get(rl.list_id, now) for rl in self.replica.lists), default=0.0)
+        self._count_cache_status()
         all_items = []
-        
-        # OData Selects
-        list1_select = (
-            "Title,eServicio,eRetencionEfectiva,eTipoGestion,eFormularioPendiente,"
-            "eDeudaPendiente,eRegularizadoCompleto,eBajaRealizada,eTipoBaja,eEstado,Created,Modified,"
-            "nLineaContacto,sLineaContacto"
-        )
-        list2_select = "Title,BajaRealizada,TipodeBaja,Created,Modified"
+        for replica_list in self.replica.lists:
+            all_items.extend(self.replica.store.query(
+                replica_list.source_name, status=status, from_date=from_date, to_date=to_date, limit=limit
+            ))
+        print(f"🗂️ Sirviendo {len(all_items)} items desde la réplica local")
+        return all_items
 
-        # Filtro de fecha para OData (Solo To Date)
-        # OPTIMIZACIÓN: NO enviamos from_date al servidor. 
-        # Como pedimos orden descendente (Newest First), es más rápido bajar todo y cortar 
-        # con min_date_threshold que pedirle a SharePoint que filtre (scan) por rango.
-        date_filter = ""
-        # if from_date: NO AGREGAR AL SERVER FILTER. Usar min_date_threshold.
-        if to_date and to_date.strip():
-            date_filter += f" and fields/Created le '{to_date}T23:59:59Z'"
+    def _merge(self, status: Optional[str], queries: List[ListQuery], results) -> List[SharePointItem]:
+        succeeded, _ = split_results(queries, results)
+        all_items = []
+        with timed("classify_seconds", {"mode": "status_filter"}):
+            for _, items in succeeded:
+                # Filtrado fino en memoria (siempre se aplica para seguridad)
+                all_items.extend(self._filter_status(items, status))
+        return all_items
+
+    @staticmethod
+    def _list_ids() -> List[str]:
+        return [os.getenv("SP_LIST_ID"), os.getenv("SP_LIST_ID_2")]
+
+    def _plan_queries(self, from_date: Optional[str], to_date: Optional[str], limit: int) -> List[ListQuery]:
+        list1_id = os.getenv("SP_LIST_ID")
+        list2_id = os.getenv("SP_LIST_ID_2")
 
         # Calcular umbral de fecha para "Smart Fetch"
         # Si el usuario pide desde "2023-01-01", podemos parar de buscar cuando veamos algo de "2022-12-31"
@@ -70,58 +149,102 @@ class GetFilteredItemsUseCase:
             min_date_threshold = f"{from_date}T00:00:00Z"
             print(f"📉 Smart Fetch activado: Parar si Created < {min_date_threshold}")
 
+        queries = []
+
         # --- Lista 1: Gestión ---
         if list1_id:
-            items = []
-            try:
-                # Intento 1: Servicio + Fechas (Lo más rápido)
-                f1_parts = ["(fields/eServicio eq 'Móvil' or fields/eServicio eq 'Móvil B2B')"]
-                q1 = " and ".join(f1_parts) + date_filter
-                print(f"🔍 [L1] Intentando OData (T1): {q1}")
-                items = self.reader.get_items(list1_id, "gestion_baja", filter_query=q1, select_query=list1_select, max_items=limit, orderby_query="fields/Created desc", min_date_threshold=min_date_threshold)
-            except Exception as e:
-                print(f"⚠️ Error en T1 L1: {e}. Intentando T2 (solo fechas)...")
-                try:
-                    # Intento 2: Solo fechas (Created suele estar indexado por defecto)
-                    q2 = date_filter.lstrip(" and ")
-                    if q2:
-                        items = self.reader.get_items(list1_id, "gestion_baja", filter_query=q2, select_query=list1_select, max_items=limit, orderby_query="fields/Created desc", min_date_threshold=min_date_threshold)
-                    else:
-                        raise e # No hay fechas, fallar al siguiente nivel
-                except Exception as e2:
-                    print(f"⚠️ Error en T2 L1: {e2}. T3: Sin filtros (Limitado)...")
-                    # Fallback final: bajamos sin filtros pero con un tope para no romper el servidor
-                    items = self.reader.get_items(list1_id, "gestion_baja", select_query=list1_select, max_items=limit, orderby_query="fields/Created desc", min_date_threshold=min_date_threshold)
-            
-            # Filtrado fino en memoria (siempre se aplica para seguridad)
-            if status == "pendiente":
-                all_items.extend([i for i in items if i.es_pendiente()])
-            elif status in ("procesado", "procesados"):
-                all_items.extend([i for i in items if i.es_procesado()])
-            else:
-                all_items.extend(items)
+            predicates = [Predicate("eServicio", ("eServicio",), LIST1_SERVICE_FILTER, lambda item: item.en_alcance)]
+            predicates += self._date_predicates(from_date, to_date)
+            query = self._planned_query("L1", list1_id, "gestion_baja", LIST1_SELECT, limit, min_date_threshold, predicates)
+            queries.append(query or self._list1_cascade(list1_id, to_date, limit, min_date_threshold))
 
         # --- Lista 2: Hogar ---
         if list2_id:
-            items = []
-            try:
-                q_hogar = "fields/Title ne null" + date_filter
-                print(f"🔍 [L2] Intentando OData: {q_hogar}")
-                items = self.reader.get_items(list2_id, "migracion_post_pre", filter_query=q_hogar, select_query=list2_select, max_items=limit, orderby_query="fields/Created desc", min_date_threshold=min_date_threshold)
-            except Exception:
-                print("⚠️ Falló OData L2. Consultando sin filtros...")
-                items = self.reader.get_items(list2_id, "migracion_post_pre", select_query=list2_select, max_items=limit, orderby_query="fields/Created desc", min_date_threshold=min_date_threshold)
-
-            if status == "pendiente":
-                all_items.extend([i for i in items if i.es_pendiente()])
-            elif status in ("procesado", "procesados"):
-                all_items.extend([i for i in items if i.es_procesado()])
-            else:
-                all_items.extend(items)
-
-        
-        # Guardar en caché antes de retornar
-        self._cache[cache_key] = (now, all_items)
-        print(f"💾 Guardado en caché ({len(all_items)} items). Expira en {self.CACHE_TTL}s")
+            predicates = [Predicate("Title", ("Title",), "fields/Title ne null", lambda item: item.raw_fields.get("Title") is not None)]
+            predicates += self._date_predicates(from_date, to_date)
+            query = self._planned_query("L2", list2_id, "migracion_post_pre", LIST2_SELECT, limit, min_date_threshold, predicates)
+            queries.append(query or self._list2_cascade(list2_id, to_date, limit, min_date_threshold))
 
-        return all_items
+        return queries
+
+    @staticmethod
+    def _date_predicates(from_date: Optional[str], to_date: Optional[str]) -> List[Predicate]:
+        predicates = []
+        if from_date and from_date.strip():
+            low = f"{from_date}T00:00:00Z"
+            predicates.append(Predicate(
+                "Created desde", ("Created",), f"fields/Created ge '{low}'",
+                lambda item: (item.raw_fields.get("Created") or "") >= low
+            ))
+        if to_date and to_date.strip():
+            high = f"{to_date}T23:59:59Z"
+            predicates.append(Predicate(
+                "Created hasta", ("Created",), f"fields/Created le '{high}'",
+                lambda item: (item.raw_fields.get("Created") or "") <= high
+            ))
+        return predicates
+
+    @staticmethod
+    def _planned_query(
+        label: str, list_id: str, source_name: str, default_select: str, limit: int,
+        min_date_threshold: Optional[str], predicates: List[Predicate]
+    ) -> Optional[ListQuery]:
+        """
+        Consulta armada con los índices de la lista: si hay columnas sin índice se prueba
+        primero con todo en el $filter (las listas chicas lo aceptan); si no, va solo lo
+        indexado y el resto se evalúa al paginar. None si no se conocen los metadatos.
+        """
+        planner = shared_planner()
+        split = planner.split(list_id, predicates)
+        if split is None:
+            return None
+        pushed, local = split
+        tiers = []
+        if local:
+            print(f"🧮 [{label}] Columnas sin índice: {', '.join(p.name for p in local)} (si la lista no las acepta en el filtro, se evalúan acá)")
+            # Bajo el umbral de vista de SharePoint (5000 items) la lista acepta filtrar columnas sin índice:
+            # se prueba con todo; si la rechaza (400), el plan lo recuerda y las próximas arrancan en el siguiente
+            tiers.append(("completo", odata_filter(predicates)))
+        if pushed:
+            tiers.append(("indexado", odata_filter(pushed)))
+        # Si SharePoint igual rechaza el filtro (metadatos desactualizados), se baja sin filtros y se filtra acá
+        tiers.append(("sin filtros", ""))
+        return ListQuery(
+            label, list_id, source_name, planner.select(list_id, default_select), limit, min_date_threshold,
+            tiers=tiers, local_filter=local_filter(predicates)
+        )
+
+    @staticmethod
+    def _list1_cascade(list1_id: str, to_date: Optional[str], limit: int, min_date_threshold: Optional[str]) -> ListQuery:
+        # Sin metadatos de la lista: la cascada de siempre, de lo más filtrado a nada
+        # Filtro de fecha para OData (Solo To Date)
+        # OPTIMIZACIÓN: NO enviamos from_date al servidor.
+        # Como pedimos orden descendente (Newest First), es más rápido bajar todo y cortar
+        # con min_date_threshold que pedirle a SharePoint que filtre (scan) por rango.
+        date_filter = ""
+        if to_date and to_date.strip():
+            date_filter += f" and fields/Created le '{to_date}T23:59:59Z'"
+        # Intento 1: Servicio + Fechas (Lo más rápido)
+        tiers = [("T1", f"({LIST1_SERVICE_FILTER})" + date_filter)]
+        # Intento 2: Solo fechas (Created suele estar indexado por defecto)
+        q2 = date_filter.lstrip(" and ")
+        if q2:
+            tiers.append(("T2", q2))
+        # Fallback final: bajamos sin filtros pero con un tope para no romper el servidor
+        tiers.append(("T3", ""))
+        return ListQuery("L1", list1_id, "gestion_baja", LIST1_SELECT, limit, min_date_threshold, tiers=tiers)
+
+    @staticmethod
+    def _list2_cascade(list2_id: str, to_date: Optional[str], limit: int, min_date_threshold: Optional[str]) -> ListQuery:
+        date_filter = f" and fields/Created le '{to_date}T23:59:59Z'" if to_date and to_date.strip() else ""
+        tiers = [("T1", "fields/Title ne null" + date_filter), ("T2", "")]
+        return ListQuery("L2", list2_id, "migracion_post_pre", LIST2_SELECT, limit, min_date_threshold, tiers=tiers)
+
+    @staticmethod
+    def _filter_status(items: List[SharePointItem], status: Optional[str]) -> List[SharePointItem]:
+        # Cada item trae su estado calculado desde la ingesta
+        if status == "pendiente":
+            return [i for i in items if i.es_pendiente()]
+        elif status in ("procesado", "procesados"):
+            return [i for i in items if i.es_procesado()]
+        return items
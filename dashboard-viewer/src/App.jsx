@@ -1,6 +1,9 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { RefreshCw, Clock, Database, ChevronRight, LayoutDashboard, ListTodo, Calendar, Filter, HardDrive, Search, ArrowUp, ArrowDown, LogOut, Lock, User, ShieldCheck } from 'lucide-react';
 
+// Claves de /items que usa la tabla (parámetro fields=)
+const TABLE_FIELDS = 'id,list,created,status,tipo_baja,phone_number';
+
 const App = () => {
   const [items, setItems] = useState([]);
   const [loading, setLoading] = useState(false);
@@ -18,9 +21,13 @@ const App = () => {
   const [toDate, setToDate] = useState('');
   const [sortConfig, setSortConfig] = useState({ key: 'created', direction: 'desc' });
 
-  // Pagination & Local Search
+  // Server-side Pagination & Search
   const [currentPage, setCurrentPage] = useState(1);
   const [searchTerm, setSearchTerm] = useState('');
+  const [total, setTotal] = useState(0);
+  const [listCounts, setListCounts] = useState({});
+  // cursors[n] = cursor para pedir la página n (la página 1 no lleva cursor)
+  const [cursors, setCursors] = useState([null, null]);
   const pageSize = 100;
 
   // Timer & Progress
@@ -66,12 +73,13 @@ const App = () => {
     setHasSearched(false);
   };
 
-  const fetchItems = async (forceRefresh = false) => {
+  const sortParam = () => `${sortConfig.direction === 'desc' ? '-' : ''}${sortConfig.key}`;
+
+  const fetchItems = async (forceRefresh = false, page = 1) => {
     setLoading(true);
     setHasSearched(true);
     setElapsedTime(0);
     setProgress(0); // Start at 0
-    if (forceRefresh) setCurrentPage(1); 
 
     // Timer Interval
     const timerInterval = setInterval(() => {
@@ -93,6 +101,12 @@ const App = () => {
       if (fromDate) url += `&from_date=${fromDate}`;
       if (toDate) url += `&to_date=${toDate}`;
       if (forceRefresh) url += `&force_refresh=true`;
+      url += `&page_size=${pageSize}&sort=${encodeURIComponent(sortParam())}`;
+      // Solo las columnas que pinta la tabla: sin raw_fields el payload es varias veces menor
+      url += `&fields=${TABLE_FIELDS}`;
+      if (searchTerm) url += `&search=${encodeURIComponent(searchTerm)}`;
+      const cursor = page > 1 ? cursors[page] : null;
+      if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
 
       const response = await fetch(url, {
         headers: {
@@ -107,7 +121,15 @@ const App = () => {
       
       if (!response.ok) throw new Error('Error de conexión con el servidor');
       const data = await response.json();
-      setItems(data);
+      setItems(data.items);
+      setTotal(data.total);
+      setListCounts(data.list_counts || {});
+      setCursors(prev => {
+        const next = page === 1 ? [null, null] : prev.slice(0, page + 1);
+        next[page + 1] = data.next_cursor;
+        return next;
+      });
+      setCurrentPage(page);
       setError(null);
     } catch (err) {
       setError(err.message);
@@ -127,52 +149,23 @@ const App = () => {
     setSortConfig({ key, direction });
   };
 
-  // Local filtering & Sorting & Stats
-  const { filteredAndSortedItems, stats } = useMemo(() => {
-    const result = items.filter(item => {
-      // Robust null checks for item fields
-      const title = String(item?.title || "").toLowerCase();
-      const id = String(item?.id || "").toLowerCase();
-      const search = searchTerm.toLowerCase();
-
-      const matchesSearch = title.includes(search) || id.includes(search);
-      
-      if (!item?.created) return matchesSearch;
-      
-      try {
-        const itemDate = new Date(item.created).toISOString().split('T')[0];
-        const matchesFrom = !fromDate || itemDate >= fromDate;
-        const matchesTo = !toDate || itemDate <= toDate;
-        return matchesSearch && matchesFrom && matchesTo;
-      } catch (e) {
-        return matchesSearch; // Fallback if date is invalid
-      }
-    });
-
-    // Stats Calculation (Efficiently on the whole set or filtered set?)
-    // User probably wants stats on the CURRENTLY FETCHED set (items)
-    const list1Count = items.filter(i => String(i?.list || "").includes('Lista 1')).length;
-    const list2Count = items.filter(i => String(i?.list || "").includes('Lista 2')).length;
-
-    // Sorting
-    if (sortConfig.key) {
-      result.sort((a, b) => {
-        let valA = a[sortConfig.key] ?? "";
-        let valB = b[sortConfig.key] ?? "";
-
-        if (sortConfig.key === 'created') {
-          valA = valA ? new Date(valA) : new Date(0);
-          valB = valB ? new Date(valB) : new Date(0);
-        }
-
-        if (valA < valB) return sortConfig.direction === 'asc' ? -1 : 1;
-        if (valA > valB) return sortConfig.direction === 'asc' ? 1 : -1;
-        return 0;
-      });
+  // Orden y búsqueda se resuelven en el servidor: al cambiar, volvemos a la página 1
+  const isFirstRender = useRef(true);
+  useEffect(() => {
+    if (isFirstRender.current) {
+      isFirstRender.current = false;
+      return;
     }
-
-    return { filteredAndSortedItems: result, stats: { list1: list1Count, list2: list2Count, total: items.length } };
-  }, [items, searchTerm, fromDate, toDate, sortConfig]);
+    if (!hasSearched) return;
+    const timeout = setTimeout(() => fetchItems(false, 1), 300);
+    return () => clearTimeout(timeout);
+  }, [sortConfig, searchTerm]);
+
+  const stats = {
+    list1: Object.entries(listCounts).filter(([name]) => name.includes('Lista 1')).reduce((acc, [, n]) => acc + n, 0),
+    list2: Object.entries(listCounts).filter(([name]) => name.includes('Lista 2')).reduce((acc, [, n]) => acc + n, 0),
+    total: Object.values(listCounts).reduce((acc, n) => acc + n, 0),
+  };
 
   const clearFilters = () => {
     setFromDate('');
@@ -183,11 +176,7 @@ const App = () => {
   };
 
   // Pagination Logic
-  const totalPages = Math.ceil(filteredAndSortedItems.length / pageSize);
-  const paginatedItems = filteredAndSortedItems.slice(
-    (currentPage - 1) * pageSize,
-    currentPage * pageSize
-  );
+  const totalPages = Math.ceil(total / pageSize);
 
   if (!token) {
     return (
@@ -466,7 +455,7 @@ const App = () => {
                    type="text" 
                    placeholder="Buscar en resultados..."
                    value={searchTerm}
-                   onChange={(e) => { setSearchTerm(e.target.value); setCurrentPage(1); }}
+                   onChange={(e) => setSearchTerm(e.target.value)}
                    className="premium-input !w-[300px] !py-2 !text-xs"
                  />
                </div>
@@ -476,7 +465,7 @@ const App = () => {
           {hasSearched && !loading && (
             <div className="flex items-center gap-3">
               <div className="text-[10px] font-bold text-text-dark bg-white-5 px-3 py-1.5 rounded-full uppercase tracking-wider">
-                 {filteredAndSortedItems.length} Registros Encontrados
+                 {total} Registros Encontrados
               </div>
               <div className="text-xs font-bold text-accent bg-accent/5 px-3 py-1.5 rounded-full border border-accent/20">
                  Sincronizado
@@ -538,7 +527,7 @@ const App = () => {
               </tr>
             </thead>
             <tbody>
-              {hasSearched && paginatedItems.map((item) => (
+              {hasSearched && items.map((item) => (
                 <tr key={item?.id || Math.random()} className="hover:bg-white-5 transition-all group">
                   <td className="whitespace-nowrap">
                     <div className="text-white font-bold group-hover:text-primary transition-colors text-sm">
@@ -583,7 +572,7 @@ const App = () => {
                 </tr>
               ))}
               
-              {(!hasSearched || (filteredAndSortedItems.length === 0 && !loading)) && (
+              {(!hasSearched || (items.length === 0 && !loading)) && (
                 <tr>
                   <td colSpan="6" className="py-24 text-center">
                     <div className="flex-center flex-col gap-4 opacity-60">
@@ -616,15 +605,15 @@ const App = () => {
             </div>
             <div className="flex gap-2">
               <button 
-                onClick={() => setCurrentPage(p => Math.max(1, p - 1))}
-                disabled={currentPage === 1}
+                onClick={() => fetchItems(false, currentPage - 1)}
+                disabled={currentPage === 1 || loading}
                 className="btn-secondary px-4 py-2 rounded-lg text-xs font-bold border border-border disabled:opacity-30 disabled:cursor-not-allowed hover:bg-white/5 transition-all text-white"
               >
                 Anterior
               </button>
               <button 
-                onClick={() => setCurrentPage(p => Math.min(totalPages, p + 1))}
-                disabled={currentPage === totalPages}
+                onClick={() => fetchItems(false, currentPage + 1)}
+                disabled={currentPage === totalPages || !cursors[currentPage + 1] || loading}
                 className="btn-secondary px-4 py-2 rounded-lg text-xs font-bold border border-border disabled:opacity-30 disabled:cursor-not-allowed hover:bg-white/5 transition-all text-white"
               >
                 Siguiente
@@ -1,80 +1,143 @@
-from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+import sys
+from typing import Optional, Dict, Any, Iterable
 from datetime import datetime
 
-@dataclass
+LIST_DISPLAY_NAMES = {
+    "gestion_baja": "Lista 1 (Gestión Baja de Servicio Móvil u Hogar)",
+    "migracion_post_pre": "Lista 2 (Ejecución Migración PostPago a PrePago)",
+}
+
+TIPO_BAJA_PREPAGO = "Cambio de Post Pago a Pre Pago R"
+
+# Campos que siempre se conservan aunque no estén en el $select (ordenar, rangos de fecha)
+ALWAYS_KEPT_FIELDS = frozenset(("Title", "Created", "Modified"))
+
+# Todo lo que lee SharePointItem para calcular estado, tipo de baja, teléfono, fechas y alcance.
+# Es lo mínimo que hay que pedir en el $select (de cada lista, las columnas que existan).
+ITEM_FIELDS = (
+    "Title", "Created", "Modified", "dFechaFormRegularizado",
+    "eBajaRealizada", "BajaRealizada", "Baja_x0020_Realizada",
+    "eTipoBaja", "TipodeBaja", "TipoBaja",
+    "nLineaContacto", "sLineaContacto",
+    "eServicio", "eRetencionEfectiva", "eTipoGestion", "eFormularioPendiente", "eDeudaPendiente", "eRegularizadoCompleto",
+)
+
+# Valores más largos que esto casi nunca se repiten entre items (comentarios, URLs): no se internan
+INTERN_MAX_LENGTH = 64
+
+
+def _intern(value):
+    if type(value) is str and len(value) <= INTERN_MAX_LENGTH:
+        return _interned(value)
+    return value
+
+
+_interned = sys.intern
+
+
+def compact_fields(fields: Dict[str, Any], keep: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Copia de `fields` con claves y valores cortos internados: los miles de items de
+    una lista comparten una sola instancia de "eServicio", "Móvil", "NO", etc.
+    Con `keep` se descarta lo que no se pidió (metadatos de Graph como @odata.etag).
+    """
+    intern, max_length = _interned, INTERN_MAX_LENGTH
+    if keep is None:
+        return {intern(k): intern(v) if type(v) is str and len(v) <= max_length else v for k, v in fields.items()}
+    return {
+        intern(k): intern(v) if type(v) is str and len(v) <= max_length else v
+        for k, v in fields.items()
+        if k in keep or k in ALWAYS_KEPT_FIELDS
+    }
+
+
+def select_fields(select_query: str) -> Optional[frozenset]:
+    """Campos a conservar según el $select de la consulta ('' = todos)."""
+    if not select_query:
+        return None
+    return frozenset(f.strip() for f in select_query.split(",") if f.strip())
+
+
+def _parse_date(value) -> Optional[datetime]:
+    if value:
+        try:
+            # SharePoint ISO format: '2023-04-20T12:59:37Z'
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except:
+            return None
+    return None
+
+
 class SharePointItem:
-    id: str
-    title: str
-    raw_fields: Dict[str, Any] = field(default_factory=dict)
-    source_list: str = "" # Identificador técnico (e.g., 'gestion_baja')
+    """
+    Item de una lista de SharePoint. Los valores derivados (estado, tipo de baja,
+    teléfono, fechas) se calculan una sola vez al construirlo: la API, el caché y
+    los reportes los leen miles de veces por request. Los items no se modifican
+    después de creados; para cambiar `raw_fields` se crea uno nuevo.
+    """
 
-    @property
-    def source_list_display(self) -> str:
-        if self.source_list == "gestion_baja":
-            return "Lista 1 (Gestión Baja de Servicio Móvil u Hogar)"
-        elif self.source_list == "migracion_post_pre":
-            return "Lista 2 (Ejecución Migración PostPago a PrePago)"
-        return self.source_list
+    __slots__ = (
+        "id", "title", "raw_fields", "source_list",
+        "estado_baja", "tipo_baja_display", "phone_number",
+        "fecha_creacion", "fecha_ejecucion", "en_alcance",
+        "_pendiente", "_procesado",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        raw_fields: Optional[Dict[str, Any]] = None,
+        source_list: str = "",  # Identificador técnico (e.g., 'gestion_baja')
+        keep_fields: Optional[Iterable[str]] = None
+    ):
+        fields = compact_fields(raw_fields or {}, keep_fields)
+        self.id = id
+        self.title = title
+        self.raw_fields = fields
+        self.source_list = sys.intern(source_list)
 
-    @property
-    def estado_baja(self) -> str:
-        fields = self.raw_fields
         # Priorizar campos de ejecución
         val = fields.get("eBajaRealizada") or fields.get("BajaRealizada") or fields.get("Baja_x0020_Realizada")
-        return str(val if val is not None else "").strip()
+        self.estado_baja = _intern(str(val if val is not None else "").strip())
 
-    @property
-    def tipo_baja_display(self) -> str:
-        fields = self.raw_fields
         val = fields.get("eTipoBaja") or fields.get("TipodeBaja") or fields.get("TipoBaja")
-        if val == "Pre Pago R":
-            return "Cambio de Post Pago a Pre Pago R"
-        return str(val if val is not None else "N/A")
+        self.tipo_baja_display = TIPO_BAJA_PREPAGO if val == "Pre Pago R" else _intern(str(val if val is not None else "N/A"))
 
-    @property
-    def phone_number(self) -> str:
-        fields = self.raw_fields
         # Priorizar nLineaContacto y sLineaContacto para Lista 1
         # Para Lista 2 (Migración), el número suele estar en Title.
         val = fields.get("nLineaContacto") or fields.get("sLineaContacto") or fields.get("Title")
-        
         if val is None:
-            return "N/A"
-            
-        s_val = str(val).strip()
-        if s_val.endswith(".0"):
-            return s_val[:-2]
-        return s_val
+            self.phone_number = "N/A"
+        else:
+            s_val = str(val).strip()
+            self.phone_number = s_val[:-2] if s_val.endswith(".0") else s_val
+
+        self.fecha_creacion = _parse_date(fields.get("Created"))
+        # Usar dFechaFormRegularizado o Modified
+        self.fecha_ejecucion = _parse_date(fields.get("dFechaFormRegularizado") or fields.get("Modified"))
+
+        # Si el item pertenece al universo del dashboard.
+        # En Lista 1 solo interesan los servicios móviles (mismo criterio que el filtro OData T1).
+        self.en_alcance = fields.get("eServicio") in ("Móvil", "Móvil B2B") if self.source_list == "gestion_baja" else True
+
+        self._pendiente = self._calcular_pendiente()
+        baja = self.estado_baja
+        self._procesado = bool(baja and baja.lower() != "pendiente" and baja != "None")
 
     @property
-    def fecha_creacion(self) -> Optional[datetime]:
-        created = self.raw_fields.get("Created")
-        if created:
-            try:
-                # SharePoint ISO format: '2023-04-20T12:59:37Z'
-                return datetime.fromisoformat(created.replace("Z", "+00:00"))
-            except:
-                return None
-        return None
+    def source_list_display(self) -> str:
+        return LIST_DISPLAY_NAMES.get(self.source_list, self.source_list)
 
     @property
-    def fecha_ejecucion(self) -> Optional[datetime]:
-        # Usar dFechaFormRegularizado o Modified
-        fecha = self.raw_fields.get("dFechaFormRegularizado") or self.raw_fields.get("Modified")
-        if fecha:
-            try:
-                return datetime.fromisoformat(fecha.replace("Z", "+00:00"))
-            except:
-                return None
-        return None
+    def status(self) -> str:
+        return "Pendiente" if self._pendiente else "Procesado" if self._procesado else "Desconocido"
 
-    def es_pendiente(self) -> bool:
+    def _calcular_pendiente(self) -> bool:
         fields = self.raw_fields
         if self.source_list == "gestion_baja":
             # Filtro estricto por proceso (List 1)
-            tipo = self.tipo_baja_display
-            if tipo != "Cambio de Post Pago a Pre Pago R":
+            if self.tipo_baja_display != TIPO_BAJA_PREPAGO:
                 return False
 
             return (
@@ -89,14 +152,33 @@ class SharePointItem:
         elif self.source_list == "migracion_post_pre":
             title = fields.get("Title")
             return (
-                title is not None and 
-                str(title).isdigit() and 
+                title is not None and
+                str(title).isdigit() and
                 self.estado_baja in (None, "", "None")
             )
         return False
 
+    def es_pendiente(self) -> bool:
+        return self._pendiente
+
     def es_procesado(self) -> bool:
-        baja = self.estado_baja
-        if baja and baja.lower() != "pendiente" and baja != "None":
-            return True
-        return False
+        return self._procesado
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SharePointItem):
+            return NotImplemented
+        return (
+            self.id == other.id and self.title == other.title and
+            self.source_list == other.source_list and self.raw_fields == other.raw_fields
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SharePointItem(id={self.id!r}, title={self.title!r}, source_list={self.source_list!r})"
+
+    def __getstate__(self):
+        return (self.id, self.title, self.raw_fields, self.source_list)
+
+    def __setstate__(self, state) -> None:
+        self.__init__(*state)
@@ -0,0 +1,44 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional, Union
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.sharepoint_reader import ItemFilter, ItemsRequest, ListColumn
+
+class AsyncSharePointReader(ABC):
+    """Versión asíncrona de SharePointReader, para no bloquear el event loop del API."""
+
+    supports_batch = False
+
+    @abstractmethod
+    async def get_items(
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
+    ) -> List[SharePointItem]:
+        pass
+
+    async def iter_pages(
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
+    ) -> AsyncIterator[List[SharePointItem]]:
+        """Entrega los items página a página. Por defecto, todo en una sola página."""
+        yield await self.get_items(list_id, source_name, filter_query, select_query, orderby_query, max_items, min_date_threshold, item_filter)
+
+    async def get_items_many(self, requests: List[ItemsRequest]) -> List[Union[List[SharePointItem], Exception]]:
+        """Varias consultas juntas: un resultado por consulta, en orden, o la excepción de la que falló."""
+        raise NotImplementedError(f"{type(self).__name__} no soporta consultas agrupadas")
+
+    async def get_columns(self, list_id: str) -> List[ListColumn]:
+        raise NotImplementedError(f"{type(self).__name__} no expone los metadatos de las listas")
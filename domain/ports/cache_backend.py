@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+
+class CacheBackend(ABC):
+    """
+    Almacén clave → bytes con vencimiento, más un lock con dueño y vencimiento.
+    Lo ven todos los workers/contenedores que apunten al mismo lugar.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def scan(self, prefix: str) -> List[str]:
+        """Claves vigentes que empiezan con `prefix`."""
+        pass
+
+    @abstractmethod
+    def acquire_lock(self, name: str, ttl: int) -> Optional[str]:
+        """Devuelve un token si se obtuvo el lock, None si lo tiene otro. Vence solo a los `ttl` segundos."""
+        pass
+
+    @abstractmethod
+    def release_lock(self, name: str, token: str) -> None:
+        """Libera el lock solo si sigue siendo nuestro (mismo token)."""
+        pass
+
+    @abstractmethod
+    def is_locked(self, name: str) -> bool:
+        pass
+
+    def stats(self) -> dict:
+        return {}
@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from domain.entities.sharepoint_item import SharePointItem
+
+
+class ItemStore(ABC):
+    """Réplica local de las listas de SharePoint, alimentada por la sincronización delta."""
+
+    @abstractmethod
+    def apply_changes(self, source_list: str, upserts: List[SharePointItem], deleted_ids: List[str]) -> None:
+        """Aplica altas/modificaciones (upsert) y bajas (tombstone) de una lista."""
+        pass
+
+    @abstractmethod
+    def replace_all(self, source_list: str, items: List[SharePointItem]) -> None:
+        """Reemplaza todo el contenido de una lista (resincronización completa)."""
+        pass
+
+    @abstractmethod
+    def query(
+        self,
+        source_list: str,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        limit: Optional[int] = None,
+        in_scope_only: bool = True
+    ) -> List[SharePointItem]:
+        """
+        Items de la lista ordenados por Created desc, en el rango de fechas (YYYY-MM-DD).
+        Como en Graph, `limit` corta los más nuevos del alcance y el estado se filtra
+        después sobre esos: mismo resultado que la consulta en vivo.
+        """
+        pass
+
+    @abstractmethod
+    def get_delta_link(self, list_id: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def set_delta_link(self, list_id: str, delta_link: Optional[str]) -> None:
+        pass
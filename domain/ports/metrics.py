@@ -0,0 +1,55 @@
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+Labels = Optional[Dict[str, str]]
+
+
+class Metrics(ABC):
+    """
+    Dónde registran las capas sus mediciones (latencias, tamaños, aciertos de caché)
+    sin saber cómo se exponen. La implementación se elige al arrancar con
+    use_metrics(); mientras tanto (CLI, scripts) no se registra nada.
+    """
+
+    @abstractmethod
+    def observe(self, name: str, value: float, labels: Labels = None) -> None:
+        """Una muestra de un histograma (segundos, bytes, items)."""
+        pass
+
+    @abstractmethod
+    def inc(self, name: str, amount: float = 1, labels: Labels = None) -> None:
+        """Suma a un contador."""
+        pass
+
+
+class NullMetrics(Metrics):
+
+    def observe(self, name: str, value: float, labels: Labels = None) -> None:
+        pass
+
+    def inc(self, name: str, amount: float = 1, labels: Labels = None) -> None:
+        pass
+
+
+_current: Metrics = NullMetrics()
+
+
+def metrics() -> Metrics:
+    return _current
+
+
+def use_metrics(recorder: Metrics) -> None:
+    global _current
+    _current = recorder
+
+
+@contextmanager
+def timed(name: str, labels: Labels = None) -> Iterator[None]:
+    """Registra en el histograma `name` los segundos que tarda el bloque (aunque falle)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current.observe(name, time.perf_counter() - started, labels)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Callable, Iterable, List, Optional
 from domain.entities.sharepoint_item import SharePointItem
 
 class ReportWriter(ABC):
@@ -12,3 +12,21 @@ class ReportWriter(ABC):
         procesados: List[SharePointItem],
     ) -> None:
         pass
+
+    def write_stream(
+        self,
+        items: Iterable[SharePointItem],
+        progress: Optional[Callable[[int], None]] = None
+    ) -> dict:
+        """
+        Escribe el reporte a partir de un iterador de items. Por defecto arma las
+        listas y llama a write(); los writers en streaming lo sobreescriben para no
+        materializar el dataset.
+        """
+        all_items = list(items)
+        pendientes = [item for item in all_items if item.es_pendiente()]
+        procesados = [item for item in all_items if item.es_procesado()]
+        self.write(all_items=all_items, pendientes=pendientes, procesados=procesados)
+        if progress is not None:
+            progress(len(all_items))
+        return {"rows": len(all_items)}
@@ -1,15 +1,110 @@
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Union
 from domain.entities.sharepoint_item import SharePointItem
 
+# Condición que se evalúa sobre cada item al paginar: los que no la cumplen no cuentan para max_items
+ItemFilter = Callable[[SharePointItem], bool]
+
+
+@dataclass
+class DeltaResult:
+    """Cambios de una lista desde el último token delta."""
+    items: List[SharePointItem] = field(default_factory=list)  # creados o modificados
+    deleted_ids: List[str] = field(default_factory=list)
+    delta_link: Optional[str] = None  # para la próxima sincronización
+
+
+@dataclass
+class ItemsRequest:
+    """Los argumentos de una llamada a get_items, para pedir varias juntas con get_items_many."""
+    list_id: str
+    source_name: str
+    filter_query: str = ""
+    select_query: str = ""
+    orderby_query: str = ""
+    max_items: int = 1000
+    min_date_threshold: Optional[str] = None
+    item_filter: Optional[ItemFilter] = None
+
+
+@dataclass
+class ListColumn:
+    """Columna de una lista según sus metadatos (nombre interno, si está indexada y su tipo)."""
+    name: str
+    indexed: bool = False
+    kind: str = ""
+    read_only: bool = False
+
+
+class DeltaTokenExpiredError(Exception):
+    """Graph ya no acepta el token delta (410 Gone): hay que resincronizar desde cero."""
+
+
+class QueryRejectedError(Exception):
+    """
+    La lista no acepta la consulta (HTTP 400: p. ej. un filtro sobre una columna sin
+    índice en una lista grande). Repetirla no sirve; sí probar con otro filtro.
+    """
+
+
+class SourceUnavailableError(Exception):
+    """
+    La fuente está degradada (throttling que no cede, caídas, circuito abierto).
+    No es un problema de la consulta: probar otros filtros solo agrega carga.
+    `retry_after`: segundos sugeridos antes de volver a intentar, si se conocen.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class SharePointReader(ABC):
+    # Si get_items_many agrupa las consultas en menos round trips (p. ej. $batch de Graph)
+    supports_batch = False
 
     @abstractmethod
     def get_items(
-        self, 
-        list_id: str, 
-        source_name: str, 
-        filter_query: str = "", 
-        select_query: str = ""
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
     ) -> List[SharePointItem]:
         pass
+
+    def iter_pages(
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
+    ) -> Iterator[List[SharePointItem]]:
+        """Entrega los items página a página. Por defecto, todo en una sola página."""
+        yield self.get_items(list_id, source_name, filter_query, select_query, orderby_query, max_items, min_date_threshold, item_filter)
+
+    def get_items_many(self, requests: List[ItemsRequest]) -> List[Union[List[SharePointItem], Exception]]:
+        """Varias consultas juntas: un resultado por consulta, en orden, o la excepción de la que falló."""
+        raise NotImplementedError(f"{type(self).__name__} no soporta consultas agrupadas")
+
+    def get_columns(self, list_id: str) -> List[ListColumn]:
+        """Columnas de la lista con sus índices, para decidir qué filtros puede resolver el servidor."""
+        raise NotImplementedError(f"{type(self).__name__} no expone los metadatos de las listas")
+
+    def get_delta(
+        self,
+        list_id: str,
+        source_name: str,
+        select_query: str = "",
+        delta_link: Optional[str] = None
+    ) -> DeltaResult:
+        raise NotImplementedError(f"{type(self).__name__} no soporta consultas delta")
@@ -1,16 +1,143 @@
+import asyncio
 import os
+import threading
+import time
 import requests
 from dotenv import load_dotenv
 
+from domain.ports.metrics import metrics, timed
+from infrastructure.http.graph_session import get_session
+
 load_dotenv()
 
-def get_access_token() -> str:
+GRAPH_LOGIN_URL = os.getenv("GRAPH_LOGIN_URL", "https://login.microsoftonline.com")
+
+# Renovamos el token este número de segundos antes de que expire
+TOKEN_REFRESH_MARGIN = int(os.getenv("GRAPH_TOKEN_REFRESH_MARGIN", "300"))
+
+
+class GraphTokenProvider:
+    """
+    Proveedor de tokens de Graph (client credentials) compartido por todo el proceso.
+
+    Guarda el token hasta poco antes de `expires_in`, lo renueva en segundo plano
+    antes de que caduque (mientras se siga usando) y hace que los hilos concurrentes
+    compartan una sola renovación en lugar de enviar cada uno su propio POST.
+    """
+
+    def __init__(self, refresh_margin: int = TOKEN_REFRESH_MARGIN, background_refresh: bool = True):
+        self.refresh_margin = refresh_margin
+        self.background_refresh = background_refresh
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._timer = None
+        # Si se pidió el token desde la última renovación: sin uso, no se renueva en segundo plano
+        self._requested = False
+        # Contadores para confirmar que el endpoint de token no está en el hot path
+        self.hits = 0
+        self.refreshes = 0
+        self.background_refreshes = 0
+        self.failures = 0
+
+    def _is_fresh(self, now: float) -> bool:
+        return self._token is not None and now < self._refresh_at
+
+    def get_token(self) -> str:
+        now = time.time()
+        self._requested = True
+        # Camino rápido sin lock: token vigente
+        if self._is_fresh(now):
+            self.hits += 1
+            return self._token
+
+        # Lo que espera un request por el token (el lock incluido) cuando no estaba vigente
+        with timed("graph_token_seconds"), self._lock:
+            # Otro hilo pudo haber renovado mientras esperábamos el lock
+            if self._is_fresh(time.time()):
+                self.hits += 1
+                return self._token
+            return self._refresh_locked()
+
+    async def get_token_async(self) -> str:
+        """Igual que get_token, pero la renovación (bloqueante) se hace fuera del event loop."""
+        self._requested = True
+        if self._is_fresh(time.time()):
+            self.hits += 1
+            return self._token
+        return await asyncio.to_thread(self.get_token)
+
+    def invalidate(self) -> None:
+        """Descarta el token actual (p.ej. tras un 401 de Graph)."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+            self._refresh_at = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "background_refreshes": self.background_refreshes,
+            "failures": self.failures,
+            "expires_in": max(0, int(self._expires_at - time.time())) if self._token else 0,
+        }
+
+    def _refresh_locked(self) -> str:
+        try:
+            token, expires_in = _request_token()
+        except Exception:
+            self.failures += 1
+            metrics().inc("graph_token_total", labels={"result": "failure"})
+            raise
+        metrics().inc("graph_token_total", labels={"result": "refresh"})
+        now = time.time()
+        # Con tokens de vida corta el margen no puede comerse toda la vigencia
+        margin = min(self.refresh_margin, expires_in // 2)
+        self._token = token
+        self._expires_at = now + expires_in
+        self._refresh_at = self._expires_at - margin
+        self.refreshes += 1
+        self._requested = False
+        self._schedule_background_refresh(self._refresh_at - now)
+        return token
+
+    def _schedule_background_refresh(self, fresh_for: float) -> None:
+        if not self.background_refresh:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        # Renovamos un poco antes de que el token deje de ser "fresco" para que
+        # ningún request tenga que esperar al endpoint de login.
+        delay = max(1.0, fresh_for * 0.9)
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self) -> None:
+        with self._lock:
+            self._timer = None
+            if not self._requested:
+                # Nadie lo usó desde la última renovación: no se vuelve a programar.
+                # Si alguien lo pide más adelante, get_token lo renueva en ese momento
+                print("💤 Token sin uso desde la última renovación: se deja de renovar en segundo plano")
+                return
+            try:
+                self._refresh_locked()
+                self.background_refreshes += 1
+            except Exception as e:
+                # El token actual sigue siendo válido; el próximo get_token reintentará
+                print(f"⚠️ Falló la renovación en segundo plano del token: {e}")
+
+
+def _request_token():
     tenant_id = os.getenv("TENANT_ID")
     client_id = os.getenv("CLIENT_ID")
     client_secret = os.getenv("CLIENT_SECRET")
     scope = os.getenv("GRAPH_SCOPE")
 
-    url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
+    url = f"{GRAPH_LOGIN_URL}/{tenant_id}/oauth2/v2.0/token"
 
     data = {
         "grant_type": "client_credentials",
@@ -21,10 +148,23 @@ def get_access_token() -> str:
 
     print("Obteniendo token de acceso...")
     try:
-        response = requests.post(url, data=data, timeout=10)
+        response = get_session().post(url, data=data, timeout=10)
         response.raise_for_status()
+        payload = response.json()
         print("Token obtenido")
-        return response.json()["access_token"]
+        return payload["access_token"], int(payload.get("expires_in", 3599))
     except requests.exceptions.RequestException as e:
         print(f"❌ Error al obtener token: {e}")
         raise
+
+
+# Instancia única por proceso
+token_provider = GraphTokenProvider()
+
+
+def get_access_token() -> str:
+    return token_provider.get_token()
+
+
+async def get_access_token_async() -> str:
+    return await token_provider.get_token_async()
@@ -0,0 +1,166 @@
+import os
+import struct
+import time
+import uuid
+from typing import List, Optional
+from urllib.parse import quote, unquote
+
+from domain.ports.cache_backend import CacheBackend
+
+# Cabecera de cada archivo: instante de vencimiento (epoch, float de 8 bytes)
+_HEADER = struct.Struct(">d")
+# Cada cuánto un set() barre del directorio los archivos vencidos (claves y locks)
+DISK_CACHE_SWEEP_INTERVAL = 300
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Backend en un directorio compartido: un archivo por clave, escrito de forma
+    atómica (tmp + rename). Apuntado a /dev/shm queda en memoria compartida entre
+    los workers de la máquina; en un volumen montado, entre contenedores.
+    Los locks son archivos creados con O_EXCL que guardan su vencimiento.
+    """
+
+    def __init__(self, directory: str, sweep_interval: float = DISK_CACHE_SWEEP_INTERVAL):
+        self.directory = directory
+        self.sweep_interval = sweep_interval
+        self._swept_at = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str = ".bin") -> str:
+        return os.path.join(self.directory, quote(key, safe="") + suffix)
+
+    def _read(self, path: str):
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None, None
+        if len(raw) < _HEADER.size:
+            return None, None
+        (expires_at,) = _HEADER.unpack_from(raw)
+        return expires_at, raw[_HEADER.size:]
+
+    @staticmethod
+    def _expires_at(path: str) -> Optional[float]:
+        # Solo la cabecera: para saber si venció no hace falta leer el valor
+        try:
+            with open(path, "rb") as f:
+                raw = f.read(_HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(raw) < _HEADER.size:
+            return None
+        return _HEADER.unpack(raw)[0]
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _sweep(self) -> None:
+        """Borra las claves y los locks vencidos: sin esto el directorio crece con cada clave que se escribió."""
+        now = time.time()
+        if now - self._swept_at < self.sweep_interval:
+            return
+        self._swept_at = now
+        for name in os.listdir(self.directory):
+            if not name.endswith((".bin", ".lock")):
+                continue
+            path = os.path.join(self.directory, name)
+            expires_at = self._expires_at(path)
+            # Un lock sin cabecera lo está creando otro proceso: se deja
+            if expires_at is not None and expires_at <= now:
+                self._remove(path)
+
+    def _write(self, path: str, expires_at: float, value: bytes) -> None:
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(expires_at))
+            f.write(value)
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        expires_at, value = self._read(self._path(key))
+        if expires_at is None or expires_at <= time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._write(self._path(key), time.time() + ttl, value)
+        self._sweep()
+
+    def delete(self, key: str) -> None:
+        self._remove(self._path(key))
+
+    def scan(self, prefix: str) -> List[str]:
+        quoted = quote(prefix, safe="")
+        now = time.time()
+        keys = []
+        for name in os.listdir(self.directory):
+            if not name.startswith(quoted) or not name.endswith(".bin"):
+                continue
+            path = os.path.join(self.directory, name)
+            expires_at = self._expires_at(path)
+            if expires_at is None:
+                continue
+            if expires_at > now:
+                keys.append(unquote(name[:-len(".bin")]))
+            else:
+                self._remove(path)
+        return keys
+
+    def acquire_lock(self, name: str, ttl: int) -> Optional[str]:
+        path = self._path(name, ".lock")
+        token = uuid.uuid4().hex
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                expires_at, _ = self._read(path)
+                if expires_at is None:
+                    # Otro proceso lo acaba de crear y todavía no escribió el vencimiento
+                    try:
+                        if time.time() - os.path.getmtime(path) < 5:
+                            return None
+                    except FileNotFoundError:
+                        continue
+                elif expires_at > time.time():
+                    return None
+                # Lock vencido (el worker que lo tenía murió): se borra y se reintenta una vez
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(time.time() + ttl))
+                f.write(token.encode("ascii"))
+            return token
+        return None
+
+    def release_lock(self, name: str, token: str) -> None:
+        path = self._path(name, ".lock")
+        _, holder = self._read(path)
+        if holder == token.encode("ascii"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def is_locked(self, name: str) -> bool:
+        expires_at, _ = self._read(self._path(name, ".lock"))
+        return expires_at is not None and expires_at > time.time()
+
+    def stats(self) -> dict:
+        keys, size = 0, 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".bin"):
+                try:
+                    size += entry.stat().st_size
+                    keys += 1
+                except FileNotFoundError:
+                    pass
+        return {"backend": "disk", "directory": self.directory, "keys": keys, "bytes": size}
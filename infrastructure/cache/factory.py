@@ -0,0 +1,32 @@
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from domain.ports.cache_backend import CacheBackend
+
+load_dotenv()
+
+
+def _default_cache_dir() -> str:
+    # /dev/shm es memoria compartida en Linux: los workers de la máquina ven los mismos archivos sin tocar disco
+    return "/dev/shm/sharepoint-cache" if os.path.isdir("/dev/shm") else "data/cache"
+
+
+def create_cache_backend() -> Optional[CacheBackend]:
+    """
+    Crea el backend del caché de /items según CACHE_BACKEND:
+      - "memory" (por defecto): sin backend (None), cada proceso usa solo su caché local
+      - "disk": directorio compartido por los workers (CACHE_DIR, por defecto en /dev/shm)
+      - "redis": servidor Redis en REDIS_URL, compartido entre contenedores
+    """
+    kind = (os.getenv("CACHE_BACKEND") or "memory").strip().lower()
+    if kind == "memory":
+        return None
+    if kind == "disk":
+        from infrastructure.cache.disk_cache_backend import DiskCacheBackend
+        return DiskCacheBackend(os.getenv("CACHE_DIR") or _default_cache_dir())
+    if kind == "redis":
+        from infrastructure.cache.redis_cache_backend import RedisCacheBackend
+        return RedisCacheBackend(os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"))
+    raise ValueError(f"CACHE_BACKEND desconocido: {kind}")
@@ -0,0 +1,26 @@
+import json
+import os
+import uuid
+
+
+class JsonPlanStore:
+    """Planes de consulta en un JSON chico; se reescribe entero y de forma atómica (tmp + rename)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, plans: dict) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(plans, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
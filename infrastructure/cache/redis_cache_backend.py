@@ -0,0 +1,138 @@
+import os
+import socket
+import threading
+import uuid
+from typing import List, Optional
+from urllib.parse import unquote, urlparse
+
+from domain.ports.cache_backend import CacheBackend
+
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "5"))
+
+# Borra el lock solo si el token sigue siendo el nuestro, en un único paso
+_RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+class RedisError(Exception):
+    pass
+
+
+class RespConnection:
+    """Cliente mínimo del protocolo de Redis (RESP2) sobre un socket, sin dependencias."""
+
+    def __init__(self, host: str, port: int, timeout: float = REDIS_TIMEOUT):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile("rb")
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Conexión cerrada por el servidor")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Respuesta RESP inesperada: {line!r}")
+
+    def execute(self, *args):
+        self.sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend en Redis (o cualquier servidor que hable su protocolo), compartido por
+    todos los workers y contenedores. El lock es SET NX PX y se libera con un script
+    que compara el token, así un worker lento no borra el lock que tomó otro.
+    """
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._local = threading.local()
+
+    def _conn(self) -> RespConnection:
+        # Una conexión por hilo: RESP es petición/respuesta sobre un mismo socket
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = RespConnection(self.host, self.port)
+            if self.password:
+                conn.execute("AUTH", self.password)
+            if self.db:
+                conn.execute("SELECT", self.db)
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, *args):
+        try:
+            return self._conn().execute(*args)
+        except (OSError, ConnectionError):
+            # Conexión rota (reinicio de Redis, timeout): se reabre y se reintenta una vez
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+            self._local.conn = None
+            return self._conn().execute(*args)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._execute("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._execute("SET", key, value, "PX", int(ttl * 1000))
+
+    def delete(self, key: str) -> None:
+        self._execute("DEL", key)
+
+    def scan(self, prefix: str) -> List[str]:
+        keys, cursor = [], b"0"
+        pattern = prefix.replace("*", "\\*").replace("?", "\\?").replace("[", "\\[") + "*"
+        while True:
+            cursor, batch = self._execute("SCAN", cursor, "MATCH", pattern, "COUNT", 500)
+            keys.extend(k.decode("utf-8") for k in batch)
+            if cursor in (b"0", 0, "0"):
+                return keys
+
+    def acquire_lock(self, name: str, ttl: int) -> Optional[str]:
+        token = uuid.uuid4().hex
+        reply = self._execute("SET", name, token, "NX", "PX", int(ttl * 1000))
+        return token if reply == "OK" else None
+
+    def release_lock(self, name: str, token: str) -> None:
+        self._execute("EVAL", _RELEASE_SCRIPT, 1, name, token)
+
+    def is_locked(self, name: str) -> bool:
+        return bool(self._execute("EXISTS", name))
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "host": f"{self.host}:{self.port}", "keys": self._execute("DBSIZE")}
@@ -0,0 +1,83 @@
+import mmap
+import os
+import struct
+import time
+import uuid
+import zlib
+from typing import List, Optional, Tuple
+
+# Formato: MAGIC | escrito_en (float) | cantidad (u32) | por registro: largo (u32), crc32 (u32), bytes
+MAGIC = b"SPCACHE1"
+_HEADER = struct.Struct(">dI")
+_RECORD = struct.Struct(">II")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class CacheSnapshot:
+    """
+    Archivo binario con los rangos del caché ya serializados (cada uno es un blob
+    opaco). Se escribe de forma atómica y se lee con mmap, sin copiar el archivo
+    entero a memoria antes de decodificar.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def save(self, blobs: List[bytes]) -> int:
+        """Escribe el snapshot y devuelve su tamaño en bytes."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER.pack(time.time(), len(blobs)))
+            for blob in blobs:
+                f.write(_RECORD.pack(len(blob), zlib.crc32(blob)))
+                f.write(blob)
+        os.replace(tmp, self.path)
+        return os.path.getsize(self.path)
+
+    def load(self, decode) -> Tuple[list, Optional[float]]:
+        """
+        Devuelve ([decode(blob) por registro], instante en que se escribió).
+        Un registro corrupto se descarta; un archivo ilegible lanza SnapshotError.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return [], None
+        with f:
+            if os.fstat(f.fileno()).st_size < len(MAGIC) + _HEADER.size:
+                raise SnapshotError("Snapshot truncado")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(MAGIC)] != MAGIC:
+                    raise SnapshotError("No es un snapshot de caché (o es de otra versión)")
+                written_at, count = _HEADER.unpack_from(mm, len(MAGIC))
+                offset = len(MAGIC) + _HEADER.size
+                view = memoryview(mm)
+                decoded, blob = [], None
+                try:
+                    for _ in range(count):
+                        if offset + _RECORD.size > len(mm):
+                            raise SnapshotError("Snapshot truncado")
+                        length, crc = _RECORD.unpack_from(mm, offset)
+                        offset += _RECORD.size
+                        blob = view[offset:offset + length]
+                        offset += length
+                        if len(blob) != length or zlib.crc32(blob) != crc:
+                            print("⚠️ Registro corrupto en el snapshot de caché. Se descarta")
+                            continue
+                        try:
+                            decoded.append(decode(blob))
+                        except Exception as e:
+                            print(f"⚠️ Registro ilegible en el snapshot de caché ({e}). Se descarta")
+                finally:
+                    # Soltar las vistas antes de cerrar el mmap
+                    if blob is not None:
+                        blob.release()
+                    view.release()
+                return decoded, written_at
@@ -0,0 +1,56 @@
+import time
+import httpx
+
+from infrastructure.http.graph_session import GRAPH_BASE_URL, HTTP_POOL_MAXSIZE, record_graph_error, record_graph_response
+from infrastructure.http.resilience import TenantGuard, tenant_guard
+
+# Conexiones keep-alive que se mantienen abiertas entre requests
+HTTP_KEEPALIVE_CONNECTIONS = HTTP_POOL_MAXSIZE
+
+
+class AsyncGraphSession:
+    """
+    Transporte HTTP asíncrono (httpx) para Graph, con el mismo pool por host
+    y negociación gzip que GraphSession, y el mismo TenantGuard (el cupo por tenant
+    es uno solo entre los dos). Debe cerrarse con `aclose()` al apagar el API.
+    """
+
+    def __init__(self, max_connections: int = HTTP_POOL_MAXSIZE, guard: TenantGuard = None):
+        self.guard = guard or tenant_guard()
+        self.max_connections = max_connections
+        self.requests = 0
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+            ),
+            headers={"Accept-Encoding": "gzip, deflate"},
+            timeout=30,
+        )
+
+    async def request(self, method: str, url: str, count_success: bool = True, **kwargs) -> httpx.Response:
+        self.requests += 1
+        if not url.startswith(GRAPH_BASE_URL):
+            return await self.client.request(method, url, **kwargs)
+        started = time.perf_counter()
+        try:
+            response = await self.guard.call_async(
+                lambda: self.client.request(method, url, **kwargs), transient=(httpx.TransportError,), count_success=count_success
+            )
+        except Exception:
+            record_graph_error(method)
+            raise
+        record_graph_response(method, response, time.perf_counter() - started)
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, count_success: bool = True, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, count_success, **kwargs)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "max_connections": self.max_connections}
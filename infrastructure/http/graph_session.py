@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from domain.ports.metrics import metrics
+from infrastructure.http.resilience import TenantGuard, tenant_guard
+
+load_dotenv()
+
+GRAPH_BASE_URL = os.getenv("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0")
+
+# Tamaño del pool: cuántos hosts distintos mantenemos y cuántas conexiones por host
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+
+
+class GraphSession:
+    """
+    Transporte HTTP compartido para Graph y el endpoint de login.
+
+    Un único `requests.Session` con keep-alive, pool de conexiones por host
+    (bloqueante: nunca se abren más de `pool_maxsize` conexiones contra el mismo
+    host) y negociación explícita de gzip. Los requests a Graph pasan por el
+    TenantGuard del tenant (cupo, Retry-After, backoff y circuit breaker); los del
+    login no.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        guard: TenantGuard = None
+    ):
+        self.guard = guard or tenant_guard()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+        )
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+    def request(self, method: str, url: str, count_success: bool = True, **kwargs) -> requests.Response:
+        if not url.startswith(GRAPH_BASE_URL):
+            return self.session.request(method, url, **kwargs)
+        started = time.perf_counter()
+        try:
+            response = self.guard.call(
+                lambda: self.session.request(method, url, **kwargs),
+                transient=(requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+                count_success=count_success
+            )
+        except Exception:
+            record_graph_error(method)
+            raise
+        record_graph_response(method, response, time.perf_counter() - started)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, count_success: bool = True, **kwargs) -> requests.Response:
+        return self.request("POST", url, count_success, **kwargs)
+
+    def stats(self) -> dict:
+        """Estadísticas de reutilización de conexiones, por host."""
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "requests": pool.num_requests,
+                "connections_opened": pool.num_connections,
+            }
+        total_requests = sum(h["requests"] for h in hosts.values())
+        total_connections = sum(h["connections_opened"] for h in hosts.values())
+        reused = max(0, total_requests - total_connections)
+        return {
+            "requests": total_requests,
+            "connections_opened": total_connections,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / total_requests, 3) if total_requests else 0.0,
+            "hosts": hosts,
+        }
+
+
+def record_graph_response(method: str, response, seconds: float) -> None:
+    """Latencia (con reintentos y esperas de cupo) y tamaño de una respuesta de Graph."""
+    recorder = metrics()
+    labels = {"method": method}
+    recorder.observe("graph_request_seconds", seconds, labels)
+    recorder.observe("graph_response_bytes", len(response.content), labels)
+    if response.status_code >= 400:
+        recorder.inc("graph_request_errors_total", labels={"method": method, "status": str(response.status_code)})
+
+
+def record_graph_error(method: str) -> None:
+    # Sin respuesta: red, circuito abierto o reintentos agotados
+    metrics().inc("graph_request_errors_total", labels={"method": method, "status": "unavailable"})
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> GraphSession:
+    """Devuelve el transporte compartido del proceso (se crea la primera vez)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = GraphSession()
+    return _session
@@ -0,0 +1,321 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple, Type
+
+from domain.ports.sharepoint_reader import SourceUnavailableError
+
+# Reintentos por request ante throttling (429) o Graph caído (503/504) o sin red
+GRAPH_MAX_RETRIES = int(os.getenv("GRAPH_MAX_RETRIES", "4"))
+# Backoff exponencial con jitter cuando Graph no manda Retry-After: base * 2^intento, con tope
+GRAPH_BACKOFF_BASE = float(os.getenv("GRAPH_BACKOFF_BASE", "0.5"))
+GRAPH_BACKOFF_MAX = float(os.getenv("GRAPH_BACKOFF_MAX", "20"))
+# Si Graph pide esperar más que esto no se espera: se corta y se sirve lo que haya en caché
+GRAPH_RETRY_AFTER_MAX = float(os.getenv("GRAPH_RETRY_AFTER_MAX", "60"))
+# Requests a Graph en vuelo a la vez por tenant (entre todos los readers del proceso)
+GRAPH_MAX_IN_FLIGHT = int(os.getenv("GRAPH_MAX_IN_FLIGHT", "8"))
+# Circuit breaker: fallos seguidos para abrirlo y segundos abierto antes de probar de nuevo
+GRAPH_BREAKER_THRESHOLD = int(os.getenv("GRAPH_BREAKER_THRESHOLD", "5"))
+GRAPH_BREAKER_COOLDOWN = float(os.getenv("GRAPH_BREAKER_COOLDOWN", "30"))
+
+RETRYABLE_STATUS = frozenset({429, 503, 504})
+ASYNC_SLOT_POLL = 0.005
+
+
+class GraphUnavailableError(SourceUnavailableError):
+    pass
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After en segundos o como fecha HTTP; None si no vino o no se entiende."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = GRAPH_BACKOFF_BASE, cap: float = GRAPH_BACKOFF_MAX) -> float:
+    # Mitad fija y mitad al azar: los clientes que fallaron juntos no vuelven todos a la vez
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    """
+    Cerrado: todo pasa. Tras `threshold` fallos seguidos se abre y durante `cooldown`
+    las llamadas fallan al instante (sin tocar Graph). Pasado ese tiempo deja pasar
+    una sola de prueba (half_open): si sale bien se cierra, si falla vuelve a abrirse.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = GRAPH_BREAKER_THRESHOLD, cooldown: float = GRAPH_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if time.time() - self.opened_at >= self.cooldown:
+                # Una sola llamada de prueba por período (si se cuelga, en el próximo se prueba otra)
+                self.state = self.HALF_OPEN
+                self.opened_at = time.time()
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.cooldown - (time.time() - self.opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                print("✅ Graph respondió: se cierra el circuito")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                if self.state == self.CLOSED:
+                    self.opens += 1
+                print(f"🔌 Graph degradado ({self.failures} fallos seguidos): circuito abierto por {self.cooldown:.0f}s")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+            "retry_in": round(self.retry_in(), 1) if self.state != self.CLOSED else 0,
+        }
+
+
+class TenantGuard:
+    """
+    Lo que comparten todas las llamadas a Graph de un tenant: tope de requests en
+    vuelo (entre hilos y event loop), la pausa que pidió Graph con Retry-After (vale
+    para todos, no solo para el request que la recibió) y el circuit breaker.
+    """
+
+    def __init__(
+        self,
+        tenant: str,
+        max_in_flight: int = GRAPH_MAX_IN_FLIGHT,
+        max_retries: int = GRAPH_MAX_RETRIES,
+        retry_after_max: float = GRAPH_RETRY_AFTER_MAX,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.tenant = tenant
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.retry_after_max = retry_after_max
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self._slots = threading.Condition()
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.gave_up = 0
+        self.waited_for_slot = 0
+
+    # --- Cupo de requests en vuelo ---------------------------------------------
+
+    def _try_acquire(self) -> bool:
+        with self._slots:
+            if self.in_flight >= self.max_in_flight:
+                return False
+            self.in_flight += 1
+            return True
+
+    def _acquire(self) -> None:
+        with self._slots:
+            if self.in_flight >= self.max_in_flight:
+                self.waited_for_slot += 1
+            while self.in_flight >= self.max_in_flight:
+                self._slots.wait()
+            self.in_flight += 1
+
+    async def _acquire_async(self) -> None:
+        # El cupo es el mismo que usan los hilos: con el cupo lleno se espera sin bloquear el loop
+        if self._try_acquire():
+            return
+        self.waited_for_slot += 1
+        while not self._try_acquire():
+            await asyncio.sleep(ASYNC_SLOT_POLL)
+
+    def _release(self) -> None:
+        with self._slots:
+            self.in_flight -= 1
+            self._slots.notify()
+
+    # --- Decisión tras cada intento ----------------------------------------------
+
+    def _admit(self) -> float:
+        """Segundos a esperar antes de enviar (pausa por Retry-After), o falla si el circuito está abierto."""
+        if not self.breaker.allow():
+            raise GraphUnavailableError(
+                f"Graph degradado: circuito abierto, se reintenta en {self.breaker.retry_in():.0f}s",
+                retry_after=self.breaker.retry_in()
+            )
+        return max(0.0, self.resume_at - time.time())
+
+    @staticmethod
+    def _breaker_failure(response, error: Optional[Exception]) -> bool:
+        """
+        Si el intento habla de la salud de Graph. Un 429 con Retry-After es Graph
+        marcando el ritmo (la pausa ya la respeta todo el tenant): no es una caída.
+        """
+        if error is not None:
+            return True
+        if response.status_code == 429:
+            return parse_retry_after(response.headers.get("Retry-After")) is None
+        return response.status_code in RETRYABLE_STATUS
+
+    def _outcome(
+        self, response, error: Optional[Exception], attempt: int, count_success: bool = True, count_failure: bool = True
+    ) -> Optional[float]:
+        """None si hay que devolver la respuesta; si no, cuánto esperar antes de reintentar."""
+        if error is None and response.status_code not in RETRYABLE_STATUS:
+            # Un 4xx es problema de la consulta, no de Graph: no cuenta para el circuito
+            if count_success:
+                self.breaker.record_success()
+            return None
+
+        if count_failure:
+            self.breaker.record_failure()
+        retry_after = None
+        if error is None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                self.throttled += 1
+            if retry_after is not None:
+                self.resume_at = max(self.resume_at, time.time() + min(retry_after, self.retry_after_max))
+        reason = str(error) if error is not None else f"HTTP {response.status_code}"
+
+        if attempt >= self.max_retries or (retry_after is not None and retry_after > self.retry_after_max):
+            self.gave_up += 1
+            raise GraphUnavailableError(
+                f"Graph no disponible tras {attempt + 1} intentos ({reason})",
+                retry_after=retry_after if retry_after is not None else self.breaker.retry_in() or None
+            ) from error
+        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+        self.retries += 1
+        print(f"⏳ Graph respondió {reason}. Reintento {attempt + 1}/{self.max_retries} en {delay:.1f}s")
+        return delay
+
+    def record_sub_response(self, status: int, retry_after: Optional[float]) -> None:
+        """
+        Resultado de un sub-request de $batch: el POST puede salir 200 aunque adentro
+        haya throttling, así que cada respuesta cuenta para el circuito y la pausa.
+        """
+        if status not in RETRYABLE_STATUS:
+            self.breaker.record_success()
+            return
+        if status != 429 or retry_after is None:
+            self.breaker.record_failure()
+        if status == 429:
+            self.throttled += 1
+        if retry_after is not None:
+            self.resume_at = max(self.resume_at, time.time() + min(retry_after, self.retry_after_max))
+
+    def call(self, send: Callable[[], object], transient: Tuple[Type[Exception], ...] = (), count_success: bool = True):
+        """
+        Ejecuta `send` (un request a Graph) con cupo, reintentos y circuit breaker.
+        Con count_success=False una respuesta buena no cierra el circuito (la decide el que llama, p. ej. $batch).
+        Para el circuito cuenta un fallo por llamada, no uno por intento: un solo request
+        que agota sus reintentos no lo abre.
+        """
+        attempt, counted = 0, False
+        while True:
+            wait = self._admit()
+            if wait:
+                time.sleep(wait)
+            self._acquire()
+            response, error = None, None
+            try:
+                self.requests += 1
+                response = send()
+            except transient as e:
+                error = e
+            finally:
+                self._release()
+            failure = not counted and self._breaker_failure(response, error)
+            delay = self._outcome(response, error, attempt, count_success, failure)
+            counted = counted or failure
+            if delay is None:
+                return response
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, send, transient: Tuple[Type[Exception], ...] = (), count_success: bool = True):
+        attempt, counted = 0, False
+        while True:
+            wait = self._admit()
+            if wait:
+                await asyncio.sleep(wait)
+            await self._acquire_async()
+            response, error = None, None
+            try:
+                self.requests += 1
+                response = await send()
+            except transient as e:
+                error = e
+            finally:
+                self._release()
+            failure = not counted and self._breaker_failure(response, error)
+            delay = self._outcome(response, error, attempt, count_success, failure)
+            counted = counted or failure
+            if delay is None:
+                return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        return {
+            "tenant": self.tenant,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "gave_up": self.gave_up,
+            "waited_for_slot": self.waited_for_slot,
+            "paused_for": round(max(0.0, self.resume_at - time.time()), 1),
+            "breaker": self.breaker.stats(),
+        }
+
+
+_guards: Dict[str, TenantGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def tenant_guard(tenant: Optional[str] = None) -> TenantGuard:
+    """El guard del tenant (por defecto TENANT_ID), compartido por los transportes sync y async."""
+    tenant = tenant or os.getenv("TENANT_ID") or "default"
+    with _guards_lock:
+        if tenant not in _guards:
+            _guards[tenant] = TenantGuard(tenant)
+        return _guards[tenant]
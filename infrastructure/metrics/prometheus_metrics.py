@@ -0,0 +1,169 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from domain.ports.metrics import Labels, Metrics
+
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ITEMS_BUCKETS = (0, 1, 10, 50, 100, 250, 500, 999, 5000)
+AGE_BUCKETS = (0, 1, 5, 30, 60, 120, 300, 900, 1800, 3600, 21600, 86400)
+
+# Lo que se conoce de antemano: tipo, descripción y buckets. Lo que no esté acá es
+# un histograma en segundos (observe) o un contador sin descripción (inc).
+FAMILIES = {
+    "http_request_duration_seconds": ("histogram", "Duración de los requests a la API hasta tener la respuesta, por ruta", SECONDS_BUCKETS),
+    "graph_token_seconds": ("histogram", "Espera por el token de Graph cuando no estaba vigente (renovación)", SECONDS_BUCKETS),
+    "graph_token_total": ("counter", "Renovaciones del token de Graph por resultado (refresh, failure)", None),
+    "graph_request_seconds": ("histogram", "Latencia de cada request a Graph (GET de página o POST $batch), reintentos incluidos", SECONDS_BUCKETS),
+    "graph_response_bytes": ("histogram", "Tamaño del cuerpo de cada respuesta de Graph", BYTES_BUCKETS),
+    "graph_json_decode_seconds": ("histogram", "Decodificación del JSON de cada respuesta de Graph", SECONDS_BUCKETS),
+    "graph_request_errors_total": ("counter", "Requests a Graph que terminaron en error", None),
+    "graph_page_items": ("histogram", "Items por página de Graph", ITEMS_BUCKETS),
+    "graph_page_parse_seconds": ("histogram", "Armado de los SharePointItem de una página", SECONDS_BUCKETS),
+    "classify_seconds": ("histogram", "Clasificación por estado (filtro de /items)", SECONDS_BUCKETS),
+    "serialize_seconds": ("histogram", "Serialización de la respuesta (armado de filas/columnas y JSON)", SECONDS_BUCKETS),
+    "items_cache_requests_total": ("counter", "Consultas de items por resultado del caché (hit, stale, miss, degraded, replica)", None),
+    "items_cache_data_age_seconds": ("histogram", "Antigüedad del dato más viejo servido por consulta de items", AGE_BUCKETS),
+}
+
+# Histogramas que suman al header Server-Timing del request en curso (nombre corto en el header)
+SERVER_TIMING_METRICS = {
+    "graph_token_seconds": "token",
+    "graph_request_seconds": "graph",
+    "graph_json_decode_seconds": "decode",
+    "graph_page_parse_seconds": "parse",
+    "classify_seconds": "classify",
+    "serialize_seconds": "serialize",
+}
+
+_request_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("request_timings", default=None)
+
+INF_LABEL = 'le="+Inf"'
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Family:
+
+    def __init__(self, name: str, kind: str, help_text: str, buckets: Optional[tuple]):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.buckets = buckets or SECONDS_BUCKETS
+        # Histograma: etiquetas → [conteo por bucket (+Inf al final), suma, total]; contador: etiquetas → valor
+        self.series: Dict[LabelKey, list] = {}
+
+
+def _label_key(labels: Labels) -> LabelKey:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class PrometheusMetrics(Metrics):
+    """
+    Histogramas y contadores en memoria del proceso, expuestos en el formato de
+    texto de Prometheus (render). Con varios workers cada uno tiene los suyos:
+    Prometheus los distingue por instancia.
+
+    Además, lo que se mide dentro de request_timings() se acumula por request
+    para armar el header Server-Timing.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _family(self, name: str, kind: str) -> _Family:
+        family = self._families.get(name)
+        if family is None:
+            known_kind, help_text, buckets = FAMILIES.get(name, (kind, "", None))
+            family = self._families.setdefault(name, _Family(name, known_kind, help_text, buckets))
+        return family
+
+    def observe(self, name: str, value: float, labels: Labels = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            family = self._family(name, "histogram")
+            series = family.series.get(key)
+            if series is None:
+                series = family.series[key] = [[0] * (len(family.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(family.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+        timings = _request_timings.get()
+        if timings is not None and name in SERVER_TIMING_METRICS:
+            entry = timings.setdefault(SERVER_TIMING_METRICS[name], [0.0, 0])
+            entry[0] += value
+            entry[1] += 1
+
+    def inc(self, name: str, amount: float = 1, labels: Labels = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            family = self._family(name, "counter")
+            family.series[key] = family.series.get(key, 0) + amount
+
+    @contextmanager
+    def request_timings(self) -> Iterator[Dict[str, List[float]]]:
+        """Acumula (segundos, mediciones) por nombre corto de lo que se mide en este contexto (un request)."""
+        timings: Dict[str, List[float]] = {}
+        token = _request_timings.set(timings)
+        try:
+            yield timings
+        finally:
+            _request_timings.reset(token)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda f: f.name)
+            for family in families:
+                if family.help:
+                    lines.append(f"# HELP {family.name} {family.help}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for key, series in sorted(family.series.items()):
+                    if family.kind == "counter":
+                        lines.append(f"{family.name}{_format_labels(key)} {_format_value(series)}")
+                        continue
+                    counts, total, count = series
+                    cumulative = 0
+                    for bound, bucket_count in zip(family.buckets, counts):
+                        cumulative += bucket_count
+                        le = 'le="%s"' % _format_value(bound)
+                        lines.append(f"{family.name}_bucket{_format_labels(key, le)} {cumulative}")
+                    lines.append(f"{family.name}_bucket{_format_labels(key, INF_LABEL)} {count}")
+                    lines.append(f"{family.name}_sum{_format_labels(key)} {_format_value(round(total, 6))}")
+                    lines.append(f"{family.name}_count{_format_labels(key)} {count}")
+        lines.append("# TYPE process_start_time_seconds gauge")
+        lines.append(f"process_start_time_seconds {_format_value(round(self.started_at, 3))}")
+        return "\n".join(lines) + "\n"
+
+
+def server_timing(timings: Dict[str, List[float]], total: Optional[float] = None) -> str:
+    """Header Server-Timing: `graph;dur=812.4;desc="6x"` (ms acumulados y cuántas mediciones)."""
+    parts = [
+        f'{name};dur={seconds * 1000:.1f};desc="{count}x"'
+        for name, (seconds, count) in timings.items()
+    ]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,53 @@
+from collections import Counter
+from datetime import date
+from typing import List, Optional, Tuple
+
+
+class ReportSummary:
+    """
+    Las tablas del Dashboard del reporte, acumuladas en una sola pasada sobre las
+    filas (sin DataFrames): cantidad por lista, procesados por día y pendientes
+    por día y lista. Las usan StreamingReportWriter y ExcelReportWriter.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.by_status: Counter = Counter()
+        self._by_list: Counter = Counter()
+        self._procesados: Counter = Counter()  # (día, mes)
+        self._pendientes: Counter = Counter()  # (día, lista)
+
+    def add(self, lista: str, estado: str, fecha: Optional[date], mes: Optional[str]) -> None:
+        self.rows += 1
+        self.by_status[estado] += 1
+        self._by_list[lista] += 1
+        # Como en el groupby de pandas, las filas sin fecha no cuentan en las tablas por día
+        if fecha is None:
+            return
+        if estado == "Procesado":
+            self._procesados[(fecha, mes)] += 1
+        elif estado == "Pendiente":
+            self._pendientes[(fecha, lista)] += 1
+
+    def resumen_general(self) -> List[Tuple]:
+        return sorted(self._by_list.items())
+
+    def ejecuciones(self) -> List[Tuple]:
+        return [(day, month, count) for (day, month), count in sorted(self._procesados.items())]
+
+    def pendientes(self) -> List[Tuple]:
+        return [(day, lista, count) for (day, lista), count in sorted(self._pendientes.items())]
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "by_status": dict(self.by_status),
+            "resumen_general": [{"Lista": lista, "Cantidad enviada": n} for lista, n in self.resumen_general()],
+            "ejecuciones": [
+                {"Fechas / Día": day.isoformat(), "Mes": month, "Total general": n} for day, month, n in self.ejecuciones()
+            ],
+            "pendientes": [
+                {"Fecha de Envío": day.isoformat(), "Cantidades por Listas": lista, "Total general": n}
+                for day, lista, n in self.pendientes()
+            ],
+        }
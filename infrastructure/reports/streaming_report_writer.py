@@ -0,0 +1,190 @@
+import csv
+import json
+import os
+import uuid
+from typing import Callable, Iterable, Iterator, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.report_writer import ReportWriter
+from infrastructure.reports.report_summary import ReportSummary
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: solo hace falta para format="parquet"
+    pa = None
+
+REPORT_FORMATS = ("xlsx", "csv", "parquet")
+
+# Filas por row group de Parquet (y lo máximo que se tiene en memoria a la vez)
+PARQUET_BATCH_ROWS = int(os.getenv("PARQUET_BATCH_ROWS", "20000"))
+
+DETAIL_COLUMNS = ("ID", "Lista", "Estado", "Estado Baja", "Teléfono", "Fecha Creación", "Mes", "Año")
+
+
+def report_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext not in REPORT_FORMATS:
+        raise ValueError(f"Formato de reporte desconocido '{ext}'. Opciones: {', '.join(REPORT_FORMATS)}")
+    return ext
+
+
+def _rows(items: Iterable[SharePointItem]) -> Iterator[tuple]:
+    for item in items:
+        f_creacion = item.fecha_creacion
+        yield (
+            item.id,
+            item.source_list_display,
+            item.status,
+            item.estado_baja,
+            item.phone_number,
+            f_creacion.date() if f_creacion else None,
+            f_creacion.strftime("%b") if f_creacion else None,
+            f_creacion.year if f_creacion else None,
+        )
+
+
+class StreamingReportWriter(ReportWriter):
+    """
+    Reporte en streaming: recorre los items una sola vez, escribe cada fila apenas
+    la recibe y arma los resúmenes del Dashboard en esa misma pasada. La memoria no
+    crece con el dataset (openpyxl en modo write-only, CSV fila a fila, Parquet por
+    row groups).
+
+    El formato sale de la extensión de `path`: .xlsx (hoja Dashboard y, con
+    `include_rows`, Detalle), .csv o .parquet (las filas; el Dashboard va a
+    `<path>.summary.json`). Por defecto el xlsx lleva solo el Dashboard, como el
+    reporte de siempre: la hoja Detalle multiplica el tiempo de escritura.
+    """
+
+    def __init__(self, path: str = "reporte_sharepoint_summary.xlsx", include_rows: bool = False):
+        self.path = path
+        self.format = report_format(path)
+        self.include_rows = include_rows
+        if self.format == "parquet" and pa is None:
+            raise RuntimeError("Para reportes Parquet hace falta pyarrow (pip install pyarrow)")
+
+    def write(self, all_items, pendientes, procesados):
+        self.write_stream(all_items)
+
+    def write_stream(
+        self,
+        items: Iterable[SharePointItem],
+        progress: Optional[Callable[[int], None]] = None
+    ) -> dict:
+        summary = ReportSummary()
+
+        def tracked() -> Iterator[tuple]:
+            for row in _rows(items):
+                summary.add(row[1], row[2], row[5], row[6])
+                if progress is not None and summary.rows % 1000 == 0:
+                    progress(summary.rows)
+                yield row
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Se escribe a un temporal y se renombra: nadie ve nunca un reporte a medio escribir
+        tmp = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            getattr(self, f"_write_{self.format}")(tmp, tracked(), summary)
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        if progress is not None:
+            progress(summary.rows)
+
+        if self.format != "xlsx":
+            with open(f"{self.path}.summary.json", "w", encoding="utf-8") as f:
+                json.dump(summary.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"✨ Reporte {self.format} generado: {self.path} ({summary.rows} filas)")
+        return {"path": self.path, "format": self.format, "summary": summary.to_dict()}
+
+    def _write_xlsx(self, path: str, rows: Iterator[tuple], summary: ReportSummary) -> None:
+        workbook = Workbook(write_only=True)
+        dashboard = workbook.create_sheet("Dashboard")
+        detail = workbook.create_sheet("Detalle") if self.include_rows else None
+        if detail is not None:
+            detail.append(DETAIL_COLUMNS)
+            for row in rows:
+                detail.append(row)
+        else:
+            for _ in rows:
+                pass
+
+        print("📊 Generando tablas de resumen...")
+        for row in self._dashboard_rows(dashboard, summary):
+            dashboard.append(row)
+        workbook.save(path)
+
+    @staticmethod
+    def _dashboard_rows(sheet, summary: ReportSummary) -> Iterator[list]:
+        """
+        Las tres tablas en las mismas posiciones que el reporte anterior: cantidad por
+        lista en A3, procesados por día en F3 y pendientes por día y lista en A16.
+        En write-only las filas se escriben en orden, así que se arma la grilla primero.
+        """
+        grid = {}
+        bold = Font(bold=True)
+
+        def place(top: int, left: int, header, rows) -> None:
+            for c, value in enumerate(header):
+                grid[(top, left + c)] = (value, bold)
+            for r, row in enumerate(rows, start=1):
+                for c, value in enumerate(row):
+                    grid[(top + r, left + c)] = (value, None)
+
+        place(2, 0, ("Lista", "Cantidad enviada"), summary.resumen_general())
+        if summary.ejecuciones():
+            place(2, 5, ("Fechas / Día", "Mes", "Total general"), summary.ejecuciones())
+        if summary.pendientes():
+            place(15, 0, ("Fecha de Envío", "Cantidades por Listas", "Total general"), summary.pendientes())
+
+        if not grid:
+            return
+        last_row = max(r for r, _ in grid)
+        last_col = max(c for _, c in grid)
+        for r in range(last_row + 1):
+            row = []
+            for c in range(last_col + 1):
+                value, font = grid.get((r, c), (None, None))
+                if font is not None:
+                    cell = WriteOnlyCell(sheet, value=value)
+                    cell.font = font
+                    value = cell
+                row.append(value)
+            yield row
+
+    @staticmethod
+    def _write_csv(path: str, rows: Iterator[tuple], summary: ReportSummary) -> None:
+        # utf-8-sig: Excel abre el CSV con los acentos bien
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(DETAIL_COLUMNS)
+            writer.writerows(rows)
+
+    @staticmethod
+    def _write_parquet(path: str, rows: Iterator[tuple], summary: ReportSummary) -> None:
+        schema = pa.schema([
+            ("ID", pa.string()), ("Lista", pa.string()), ("Estado", pa.string()), ("Estado Baja", pa.string()),
+            ("Teléfono", pa.string()), ("Fecha Creación", pa.date32()), ("Mes", pa.string()), ("Año", pa.int32()),
+        ])
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= PARQUET_BATCH_ROWS:
+                    writer.write_table(_to_table(batch, schema))
+                    batch = []
+            if batch or not summary.rows:
+                writer.write_table(_to_table(batch, schema))
+
+
+def _to_table(batch, schema):
+    columns = list(zip(*batch)) if batch else [[] for _ in schema]
+    return pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema)
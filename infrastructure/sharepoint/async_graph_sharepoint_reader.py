@@ -0,0 +1,125 @@
+from typing import AsyncIterator, List, Optional, Union
+
+import httpx
+
+from domain.entities.sharepoint_item import SharePointItem, select_fields
+from domain.ports.async_sharepoint_reader import AsyncSharePointReader
+from domain.ports.sharepoint_reader import ItemFilter, ItemsRequest, ListColumn, QueryRejectedError
+from infrastructure.auth.graph_auth import get_access_token_async
+from infrastructure.http.async_graph_session import AsyncGraphSession
+from infrastructure.sharepoint.graph_batch import GRAPH_BATCH, BatchCrawl, run_batches_async
+from infrastructure.sharepoint.graph_items import (
+    GRAPH_LOG_PAGES, build_columns_url, build_items_url, decode_json, graph_headers, parse_columns, parse_items_page
+)
+
+
+class AsyncGraphSharePointReader(AsyncSharePointReader):
+    """Reader de Graph sobre httpx: mientras espera una página libera el event loop."""
+
+    supports_batch = GRAPH_BATCH
+
+    def __init__(self, session: AsyncGraphSession = None):
+        self.session = session or AsyncGraphSession()
+        self.batch_rounds = 0
+        self.batch_pages = 0
+
+    async def get_items(
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
+    ) -> List[SharePointItem]:
+        items = []
+        async for page in self.iter_pages(
+            list_id, source_name, filter_query, select_query, orderby_query, max_items, min_date_threshold, item_filter
+        ):
+            items.extend(page)
+        print(f"✅ {source_name}: {len(items)} recuperados")
+        return items
+
+    async def iter_pages(
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
+    ) -> AsyncIterator[List[SharePointItem]]:
+        url = build_items_url(list_id, filter_query, select_query, orderby_query)
+        headers = graph_headers(await get_access_token_async())
+        async for page in self._pages(url, headers, source_name, max_items, min_date_threshold, select_fields(select_query), item_filter):
+            yield page
+
+    async def get_items_many(self, requests: List[ItemsRequest]) -> List[Union[List[SharePointItem], Exception]]:
+        """Las consultas avanzan juntas: cada ronda pide la página siguiente de todas en un $batch."""
+        crawl = BatchCrawl(requests, **self._crawl_options())
+        results = await run_batches_async(self.session, graph_headers(await get_access_token_async()), crawl)
+        self.batch_rounds += crawl.rounds
+        self.batch_pages += crawl.sub_requests
+        return results
+
+    async def get_columns(self, list_id: str) -> List[ListColumn]:
+        headers = graph_headers(await get_access_token_async())
+        columns, url = [], build_columns_url(list_id)
+        while url:
+            data = await self._get_page(url, headers, f"columnas de {list_id}", 1)
+            columns.extend(parse_columns(data))
+            url = data.get("@odata.nextLink")
+        return columns
+
+    def _crawl_options(self) -> dict:
+        return {}
+
+    def stats(self) -> dict:
+        return {"batch": {"enabled": self.supports_batch, "rounds": self.batch_rounds, "pages": self.batch_pages}}
+
+    async def _get_page(self, url: str, headers: dict, source_name: str, page_count: int) -> dict:
+        if GRAPH_LOG_PAGES:
+            print(f"📄 [{source_name}] Cargando página {page_count}...")
+        try:
+            response = await self.session.get(url, headers=headers)
+            response.raise_for_status()
+            return decode_json(response)
+        except httpx.HTTPError as e:
+            print(f"❌ Error en {source_name} (página {page_count}): {e}")
+            if isinstance(e, httpx.HTTPStatusError):
+                print(f"🔍 Detalle del error: {e.response.text}")
+                if e.response.status_code == 400:
+                    raise QueryRejectedError(f"{source_name}: {e}") from e
+            raise e # Re-lanzar para que el UseCase lo maneje
+
+    async def _pages(
+        self,
+        url: str,
+        headers: dict,
+        source_name: str,
+        max_items: int,
+        min_date_threshold: Optional[str],
+        keep_fields: Optional[frozenset],
+        item_filter: Optional[ItemFilter] = None
+    ) -> AsyncIterator[List[SharePointItem]]:
+        """Sigue @odata.nextLink desde `url` hasta el límite, el umbral de fecha o la última página."""
+        emitted = 0
+        page_count = 0
+        while url:
+            page_count += 1
+            data = await self._get_page(url, headers, source_name, page_count)
+            page = []
+            stop = parse_items_page(data, source_name, page, max_items - emitted, min_date_threshold, keep_fields, item_filter)
+            emitted += len(page)
+            if page:
+                yield page
+            if stop:
+                return
+            url = data.get("@odata.nextLink")
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
@@ -0,0 +1,37 @@
+import os
+
+from dotenv import load_dotenv
+
+from domain.ports.async_sharepoint_reader import AsyncSharePointReader
+from domain.ports.sharepoint_reader import SharePointReader
+
+load_dotenv()
+
+
+def _crawler() -> str:
+    kind = (os.getenv("GRAPH_CRAWLER") or "partitioned").strip().lower()
+    if kind not in ("partitioned", "serial"):
+        raise ValueError(f"GRAPH_CRAWLER desconocido: {kind}")
+    return kind
+
+
+def create_async_reader() -> AsyncSharePointReader:
+    """
+    Reader async de Graph según GRAPH_CRAWLER:
+      - "partitioned" (por defecto): las descargas grandes se parten en ventanas de Created en paralelo
+      - "serial": un @odata.nextLink por vez
+    """
+    if _crawler() == "partitioned":
+        from infrastructure.sharepoint.partitioned_crawler import PartitionedGraphSharePointReader
+        return PartitionedGraphSharePointReader()
+    from infrastructure.sharepoint.async_graph_sharepoint_reader import AsyncGraphSharePointReader
+    return AsyncGraphSharePointReader()
+
+
+def create_reader() -> SharePointReader:
+    """Lo mismo para el reader síncrono (CLI del reporte)."""
+    if _crawler() == "partitioned":
+        from infrastructure.sharepoint.partitioned_crawler import PartitionedSyncGraphSharePointReader
+        return PartitionedSyncGraphSharePointReader()
+    from infrastructure.sharepoint.graph_sharepoint_reader import GraphSharePointReader
+    return GraphSharePointReader()
@@ -0,0 +1,371 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Union
+
+from domain.entities.sharepoint_item import SharePointItem, select_fields
+from domain.ports.sharepoint_reader import ItemsRequest, QueryRejectedError
+from infrastructure.http.graph_session import GRAPH_BASE_URL
+from infrastructure.http.resilience import RETRYABLE_STATUS, GraphUnavailableError, backoff_delay, parse_retry_after
+from infrastructure.sharepoint.crawl_plan import (
+    CRAWL_CONCURRENCY, CREATED_DESC, CrawlPlanner, Window, boundary_ids, initial_launches, trim_window_items
+)
+from infrastructure.sharepoint.graph_items import build_items_url, decode_json, parse_items_page
+
+# Agrupar las consultas a Graph en requests $batch (false = un GET por página, como antes)
+GRAPH_BATCH = os.getenv("GRAPH_BATCH", "true").lower() == "true"
+# Sub-requests por $batch (Graph acepta hasta 20)
+GRAPH_BATCH_SIZE = max(1, min(20, int(os.getenv("GRAPH_BATCH_SIZE", "20"))))
+
+BATCH_URL = f"{GRAPH_BASE_URL}/$batch"
+BATCH_TIMEOUT = 60
+
+BatchResult = Union[dict, Exception]
+
+
+class GraphBatchError(Exception):
+    """Un sub-request del $batch respondió con error (p. ej. 400 por un filtro que la lista no acepta)."""
+
+    def __init__(self, status: int, body=None):
+        message = body.get("error", {}).get("message") if isinstance(body, dict) else body
+        super().__init__(f"HTTP {status} en sub-request de $batch: {message or 'sin detalle'}")
+        self.status = status
+        self.body = body
+
+
+class GraphBatchRejectedError(GraphBatchError, QueryRejectedError):
+    """El sub-request respondió 400: la lista no acepta la consulta."""
+
+
+def batch_error(status: int, body=None) -> GraphBatchError:
+    return GraphBatchRejectedError(status, body) if status == 400 else GraphBatchError(status, body)
+
+
+def _relative(url: str) -> str:
+    # Dentro de un $batch las URLs van relativas a la versión (los nextLink de Graph vienen absolutos)
+    return url[len(GRAPH_BASE_URL):] if url.startswith(GRAPH_BASE_URL) else url
+
+
+def _chunks(urls: Dict[str, str], size: int) -> List[Dict[str, str]]:
+    keys = list(urls)
+    return [{key: urls[key] for key in keys[i:i + size]} for i in range(0, len(keys), size)]
+
+
+def _batch_body(chunk: Dict[str, str], headers: dict) -> dict:
+    # La autorización va en el POST; a cada sub-request solo le corresponde el Prefer de las consultas
+    sub_headers = {"Prefer": headers["Prefer"]} if "Prefer" in headers else {}
+    return {
+        "requests": [
+            {"id": key, "method": "GET", "url": _relative(url), "headers": sub_headers}
+            for key, url in chunk.items()
+        ]
+    }
+
+
+class _BatchRound:
+    """
+    Lo que tienen en común send_batch y send_batch_async: armar los lotes y repartir
+    las respuestas. Cada sub-request se juzga por separado: los 429/503/504 se
+    reintentan (solo esos, en el lote siguiente), los demás errores quedan para
+    la consulta que los pidió.
+    """
+
+    def __init__(self, guard, urls: Dict[str, str], size: int):
+        self.guard = guard
+        self.size = size
+        self.pending = dict(urls)
+        self.results: Dict[str, BatchResult] = {}
+        self.attempt = 0
+
+    def chunks(self) -> List[Dict[str, str]]:
+        return _chunks(self.pending, self.size)
+
+    def failed(self, chunk: Dict[str, str], error: Exception) -> None:
+        # Si el POST entero falla (circuito abierto, 401, red) falla cada consulta del lote
+        for key in chunk:
+            self.results[key] = error
+
+    def absorb(self, chunk: Dict[str, str], payload: dict, retry: Dict[str, str]) -> float:
+        """Reparte las respuestas de un lote; devuelve cuánto esperar antes de reintentar los que lo piden."""
+        wait = 0.0
+        for sub in payload.get("responses") or []:
+            key = str(sub.get("id"))
+            if key not in chunk:
+                continue
+            status = int(sub.get("status") or 500)
+            retry_after = parse_retry_after((sub.get("headers") or {}).get("Retry-After"))
+            self.guard.record_sub_response(status, retry_after)
+            if status < 300:
+                self.results[key] = sub.get("body") or {}
+            elif status not in RETRYABLE_STATUS:
+                self.results[key] = batch_error(status, sub.get("body"))
+            elif self.attempt >= self.guard.max_retries or (retry_after or 0) > self.guard.retry_after_max:
+                self.guard.gave_up += 1
+                self.results[key] = GraphUnavailableError(
+                    f"Graph no disponible tras {self.attempt + 1} intentos (HTTP {status} en $batch)",
+                    retry_after=retry_after
+                )
+            else:
+                retry[key] = chunk[key]
+                wait = max(wait, retry_after if retry_after is not None else backoff_delay(self.attempt))
+        for key in chunk:
+            if key not in self.results and key not in retry:
+                self.results[key] = GraphBatchError(500, "el $batch no trajo respuesta para este sub-request")
+        return wait
+
+    def next_attempt(self, retry: Dict[str, str], wait: float) -> float:
+        self.pending = retry
+        if retry:
+            self.guard.retries += len(retry)
+            print(f"⏳ {len(retry)} sub-requests del $batch con throttling. Reintento {self.attempt + 1}/{self.guard.max_retries} en {wait:.1f}s")
+        self.attempt += 1
+        return wait
+
+
+def send_batch(session, headers: dict, urls: Dict[str, str], size: int = GRAPH_BATCH_SIZE) -> Dict[str, BatchResult]:
+    """Pide `urls` (clave → URL de Graph) en lotes $batch. Devuelve el JSON o la excepción de cada clave."""
+    batch = _BatchRound(session.guard, urls, size)
+    while batch.pending:
+        retry, wait = {}, 0.0
+        for chunk in batch.chunks():
+            try:
+                # El POST sale 200 aunque adentro haya throttling: el circuito lo deciden los sub-requests
+                response = session.post(
+                    BATCH_URL, count_success=False, json=_batch_body(chunk, headers), headers=headers, timeout=BATCH_TIMEOUT
+                )
+                response.raise_for_status()
+                wait = max(wait, batch.absorb(chunk, decode_json(response), retry))
+            except Exception as e:
+                print(f"❌ Error en $batch ({len(chunk)} sub-requests): {e}")
+                batch.failed(chunk, e)
+        if batch.next_attempt(retry, wait):
+            time.sleep(wait)
+    return batch.results
+
+
+async def send_batch_async(session, headers: dict, urls: Dict[str, str], size: int = GRAPH_BATCH_SIZE) -> Dict[str, BatchResult]:
+    batch = _BatchRound(session.guard, urls, size)
+    while batch.pending:
+        retry, wait = {}, 0.0
+        chunks = batch.chunks()
+        # Los lotes de una misma ronda salen juntos (el cupo del tenant sigue valiendo)
+        responses = await asyncio.gather(
+            *(session.post(BATCH_URL, count_success=False, json=_batch_body(chunk, headers), headers=headers, timeout=BATCH_TIMEOUT)
+              for chunk in chunks),
+            return_exceptions=True
+        )
+        for chunk, response in zip(chunks, responses):
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                response.raise_for_status()
+                wait = max(wait, batch.absorb(chunk, decode_json(response), retry))
+            except Exception as e:
+                print(f"❌ Error en $batch ({len(chunk)} sub-requests): {e}")
+                batch.failed(chunk, e)
+        if batch.next_attempt(retry, wait):
+            await asyncio.sleep(wait)
+    return batch.results
+
+
+@dataclass
+class _Cursor:
+    """Una paginación en curso: la de la consulta (desde la página 1) o la de una ventana de Created."""
+    url: Optional[str]
+    max_items: int
+    items: List[SharePointItem] = field(default_factory=list)
+    pages: int = 0
+    done: bool = False
+    window: Optional[Window] = None
+
+
+class _Crawl:
+    def __init__(self, request: ItemsRequest):
+        self.request = request
+        self.keep_fields = select_fields(request.select_query)
+        url = build_items_url(request.list_id, request.filter_query, request.select_query, request.orderby_query)
+        self.head = _Cursor(url, request.max_items)
+        self.windows: List[_Cursor] = []
+        self.active = 0
+        self.skip: Set[str] = set()
+        self.error: Optional[Exception] = None
+        self.finished = False
+
+    def cursors(self) -> List[_Cursor]:
+        return [self.head] + self.windows[:self.active]
+
+    def read(self, cursor: _Cursor, data: dict) -> None:
+        cursor.pages += 1
+        stop = parse_items_page(
+            data, self.request.source_name, cursor.items, cursor.max_items, self.request.min_date_threshold, self.keep_fields,
+            self.request.item_filter
+        )
+        cursor.url = None if stop else data.get("@odata.nextLink")
+        cursor.done = cursor.url is None
+
+    def items(self) -> List[SharePointItem]:
+        items = list(self.head.items)
+        skip = self.skip
+        for cursor in self.windows:
+            if len(items) >= self.request.max_items:
+                break
+            items.extend(trim_window_items(cursor.items, skip, self.request.max_items - len(items)))
+            skip = set()
+        return items
+
+    def settle(self) -> None:
+        """Termina la consulta si ya está todo o si las ventanas completas (en orden) alcanzan el límite."""
+        if not self.head.done:
+            return
+        if not self.windows:
+            self.finished = True
+            return
+        total = len(self.head.items)
+        skip = self.skip
+        for cursor in self.windows:
+            if not cursor.done:
+                return
+            total += len(trim_window_items(cursor.items, skip, self.request.max_items))
+            skip = set()
+            if total >= self.request.max_items:
+                break
+        self.finished = True
+
+
+class BatchCrawl:
+    """
+    Descarga varias consultas de items a la vez, en rondas: cada ronda es un pedido
+    de páginas (una por paginación activa) que se manda agrupado en $batch. La
+    primera ronda trae la página 1 de todas las consultas (y, si se van a partir
+    por Created, el item más viejo de cada lista); después sigue cada nextLink.
+
+    Con `planner`, las consultas ordenadas por Created desc que no entran en la
+    página 1 se parten en ventanas como hace el crawler particionado, y hasta
+    `concurrency` ventanas por consulta avanzan en la misma ronda. El resultado es
+    el mismo que el de get_items para cada consulta.
+
+    No hace I/O: next_requests() dice qué pedir y feed() recibe las respuestas,
+    así el mismo recorrido sirve para el reader síncrono y el async.
+    """
+
+    def __init__(
+        self,
+        requests: List[ItemsRequest],
+        planner: Optional[CrawlPlanner] = None,
+        concurrency: int = CRAWL_CONCURRENCY,
+        oldest: Optional[Dict[tuple, Optional[str]]] = None,
+        on_partition: Optional[Callable[[], None]] = None
+    ):
+        self.crawls = [_Crawl(request) for request in requests]
+        self.planner = planner
+        self.concurrency = max(1, concurrency)
+        self.oldest = oldest if oldest is not None else {}
+        self.on_partition = on_partition
+        self.rounds = 0
+        self.sub_requests = 0
+
+    @property
+    def done(self) -> bool:
+        return all(crawl.finished for crawl in self.crawls)
+
+    def _partitionable(self, crawl: _Crawl) -> bool:
+        return self.planner is not None and crawl.request.orderby_query == CREATED_DESC
+
+    def _oldest_key(self, crawl: _Crawl) -> tuple:
+        return crawl.request.list_id, crawl.request.filter_query
+
+    def next_requests(self) -> Dict[str, str]:
+        urls = {}
+        for i, crawl in enumerate(self.crawls):
+            if crawl.finished:
+                continue
+            if self.rounds == 0 and self._partitionable(crawl) and not crawl.request.min_date_threshold \
+                    and self._oldest_key(crawl) not in self.oldest:
+                # El más viejo viaja junto con la página 1: si no hace falta partir, solo se pierde un sub-request
+                urls[f"{i}.o"] = build_items_url(
+                    crawl.request.list_id, crawl.request.filter_query, "Created", "fields/Created asc", top=1
+                )
+            for j, cursor in enumerate(crawl.cursors()):
+                if not cursor.done:
+                    urls[f"{i}.{j}"] = cursor.url
+        self.rounds += 1
+        self.sub_requests += len(urls)
+        return urls
+
+    def feed(self, results: Dict[str, BatchResult]) -> None:
+        for i, crawl in enumerate(self.crawls):
+            if crawl.finished:
+                continue
+            probe = results.get(f"{i}.o")
+            if probe is not None:
+                if isinstance(probe, Exception):
+                    print(f"⚠️ [{crawl.request.source_name}] No se pudo ubicar el item más viejo ({probe}). Se sigue página a página")
+                else:
+                    value = probe.get("value") or []
+                    self.oldest[self._oldest_key(crawl)] = value[0]["fields"].get("Created") if value else None
+
+            for j, cursor in enumerate(crawl.cursors()):
+                result = results.get(f"{i}.{j}")
+                if result is None:
+                    continue
+                if isinstance(result, Exception):
+                    # Igual que en get_items: si falla una página, falla la consulta entera
+                    crawl.error = result
+                    crawl.finished = True
+                    break
+                first_page = cursor is crawl.head and cursor.pages == 0
+                crawl.read(cursor, result)
+                if first_page and not cursor.done:
+                    self._partition(crawl, result)
+                elif cursor.done and cursor is not crawl.head and crawl.active < len(crawl.windows):
+                    crawl.active += 1
+            if not crawl.finished:
+                crawl.settle()
+            if crawl.finished and crawl.error is None:
+                print(f"✅ {crawl.request.source_name}: {len(crawl.items())} recuperados")
+
+    def _partition(self, crawl: _Crawl, data: dict) -> None:
+        if not self._partitionable(crawl):
+            return
+        request = crawl.request
+        lower = request.min_date_threshold or self.oldest.get(self._oldest_key(crawl))
+        budget = request.max_items - len(crawl.head.items)
+        windows = self.planner.plan(request.list_id, data["value"], lower, budget)
+        if not windows:
+            return
+        if self.on_partition:
+            self.on_partition()
+        print(f"🧩 [{request.source_name}] Descargando el resto en {len(windows)} ventanas de Created ({self.concurrency} a la vez)")
+        crawl.head.url = None
+        crawl.head.done = True
+        crawl.skip = boundary_ids(data["value"], windows[0])
+        crawl.windows = [
+            _Cursor(build_items_url(request.list_id, w.filter(request.filter_query), request.select_query, request.orderby_query),
+                    budget, window=w)
+            for w in windows
+        ]
+        crawl.active = initial_launches(windows, budget, self.concurrency)
+
+    def results(self) -> List[Union[List[SharePointItem], Exception]]:
+        return [crawl.error if crawl.error is not None else crawl.items() for crawl in self.crawls]
+
+
+def run_batches(session, headers: dict, crawl: BatchCrawl) -> List[Union[List[SharePointItem], Exception]]:
+    while not crawl.done:
+        urls = crawl.next_requests()
+        if not urls:
+            break
+        print(f"📦 $batch ronda {crawl.rounds}: {len(urls)} páginas en {-(-len(urls) // GRAPH_BATCH_SIZE)} requests")
+        crawl.feed(send_batch(session, headers, urls))
+    return crawl.results()
+
+
+async def run_batches_async(session, headers: dict, crawl: BatchCrawl) -> List[Union[List[SharePointItem], Exception]]:
+    while not crawl.done:
+        urls = crawl.next_requests()
+        if not urls:
+            break
+        print(f"📦 $batch ronda {crawl.rounds}: {len(urls)} páginas en {-(-len(urls) // GRAPH_BATCH_SIZE)} requests")
+        crawl.feed(await send_batch_async(session, headers, urls))
+    return crawl.results()
@@ -0,0 +1,133 @@
+import os
+import time
+from typing import List, Optional
+from dotenv import load_dotenv
+
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.metrics import metrics, timed
+from domain.ports.sharepoint_reader import ItemFilter, ListColumn
+from infrastructure.http.graph_session import GRAPH_BASE_URL
+
+load_dotenv()
+
+# Una línea por página descargada; con las métricas (/metrics) se puede apagar y sacar el print del hot path
+GRAPH_LOG_PAGES = os.getenv("GRAPH_LOG_PAGES", "true").lower() != "false"
+
+
+def build_items_url(list_id: str, filter_query: str = "", select_query: str = "", orderby_query: str = "", top: int = 999) -> str:
+    site_id = os.getenv("SP_SITE_ID")
+
+    url = (
+        f"{GRAPH_BASE_URL}/"
+        f"sites/{site_id}/lists/{list_id}/items"
+        f"?expand=fields"
+    )
+
+    if select_query:
+        url += f"($select={select_query})"
+
+    # OData $orderby debe ir antes de $top o filtros para ser limpio, pero en Graph el orden es laxo.
+    if orderby_query:
+        url += f"&$orderby={orderby_query}"
+
+    url += f"&$top={top}"
+
+    if filter_query:
+        url += f"&$filter={filter_query}"
+    return url
+
+
+def build_delta_url(list_id: str, select_query: str = "") -> str:
+    site_id = os.getenv("SP_SITE_ID")
+    url = f"{GRAPH_BASE_URL}/sites/{site_id}/lists/{list_id}/items/delta?expand=fields"
+    if select_query:
+        url += f"($select={select_query})"
+    return url
+
+
+def build_columns_url(list_id: str) -> str:
+    site_id = os.getenv("SP_SITE_ID")
+    return f"{GRAPH_BASE_URL}/sites/{site_id}/lists/{list_id}/columns?$select=name,indexed,readOnly,text,choice,number,dateTime,boolean,lookup,personOrGroup"
+
+
+# Facetas de columnDefinition que indican el tipo (Graph manda solo la que corresponde)
+COLUMN_KINDS = ("text", "choice", "number", "dateTime", "boolean", "lookup", "personOrGroup")
+
+
+def parse_columns(data: dict) -> List[ListColumn]:
+    return [
+        ListColumn(
+            name=column["name"],
+            indexed=bool(column.get("indexed")),
+            kind=next((kind for kind in COLUMN_KINDS if kind in column), ""),
+            read_only=bool(column.get("readOnly")),
+        )
+        for column in data.get("value", [])
+        if column.get("name")
+    ]
+
+
+def graph_headers(token: str) -> dict:
+    return {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/json",
+        "Prefer": "HonorNonIndexedQueriesWarningMayFailOverTime" # Útil para listas grandes si no hay índices
+    }
+
+
+def decode_json(response) -> dict:
+    with timed("graph_json_decode_seconds"):
+        return response.json()
+
+
+def parse_items_page(
+    data: dict,
+    source_name: str,
+    items: List[SharePointItem],
+    max_items: int,
+    min_date_threshold: str = None,
+    keep_fields: Optional[frozenset] = None,
+    item_filter: Optional[ItemFilter] = None
+) -> bool:
+    """
+    Agrega a `items` los elementos de una página de Graph (solo con `keep_fields`, si se indica).
+    Con `item_filter`, los que no lo cumplen se descartan sin contar para el límite.
+    Devuelve True si hay que dejar de paginar (umbral de fecha o límite alcanzado).
+    """
+    started, before = time.perf_counter(), len(items)
+    try:
+        return _parse_items(data, source_name, items, max_items, min_date_threshold, keep_fields, item_filter)
+    finally:
+        recorder = metrics()
+        recorder.observe("graph_page_parse_seconds", time.perf_counter() - started)
+        recorder.observe("graph_page_items", len(items) - before)
+
+
+def _parse_items(data, source_name, items, max_items, min_date_threshold, keep_fields, item_filter) -> bool:
+    for item in data["value"]:
+        fields = item["fields"]
+
+        # Chequeo de Fecha Inteligente (Optimización de Fetch)
+        # Si ya estamos viendo items más viejos que el umbral, paramos TODO.
+        # Requiere que la lista venga ordenada "Created desc".
+        if min_date_threshold:
+            created_val = fields.get("Created") # e.g. 2023-04-20T12:59:37Z
+            if created_val and created_val < min_date_threshold:
+                print(f"🛑 Umbral de fecha alcanzado ({min_date_threshold}). Deteniendo descarga en {created_val}.")
+                return True
+
+        parsed = SharePointItem(
+            id=item["id"],
+            title=str(fields.get("Title", "")).strip(),
+            raw_fields=fields,
+            source_list=source_name,
+            keep_fields=keep_fields
+        )
+        if item_filter is not None and not item_filter(parsed):
+            continue
+        items.append(parsed)
+
+        if len(items) >= max_items:
+            print(f"🛑 Límite de {max_items} alcanzado.")
+            return True
+    return False
@@ -1,94 +1,172 @@
-import os
 import requests
-from typing import List
+from typing import Iterator, List, Optional, Union
 from dotenv import load_dotenv
 
-from domain.entities.sharepoint_item import SharePointItem
-from domain.ports.sharepoint_reader import SharePointReader
+from domain.entities.sharepoint_item import SharePointItem, select_fields
+from domain.ports.sharepoint_reader import (
+    DeltaResult, DeltaTokenExpiredError, ItemFilter, ItemsRequest, ListColumn, QueryRejectedError, SharePointReader
+)
 from infrastructure.auth.graph_auth import get_access_token
+from infrastructure.http.graph_session import get_session
+from infrastructure.sharepoint.graph_batch import GRAPH_BATCH, BatchCrawl, run_batches
+from infrastructure.sharepoint.graph_items import (
+    GRAPH_LOG_PAGES, build_columns_url, build_delta_url, build_items_url, decode_json, graph_headers, parse_columns, parse_items_page
+)
 
 load_dotenv()
 
+
 class GraphSharePointReader(SharePointReader):
+    supports_batch = GRAPH_BATCH
+
+    def __init__(self, session=None):
+        # Transporte compartido (keep-alive + pool) salvo que se inyecte otro
+        self.session = session or get_session()
+        self.batch_rounds = 0
+        self.batch_pages = 0
 
     def get_items(
-        self, 
-        list_id: str, 
-        source_name: str, 
-        filter_query: str = "", 
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
         select_query: str = "",
-        orderby_query: str = "", 
+        orderby_query: str = "",
         max_items: int = 1000,
-        min_date_threshold: str = None
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
     ) -> List[SharePointItem]:
-        token = get_access_token()
-        site_id = os.getenv("SP_SITE_ID")
+        items = []
+        for page in self.iter_pages(
+            list_id, source_name, filter_query, select_query, orderby_query, max_items, min_date_threshold, item_filter
+        ):
+            items.extend(page)
+        print(f"✅ {source_name}: {len(items)} recuperados")
+        return items
 
-        url = (
-            f"https://graph.microsoft.com/v1.0/"
-            f"sites/{site_id}/lists/{list_id}/items"
-            f"?expand=fields"
+    def iter_pages(
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
+    ) -> Iterator[List[SharePointItem]]:
+        url = build_items_url(list_id, filter_query, select_query, orderby_query)
+        yield from self._pages(
+            url, graph_headers(get_access_token()), source_name, max_items, min_date_threshold, select_fields(select_query), item_filter
         )
 
-        if select_query:
-            url += f"($select={select_query})"
-        
-        # OData $orderby debe ir antes de $top o filtros para ser limpio, pero en Graph el orden es laxo.
-        if orderby_query:
-            url += f"&$orderby={orderby_query}"
-        
-        url += "&$top=999"
+    def get_items_many(self, requests: List[ItemsRequest]) -> List[Union[List[SharePointItem], Exception]]:
+        """Las consultas avanzan juntas: cada ronda pide la página siguiente de todas en un $batch."""
+        crawl = BatchCrawl(requests, **self._crawl_options())
+        results = run_batches(self.session, graph_headers(get_access_token()), crawl)
+        self.batch_rounds += crawl.rounds
+        self.batch_pages += crawl.sub_requests
+        return results
 
-        if filter_query:
-            url += f"&$filter={filter_query}"
+    def get_columns(self, list_id: str) -> List[ListColumn]:
+        headers = graph_headers(get_access_token())
+        columns, url = [], build_columns_url(list_id)
+        while url:
+            data = self._get_page(url, headers, f"columnas de {list_id}", 1)
+            columns.extend(parse_columns(data))
+            url = data.get("@odata.nextLink")
+        return columns
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/json",
-            "Prefer": "HonorNonIndexedQueriesWarningMayFailOverTime" # Útil para listas grandes si no hay índices
-        }
+    def _crawl_options(self) -> dict:
+        return {}
 
-        items = []
+    def stats(self) -> dict:
+        return {"batch": {"enabled": self.supports_batch, "rounds": self.batch_rounds, "pages": self.batch_pages}}
+
+    def _get_page(self, url: str, headers: dict, source_name: str, page_count: int) -> dict:
+        if GRAPH_LOG_PAGES:
+            print(f"📄 [{source_name}] Cargando página {page_count}...")
+        try:
+            response = self.session.get(url, headers=headers, timeout=30)
+            response.raise_for_status()
+            return decode_json(response)
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Error en {source_name} (página {page_count}): {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"🔍 Detalle del error: {e.response.text}")
+                if e.response.status_code == 400:
+                    raise QueryRejectedError(f"{source_name}: {e}") from e
+            raise e # Re-lanzar para que el UseCase lo maneje
+
+    def _pages(
+        self,
+        url: str,
+        headers: dict,
+        source_name: str,
+        max_items: int,
+        min_date_threshold: Optional[str],
+        keep_fields: Optional[frozenset],
+        item_filter: Optional[ItemFilter] = None
+    ) -> Iterator[List[SharePointItem]]:
+        """Sigue @odata.nextLink desde `url` hasta el límite, el umbral de fecha o la última página."""
+        emitted = 0
+        page_count = 0
+        while url:
+            page_count += 1
+            data = self._get_page(url, headers, source_name, page_count)
+            page = []
+            stop = parse_items_page(data, source_name, page, max_items - emitted, min_date_threshold, keep_fields, item_filter)
+            emitted += len(page)
+            if page:
+                yield page
+            if stop:
+                return
+            url = data.get("@odata.nextLink")
+
+    def get_delta(
+        self,
+        list_id: str,
+        source_name: str,
+        select_query: str = "",
+        delta_link: Optional[str] = None
+    ) -> DeltaResult:
+        token = get_access_token()
+        url = delta_link or build_delta_url(list_id, select_query)
+        headers = graph_headers(token)
+        keep_fields = select_fields(select_query)
+
+        result = DeltaResult()
         page_count = 0
         while url:
             page_count += 1
-            print(f"📄 [{source_name}] Cargando página {page_count}...")
             try:
-                response = requests.get(url, headers=headers, timeout=30)
+                response = self.session.get(url, headers=headers, timeout=30)
+                if response.status_code == 410:
+                    raise DeltaTokenExpiredError(f"{source_name}: token delta expirado")
                 response.raise_for_status()
-                data = response.json()
-
-                for item in data["value"]:
-                    fields = item["fields"]
-                    
-                    # Chequeo de Fecha Inteligente (Optimización de Fetch)
-                    # Si ya estamos viendo items más viejos que el umbral, paramos TODO.
-                    # Requiere que la lista venga ordenada "Created desc".
-                    if min_date_threshold:
-                        created_val = fields.get("Created") # e.g. 2023-04-20T12:59:37Z
-                        if created_val and created_val < min_date_threshold:
-                            print(f"🛑 Umbral de fecha alcanzado ({min_date_threshold}). Deteniendo descarga en {created_val}.")
-                            return items
-
-                    items.append(
-                        SharePointItem(
-                            id=item["id"],
-                            title=str(fields.get("Title", "")).strip(),
-                            raw_fields=fields,
-                            source_list=source_name
-                        )
+                data = decode_json(response)
+            except requests.exceptions.RequestException as e:
+                print(f"❌ Error delta en {source_name} (página {page_count}): {e}")
+                raise
+
+            for item in data["value"]:
+                if "deleted" in item:
+                    result.deleted_ids.append(item["id"])
+                    continue
+                fields = item.get("fields", {})
+                result.items.append(
+                    SharePointItem(
+                        id=item["id"],
+                        title=str(fields.get("Title", "")).strip(),
+                        raw_fields=fields,
+                        source_list=source_name,
+                        keep_fields=keep_fields
                     )
-                    
-                    if len(items) >= max_items:
-                        print(f"🛑 Límite de {max_items} alcanzado.")
-                        return items
+                )
 
-                url = data.get("@odata.nextLink")
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Error en {source_name} (página {page_count}): {e}")
-                if hasattr(e, 'response') and e.response is not None:
-                    print(f"🔍 Detalle del error: {e.response.text}")
-                raise e # Re-lanzar para que el UseCase lo maneje
+            url = data.get("@odata.nextLink")
+            if not url:
+                result.delta_link = data.get("@odata.deltaLink")
 
-        print(f"✅ {source_name}: {len(items)} recuperados")
-        return items
+        print(f"🔁 {source_name}: delta con {len(result.items)} cambios y {len(result.deleted_ids)} borrados ({page_count} páginas)")
+        return result
@@ -0,0 +1,248 @@
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from domain.entities.sharepoint_item import SharePointItem, select_fields
+from domain.ports.sharepoint_reader import ItemFilter
+from infrastructure.auth.graph_auth import get_access_token, get_access_token_async
+from infrastructure.sharepoint.async_graph_sharepoint_reader import AsyncGraphSharePointReader
+from infrastructure.sharepoint.crawl_plan import (
+    CRAWL_CONCURRENCY, CREATED_DESC, CrawlPlanner, Window, boundary_ids, initial_launches, trim_window_items
+)
+from infrastructure.sharepoint.graph_items import build_items_url, graph_headers, parse_items_page
+from infrastructure.sharepoint.graph_sharepoint_reader import GraphSharePointReader
+
+
+class PartitionedGraphSharePointReader(AsyncGraphSharePointReader):
+    """
+    Reader async que, en descargas grandes ordenadas por Created desc, parte el
+    resto de la lista en ventanas de Created y las baja en paralelo (hasta
+    `concurrency` a la vez) en vez de seguir un nextLink por vez.
+
+    La primera página se pide igual que siempre: si alcanza (o corta por límite o
+    umbral) no hay nada que partir. Las ventanas se entregan de la más nueva a la
+    más vieja, así que el orden es el mismo que el serial, y se lanzan de a poco:
+    al llegar a `max_items` se cancelan las que faltan. El umbral de fecha es el
+    borde inferior de la última ventana.
+    """
+
+    def __init__(self, session=None, concurrency: int = CRAWL_CONCURRENCY, planner: Optional[CrawlPlanner] = None):
+        super().__init__(session)
+        self.concurrency = max(1, concurrency)
+        self.planner = planner or CrawlPlanner()
+        self._oldest: Dict[tuple, str] = {}
+        self.partitioned = 0
+
+    async def iter_pages(
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
+    ) -> AsyncIterator[List[SharePointItem]]:
+        headers = graph_headers(await get_access_token_async())
+        keep_fields = select_fields(select_query)
+        data = await self._get_page(build_items_url(list_id, filter_query, select_query, orderby_query), headers, source_name, 1)
+        page = []
+        stop = parse_items_page(data, source_name, page, max_items, min_date_threshold, keep_fields, item_filter)
+        if page:
+            yield page
+        next_link = data.get("@odata.nextLink")
+        if stop or not next_link:
+            return
+        emitted = len(page)
+
+        windows = None
+        if orderby_query == CREATED_DESC:
+            lower = min_date_threshold or await self._oldest_created(list_id, filter_query, headers, source_name)
+            windows = self.planner.plan(list_id, data["value"], lower, max_items - emitted)
+        if not windows:
+            async for page in self._pages(next_link, headers, source_name, max_items - emitted, min_date_threshold, keep_fields, item_filter):
+                yield page
+            return
+
+        self.partitioned += 1
+        print(f"🧩 [{source_name}] Descargando el resto en {len(windows)} ventanas de Created ({self.concurrency} a la vez)")
+        budget = max_items - emitted
+        skip = boundary_ids(data["value"], windows[0])
+
+        async def crawl(window: Window) -> List[SharePointItem]:
+            url = build_items_url(list_id, window.filter(filter_query), select_query, orderby_query)
+            items = []
+            async for part in self._pages(url, headers, source_name, budget, min_date_threshold, keep_fields, item_filter):
+                items.extend(part)
+            return items
+
+        pending = iter(windows)
+        running = deque()
+
+        def launch() -> None:
+            window = next(pending, None)
+            if window is not None:
+                running.append(asyncio.ensure_future(crawl(window)))
+
+        for _ in range(initial_launches(windows, budget, self.concurrency)):
+            launch()
+        try:
+            while running:
+                items = await running.popleft()
+                launch()
+                items = trim_window_items(items, skip, max_items - emitted)
+                skip = set()
+                if items:
+                    emitted += len(items)
+                    yield items
+                if emitted >= max_items:
+                    print(f"🛑 Límite de {max_items} alcanzado.")
+                    return
+        finally:
+            for task in running:
+                task.cancel()
+
+    def _crawl_options(self) -> dict:
+        # get_items_many parte igual que iter_pages y comparte la caché del item más viejo
+        return {"planner": self.planner, "concurrency": self.concurrency, "oldest": self._oldest, "on_partition": self._partitioned}
+
+    def _partitioned(self) -> None:
+        self.partitioned += 1
+
+    async def _oldest_created(self, list_id: str, filter_query: str, headers: dict, source_name: str) -> Optional[str]:
+        """Created del item más viejo que cumple el filtro (una vez por lista y filtro)."""
+        key = (list_id, filter_query)
+        if key not in self._oldest:
+            url = build_items_url(list_id, filter_query, "Created", "fields/Created asc", top=1)
+            try:
+                data = await self._get_page(url, headers, source_name, 0)
+            except Exception as e:
+                print(f"⚠️ [{source_name}] No se pudo ubicar el item más viejo ({e}). Se sigue página a página")
+                return None
+            value = data.get("value") or []
+            self._oldest[key] = value[0]["fields"].get("Created") if value else None
+        return self._oldest[key]
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "partitioned_fetches": self.partitioned,
+            "lists": self.planner.stats(),
+            **super().stats(),
+        }
+
+
+class PartitionedSyncGraphSharePointReader(GraphSharePointReader):
+    """La misma estrategia que PartitionedGraphSharePointReader para el reader síncrono (CLI del reporte), con hilos."""
+
+    def __init__(self, session=None, concurrency: int = CRAWL_CONCURRENCY, planner: Optional[CrawlPlanner] = None):
+        super().__init__(session)
+        self.concurrency = max(1, concurrency)
+        self.planner = planner or CrawlPlanner()
+        self._oldest: Dict[tuple, str] = {}
+        self.partitioned = 0
+
+    def iter_pages(
+        self,
+        list_id: str,
+        source_name: str,
+        filter_query: str = "",
+        select_query: str = "",
+        orderby_query: str = "",
+        max_items: int = 1000,
+        min_date_threshold: str = None,
+        item_filter: Optional[ItemFilter] = None
+    ) -> Iterator[List[SharePointItem]]:
+        headers = graph_headers(get_access_token())
+        keep_fields = select_fields(select_query)
+        data = self._get_page(build_items_url(list_id, filter_query, select_query, orderby_query), headers, source_name, 1)
+        page = []
+        stop = parse_items_page(data, source_name, page, max_items, min_date_threshold, keep_fields, item_filter)
+        if page:
+            yield page
+        next_link = data.get("@odata.nextLink")
+        if stop or not next_link:
+            return
+        emitted = len(page)
+
+        windows = None
+        if orderby_query == CREATED_DESC:
+            lower = min_date_threshold or self._oldest_created(list_id, filter_query, headers, source_name)
+            windows = self.planner.plan(list_id, data["value"], lower, max_items - emitted)
+        if not windows:
+            yield from self._pages(next_link, headers, source_name, max_items - emitted, min_date_threshold, keep_fields, item_filter)
+            return
+
+        self.partitioned += 1
+        print(f"🧩 [{source_name}] Descargando el resto en {len(windows)} ventanas de Created ({self.concurrency} a la vez)")
+        budget = max_items - emitted
+        skip = boundary_ids(data["value"], windows[0])
+        cancelled = threading.Event()
+
+        def crawl(window: Window) -> List[SharePointItem]:
+            url = build_items_url(list_id, window.filter(filter_query), select_query, orderby_query)
+            items = []
+            for part in self._pages(url, headers, source_name, budget, min_date_threshold, keep_fields, item_filter):
+                if cancelled.is_set():
+                    break
+                items.extend(part)
+            return items
+
+        pending = iter(windows)
+        running = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+
+            def launch() -> None:
+                window = next(pending, None)
+                if window is not None:
+                    running.append(pool.submit(crawl, window))
+
+            for _ in range(initial_launches(windows, budget, self.concurrency)):
+                launch()
+            try:
+                while running:
+                    items = running.popleft().result()
+                    launch()
+                    items = trim_window_items(items, skip, max_items - emitted)
+                    skip = set()
+                    if items:
+                        emitted += len(items)
+                        yield items
+                    if emitted >= max_items:
+                        print(f"🛑 Límite de {max_items} alcanzado.")
+                        return
+            finally:
+                # Las que no arrancaron no arrancan; las que están bajando cortan en la próxima página
+                cancelled.set()
+                for future in running:
+                    future.cancel()
+
+    def _crawl_options(self) -> dict:
+        return {"planner": self.planner, "concurrency": self.concurrency, "oldest": self._oldest, "on_partition": self._partitioned}
+
+    def _partitioned(self) -> None:
+        self.partitioned += 1
+
+    def _oldest_created(self, list_id: str, filter_query: str, headers: dict, source_name: str) -> Optional[str]:
+        key = (list_id, filter_query)
+        if key not in self._oldest:
+            url = build_items_url(list_id, filter_query, "Created", "fields/Created asc", top=1)
+            try:
+                data = self._get_page(url, headers, source_name, 0)
+            except Exception as e:
+                print(f"⚠️ [{source_name}] No se pudo ubicar el item más viejo ({e}). Se sigue página a página")
+                return None
+            value = data.get("value") or []
+            self._oldest[key] = value[0]["fields"].get("Created") if value else None
+        return self._oldest[key]
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "partitioned_fetches": self.partitioned,
+            "lists": self.planner.stats(),
+            **super().stats(),
+        }
@@ -0,0 +1,27 @@
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from domain.ports.item_store import ItemStore
+
+load_dotenv()
+
+
+def create_item_store() -> Optional[ItemStore]:
+    """
+    Crea la réplica local según ITEM_STORE:
+      - vacío: sin réplica, cada consulta va directo a Graph
+      - "memory": réplica en memoria sincronizada por delta
+      - "sqlite": réplica persistente con índices en ITEM_STORE_PATH
+    """
+    kind = (os.getenv("ITEM_STORE") or "").strip().lower()
+    if not kind:
+        return None
+    if kind == "memory":
+        from infrastructure.storage.memory_item_store import InMemoryItemStore
+        return InMemoryItemStore()
+    if kind == "sqlite":
+        from infrastructure.storage.sqlite_item_store import SqliteItemStore
+        return SqliteItemStore(os.getenv("ITEM_STORE_PATH", "data/items.sqlite3"))
+    raise ValueError(f"ITEM_STORE desconocido: {kind}")
@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.item_store import ItemStore
+
+
+def matches_status(item: SharePointItem, status: Optional[str]) -> bool:
+    if status == "pendiente":
+        return item.es_pendiente()
+    if status in ("procesado", "procesados"):
+        return item.es_procesado()
+    return True
+
+
+class InMemoryItemStore(ItemStore):
+    """Réplica en memoria del proceso. Se pierde al reiniciar."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Dict[str, Dict[str, SharePointItem]] = {}
+        # Tombstones: {source_list: {item_id: borrado_en}}
+        self._tombstones: Dict[str, Dict[str, float]] = {}
+        self._delta_links: Dict[str, Optional[str]] = {}
+
+    def apply_changes(self, source_list: str, upserts: List[SharePointItem], deleted_ids: List[str]) -> None:
+        now = time.time()
+        with self._lock:
+            items = self._items.setdefault(source_list, {})
+            tombstones = self._tombstones.setdefault(source_list, {})
+            for item in upserts:
+                items[item.id] = item
+                tombstones.pop(item.id, None)
+            for item_id in deleted_ids:
+                items.pop(item_id, None)
+                tombstones[item_id] = now
+
+    def replace_all(self, source_list: str, items: List[SharePointItem]) -> None:
+        with self._lock:
+            self._items[source_list] = {item.id: item for item in items}
+            self._tombstones[source_list] = {}
+
+    def query(
+        self,
+        source_list: str,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        limit: Optional[int] = None,
+        in_scope_only: bool = True
+    ) -> List[SharePointItem]:
+        lower = f"{from_date}T00:00:00Z" if from_date else None
+        upper = f"{to_date}T23:59:59Z" if to_date else None
+        with self._lock:
+            candidates = list(self._items.get(source_list, {}).values())
+
+        result = []
+        for item in candidates:
+            created = item.raw_fields.get("Created") or ""
+            if lower and created < lower:
+                continue
+            if upper and created > upper:
+                continue
+            if in_scope_only and not item.en_alcance:
+                continue
+            result.append(item)
+        result.sort(key=lambda i: (i.raw_fields.get("Created") or "", i.id), reverse=True)
+        # Primero los `limit` más nuevos (lo que trae Graph) y recién ahí el estado
+        if limit:
+            result = result[:limit]
+        return [item for item in result if matches_status(item, status)]
+
+    def get_delta_link(self, list_id: str) -> Optional[str]:
+        return self._delta_links.get(list_id)
+
+    def set_delta_link(self, list_id: str, delta_link: Optional[str]) -> None:
+        self._delta_links[list_id] = delta_link
+
+    def count(self, source_list: str) -> int:
+        return len(self._items.get(source_list, {}))
@@ -0,0 +1,172 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.item_store import ItemStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    source_list  TEXT NOT NULL,
+    item_id      TEXT NOT NULL,
+    title        TEXT,
+    status       TEXT NOT NULL,          -- 'pendiente' | 'procesado' | ''
+    in_scope     INTEGER NOT NULL,
+    created      TEXT,
+    modified     TEXT,
+    phone_number TEXT,
+    fields       TEXT NOT NULL,          -- JSON con los campos de Graph
+    deleted_at   REAL,                   -- tombstone (NULL = vivo)
+    PRIMARY KEY (source_list, item_id)
+);
+CREATE INDEX IF NOT EXISTS ix_items_status_created
+    ON items (source_list, in_scope, status, created, item_id) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS ix_items_created
+    ON items (source_list, in_scope, created, item_id) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS ix_items_modified ON items (source_list, modified);
+CREATE INDEX IF NOT EXISTS ix_items_phone ON items (phone_number);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    list_id    TEXT PRIMARY KEY,
+    delta_link TEXT,
+    synced_at  REAL
+);
+"""
+
+
+def derive_status(item: SharePointItem) -> str:
+    if item.es_pendiente():
+        return "pendiente"
+    if item.es_procesado():
+        return "procesado"
+    return ""
+
+
+class SqliteItemStore(ItemStore):
+    """
+    Réplica persistente en SQLite. Sobrevive reinicios y responde consultas por
+    lista, estado y rango de Created con índices en lugar de recorrer todo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por hilo: sqlite3 no comparte conexiones entre hilos
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(source_list: str, item: SharePointItem) -> tuple:
+        fields = item.raw_fields
+        return (
+            source_list, item.id, item.title, derive_status(item), int(item.en_alcance),
+            fields.get("Created"), fields.get("Modified"), item.phone_number,
+            json.dumps(fields, ensure_ascii=False),
+        )
+
+    def apply_changes(self, source_list: str, upserts: List[SharePointItem], deleted_ids: List[str]) -> None:
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.executemany(
+                """
+                INSERT INTO items (source_list, item_id, title, status, in_scope, created, modified, phone_number, fields, deleted_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+                ON CONFLICT (source_list, item_id) DO UPDATE SET
+                    title = excluded.title, status = excluded.status, in_scope = excluded.in_scope,
+                    created = excluded.created, modified = excluded.modified,
+                    phone_number = excluded.phone_number, fields = excluded.fields, deleted_at = NULL
+                """,
+                [self._row(source_list, item) for item in upserts],
+            )
+            now = time.time()
+            conn.executemany(
+                "UPDATE items SET deleted_at = ? WHERE source_list = ? AND item_id = ?",
+                [(now, source_list, item_id) for item_id in deleted_ids],
+            )
+
+    def replace_all(self, source_list: str, items: List[SharePointItem]) -> None:
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM items WHERE source_list = ?", (source_list,))
+            conn.executemany(
+                """
+                INSERT INTO items (source_list, item_id, title, status, in_scope, created, modified, phone_number, fields, deleted_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+                """,
+                [self._row(source_list, item) for item in items],
+            )
+
+    def query(
+        self,
+        source_list: str,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        limit: Optional[int] = None,
+        in_scope_only: bool = True
+    ) -> List[SharePointItem]:
+        sql = ["SELECT item_id, title, fields, status, created FROM items WHERE source_list = ? AND deleted_at IS NULL"]
+        params = [source_list]
+        if in_scope_only:
+            sql.append("AND in_scope = 1")
+        if from_date:
+            sql.append("AND created >= ?")
+            params.append(f"{from_date}T00:00:00Z")
+        if to_date:
+            sql.append("AND created <= ?")
+            params.append(f"{to_date}T23:59:59Z")
+        sql.append("ORDER BY created DESC, item_id DESC")
+        if limit:
+            sql.append("LIMIT ?")
+            params.append(limit)
+        # Primero los `limit` más nuevos (lo que trae Graph) y recién ahí el estado
+        sql = ["SELECT item_id, title, fields FROM (", *sql, ")"]
+        if status == "pendiente":
+            sql.append("WHERE status = 'pendiente'")
+        elif status in ("procesado", "procesados"):
+            sql.append("WHERE status = 'procesado'")
+        sql.append("ORDER BY created DESC, item_id DESC")
+
+        rows = self._conn().execute(" ".join(sql), params).fetchall()
+        return [
+            SharePointItem(id=item_id, title=title or "", raw_fields=json.loads(fields), source_list=source_list)
+            for item_id, title, fields in rows
+        ]
+
+    def get_delta_link(self, list_id: str) -> Optional[str]:
+        row = self._conn().execute("SELECT delta_link FROM sync_state WHERE list_id = ?", (list_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_delta_link(self, list_id: str, delta_link: Optional[str]) -> None:
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute(
+                """
+                INSERT INTO sync_state (list_id, delta_link, synced_at) VALUES (?, ?, ?)
+                ON CONFLICT (list_id) DO UPDATE SET delta_link = excluded.delta_link, synced_at = excluded.synced_at
+                """,
+                (list_id, delta_link, time.time()),
+            )
+
+    def count(self, source_list: str) -> int:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM items WHERE source_list = ? AND deleted_at IS NULL", (source_list,)
+        ).fetchone()
+        return row[0]
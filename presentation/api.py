@@ -1,15 +1,44 @@
+import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import List, Optional
-from fastapi import FastAPI, Depends, Query, HTTPException, status
+from fastapi import FastAPI, Depends, Query, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import uvicorn
 
+# Desde acá se mide cuánto tarda la API en quedar lista para atender
+_BOOT_STARTED = time.perf_counter()
+
+from infrastructure.sharepoint.async_graph_sharepoint_reader import AsyncGraphSharePointReader
 from infrastructure.sharepoint.graph_sharepoint_reader import GraphSharePointReader
-from application.use_cases.get_filtered_items import GetFilteredItemsUseCase
+from infrastructure.sharepoint.factory import create_async_reader
+from infrastructure.storage.factory import create_item_store
+from infrastructure.cache.factory import create_cache_backend
+from infrastructure.cache.snapshot import CacheSnapshot
+from infrastructure.cache.plan_store import JsonPlanStore
+from infrastructure.metrics.prometheus_metrics import PrometheusMetrics, server_timing
+from application.services.cache_snapshotter import CacheSnapshotter
+from application.services.cache_warmer import CacheWarmer
+from application.services.query_plans import shared_plans
+from application.services.query_planner import shared_planner
+from application.services.replica_sync import ReplicaSync
+from application.services.report_jobs import PageCountingReader, ReportJobs, ReportQueueFullError
+from application.services.stats_index import StatsIndex
+from presentation.pagination import PaginationError, paginate, parse_sort
+from presentation.serializers import FORMATS, FastJSONResponse, ProjectionError, dumps, encode_items, item_to_dict, parse_fields
+from infrastructure.auth.graph_auth import token_provider
+from infrastructure.http.graph_session import get_session
+from infrastructure.http.resilience import tenant_guard
+from domain.ports.metrics import use_metrics
+from domain.ports.sharepoint_reader import SourceUnavailableError
+from application.use_cases.async_get_filtered_items import AsyncGetFilteredItemsUseCase
+from infrastructure.reports.streaming_report_writer import REPORT_FORMATS, StreamingReportWriter
 
 # Security Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "super-secret-key-for-dev")
@@ -22,7 +51,100 @@ DASHBOARD_PASSWORD = os.getenv("DASHBOARD_PASSWORD", "admin123")
 
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 
-app = FastAPI(title="SharePoint Reporting API")
+# Histogramas de latencia (token, páginas de Graph, decodificación, clasificación, serialización, caché) en /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+# Si se define, /metrics pide "Authorization: Bearer <token>" (el scraper de Prometheus lo soporta);
+# si no, pide el login del dashboard como el resto de la API
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Desglose de tiempos de cada request en el header Server-Timing (lo muestran las devtools del navegador).
+# Apagado por defecto: cuenta cuánto tarda cada etapa a cualquiera que haga un request
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+_metrics = PrometheusMetrics() if METRICS_ENABLED else None
+if _metrics is not None:
+    use_metrics(_metrics)
+
+# Un solo reader por proceso: comparte el pool de conexiones keep-alive.
+# Es asíncrono para que una descarga larga no congele /health ni /login.
+# Con GRAPH_CRAWLER=partitioned (por defecto) las descargas grandes se bajan por ventanas en paralelo.
+_reader = create_async_reader()
+
+# Caché de /items: con CACHE_BACKEND=disk o redis lo comparten todos los workers
+AsyncGetFilteredItemsUseCase.configure_cache(create_cache_backend())
+
+# Contadores de /stats: los alimenta la réplica (la lista completa y después cada delta).
+# Los rangos del caché no sirven: están cortados por `limit` y no se enteran de lo borrado
+_stats_index = StatsIndex()
+
+# Réplica local opcional (ITEM_STORE): /items lee de ahí y solo baja los cambios vía delta
+_store = create_item_store()
+_replica = ReplicaSync(GraphSharePointReader(), _store, stats_index=_stats_index) if _store is not None else None
+
+# Lo que pide el dashboard al abrir (sin fechas → límite 1000): se calienta al arrancar
+WARM_DATASETS = [(None, None, 1000)]
+CACHE_WARMING = os.getenv("CACHE_WARMING", "true").lower() != "false"
+
+_warmer = CacheWarmer(lambda: AsyncGetFilteredItemsUseCase(_reader), replica=_replica, startup_datasets=WARM_DATASETS)
+
+# Snapshot del caché para arrancar en caliente tras un redeploy (vacío = desactivado)
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "data/cache-snapshot.bin")
+_snapshotter = (
+    CacheSnapshotter(AsyncGetFilteredItemsUseCase.shared_cache(), CacheSnapshot(CACHE_SNAPSHOT_PATH))
+    if CACHE_SNAPSHOT_PATH and _replica is None else None
+)
+_startup: dict = {}
+
+# Qué filtro acepta cada lista (la cascada T1 → T2 → T3 no se redescubre tras un reinicio; vacío = solo en memoria)
+QUERY_PLAN_PATH = os.getenv("QUERY_PLAN_PATH", "data/query-plans.json")
+if QUERY_PLAN_PATH:
+    shared_plans().use_store(JsonPlanStore(QUERY_PLAN_PATH))
+
+async def _load_report_items(params: dict, on_page) -> list:
+    # Mismo dataset que /items con esos filtros: si ya está en caché no se baja nada
+    use_case = AsyncGetFilteredItemsUseCase(PageCountingReader(_reader, on_page), replica=_replica)
+    return await use_case.execute(**params)
+
+def _report_data_token():
+    # Cambia cuando entra o se revalida algo en el caché, el índice o la réplica
+    replica = tuple(sorted(_replica.last_sync.items())) if _replica is not None else ()
+    return AsyncGetFilteredItemsUseCase.shared_cache().version, _stats_index.version, replica
+
+# Reportes en segundo plano (/reports)
+# /reports es una exportación de datos: el xlsx lleva también la hoja Detalle
+_reports = ReportJobs(
+    _load_report_items,
+    lambda path: StreamingReportWriter(path, include_rows=True),
+    data_token=_report_data_token
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El snapshot se carga antes de aceptar tráfico; lo vencido lo revalida el calentador después
+    if _snapshotter is not None:
+        await asyncio.to_thread(_snapshotter.load)
+    _startup["seconds"] = round(time.perf_counter() - _BOOT_STARTED, 3)
+    _startup["warm"] = bool(_snapshotter and _snapshotter.last_load.get("ranges"))
+    print(f"⚡ API lista en {_startup['seconds']}s ({'caché en caliente' if _startup['warm'] else 'caché en frío'})")
+
+    tasks = []
+    if CACHE_WARMING:
+        tasks.append(asyncio.create_task(_warmer.run()))
+    if _snapshotter is not None:
+        tasks.append(asyncio.create_task(_snapshotter.run()))
+    yield
+    for task in tasks:
+        task.cancel()
+    if _snapshotter is not None:
+        try:
+            await asyncio.to_thread(_snapshotter.save, True)
+        except Exception as e:
+            print(f"⚠️ Error guardando el snapshot de caché: {e}")
+    if QUERY_PLAN_PATH:
+        shared_plans().save()
+    _reports.shutdown()
+    await _reader.aclose()
+
+app = FastAPI(title="SharePoint Reporting API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +154,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_timings(request: Request, call_next):
+    if _metrics is None:
+        return await call_next(request)
+    started = time.perf_counter()
+    with _metrics.request_timings() as timings:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    # La ruta declarada (/reports/{job_id}), no la URL: así la cantidad de series no crece con los ids
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    _metrics.observe("http_request_duration_seconds", elapsed, {"route": route, "method": request.method, "status": str(response.status_code)})
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing(timings, elapsed)
+    return response
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
@@ -68,17 +205,75 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     return {"access_token": access_token, "token_type": "bearer"}
 
 def get_reader():
-    return GraphSharePointReader()
+    return _reader
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _search_filter(items, search: Optional[str]):
+    if not search:
+        return items
+    term = search.lower()
+    return [i for i in items if term in i.title.lower() or term in i.id.lower()]
+
+def _data_age_headers(use_case: AsyncGetFilteredItemsUseCase) -> dict:
+    # X-Cache: hit | stale | miss | replica | degraded. X-Data-Age: segundos desde que se bajó el dato más viejo servido
+    if use_case.cache_status is None:
+        return {}
+    return {"X-Cache": use_case.cache_status, "X-Data-Age": str(int(use_case.data_age or 0))}
+
+async def _ndjson_response(pages, search: Optional[str], keys: List[str], headers_for) -> StreamingResponse:
+    """
+    Una línea JSON por item, escrita a medida que llegan las páginas de Graph.
+    La primera página se pide antes de responder para que un fallo total siga
+    siendo un 500; un fallo a mitad de camino se informa como línea {"error": ...}.
+    """
+    try:
+        first = await pages.__anext__()
+    except StopAsyncIteration:
+        first = []
+
+    async def body():
+        page = first
+        try:
+            while True:
+                for item in _search_filter(page, search):
+                    yield dumps(item_to_dict(item, keys)) + b"\n"
+                try:
+                    page = await pages.__anext__()
+                except StopAsyncIteration:
+                    return
+        except Exception as e:
+            print(f"🔥 Error en stream: {e}")
+            yield dumps({"error": str(e)}) + b"\n"
+        finally:
+            await pages.aclose()
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers=headers_for())
 
 @app.get("/items", dependencies=[Depends(get_current_user)])
 async def get_items(
+    request: Request,
     status: Optional[str] = Query(None, description="Filter by status: pendiente or procesado"),
     from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     limit: Optional[int] = Query(None, description="Max items to retrieve"),
     force_refresh: bool = Query(False, description="Ignore cache and force fetch"),
-    reader: GraphSharePointReader = Depends(get_reader)
+    page_size: Optional[int] = Query(None, ge=1, le=1000, description="Rows per page. If omitted, returns the full array"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor"),
+    sort: Optional[str] = Query(None, description="Sort key, prefix with '-' for descending (default -created)"),
+    search: Optional[str] = Query(None, description="Case-insensitive match on title or id"),
+    fields: Optional[str] = Query(None, description="Comma-separated keys to return (e.g. id,title,status,fields.eEstado). Default: all"),
+    format: str = Query("rows", description="rows (one object per item) or columnar (column arrays + dictionary-encoded strings)"),
+    reader: AsyncGraphSharePointReader = Depends(get_reader)
 ):
+    try:
+        parse_sort(sort)
+        keys = parse_fields(fields)
+    except (PaginationError, ProjectionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato desconocido '{format}'. Opciones: {', '.join(FORMATS)}")
+
     try:
         # Lógica de Límite Inteligente
         # Si el usuario NO especifica límite explicitamente:
@@ -88,8 +283,17 @@ async def get_items(
         if actual_limit is None:
             actual_limit = 50000 if from_date else 1000
 
-        use_case = GetFilteredItemsUseCase(reader)
-        items = use_case.execute(
+        use_case = AsyncGetFilteredItemsUseCase(reader, replica=_replica)
+
+        # Streaming (Accept: application/x-ndjson): sin paginar ni acumular el resultado
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            pages = use_case.stream(
+                status=status, from_date=from_date, to_date=to_date,
+                limit=actual_limit, force_refresh=force_refresh
+            )
+            return await _ndjson_response(pages, search, keys, lambda: _data_age_headers(use_case))
+
+        items = await use_case.execute(
             status=status, 
             from_date=from_date, 
             to_date=to_date, 
@@ -97,26 +301,160 @@ async def get_items(
             force_refresh=force_refresh
         )
         
-        return [
-            {
-                "id": item.id,
-                "title": item.title,
-                "list": item.source_list_display,
-                "created": item.fecha_creacion.isoformat() if item.fecha_creacion else None,
-                "status": "Pendiente" if item.es_pendiente() else "Procesado" if item.es_procesado() else "Desconocido",
-                "tipo_baja": item.tipo_baja_display,
-                "phone_number": item.phone_number,
-                "fields": item.raw_fields
-            } for item in items
-        ]
+        matched = _search_filter(items, search)
+
+        if page_size is None:
+            return FastJSONResponse(encode_items(matched, keys, format), headers=_data_age_headers(use_case))
+
+        # Paginación en el servidor: solo viajan las filas de la página
+        page = paginate(matched, page_size, sort=sort, cursor=cursor)
+        # Conteo por lista del resultado completo (antes de la búsqueda), para las tarjetas del dashboard
+        list_counts = {}
+        for item in items:
+            list_counts[item.source_list_display] = list_counts.get(item.source_list_display, 0) + 1
+        return FastJSONResponse({
+            "items": encode_items(page["items"], keys, format),
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+            "sort": page["sort"],
+            "page_size": page_size,
+            "list_counts": list_counts,
+        }, headers=_data_age_headers(use_case))
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SourceUnavailableError as e:
+        # Graph degradado y sin copia en caché para este pedido
+        print(f"🔌 Graph no disponible: {e}")
+        headers = {"Retry-After": str(max(1, int(e.retry_after)))} if e.retry_after else None
+        raise HTTPException(status_code=503, detail=str(e), headers=headers)
     except Exception as e:
         print(f"🔥 Error en API: {e}")
-        from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_day(value: Optional[str], name: str) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} debe tener formato YYYY-MM-DD")
+
+@app.get("/stats", dependencies=[Depends(get_current_user)])
+async def get_stats(
+    from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD) for series and totals"),
+    to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD) for series and totals"),
+    list_name: Optional[str] = Query(None, alias="list", description="Technical list name (gestion_baja, migracion_post_pre)"),
+):
+    """
+    Conteos por lista y estado, series diaria y mensual y backlog de pendientes,
+    desde el índice agregado: no recorre items ni consulta Graph. Requiere la
+    réplica local (ITEM_STORE), que es la que tiene las listas completas.
+    """
+    if _replica is None:
+        raise HTTPException(status_code=503, detail="/stats requiere la réplica local (ITEM_STORE)")
+    if not _replica.last_sync:
+        raise HTTPException(status_code=503, detail="La réplica todavía no terminó la primera sincronización", headers={"Retry-After": "30"})
+    summary = _stats_index.summary(_parse_day(from_date, "from_date"), _parse_day(to_date, "to_date"), list_name)
+    return FastJSONResponse(summary)
+
+REPORT_MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def _report_job(job_id: str):
+    job = _reports.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Reporte no encontrado")
+    return job
+
+def _report_body(job) -> dict:
+    return {**job.to_dict(), "download_url": f"/reports/{job.id}/download" if job.status == "done" else None}
+
+@app.post("/reports", status_code=202, dependencies=[Depends(get_current_user)])
+async def create_report(
+    format: str = Query("xlsx", description="xlsx, csv or parquet"),
+    status: Optional[str] = Query(None, description="Filter by status: pendiente or procesado"),
+    from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    limit: Optional[int] = Query(None, description="Max items to retrieve"),
+):
+    """
+    Encola un reporte y devuelve el trabajo (id y progreso) sin esperar a que termine.
+    Si los datos no cambiaron desde el último reporte igual, ese se devuelve ya terminado.
+    """
+    if format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato desconocido '{format}'. Opciones: {', '.join(REPORT_FORMATS)}")
+    params = {
+        "status": status,
+        "from_date": _parse_day(from_date, "from_date"),
+        "to_date": _parse_day(to_date, "to_date"),
+        # Mismo límite por defecto que /items
+        "limit": limit if limit is not None else (50000 if from_date else 1000),
+    }
+    try:
+        job = _reports.submit(format, params)
+    except ReportQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return _report_body(job)
+
+@app.get("/reports", dependencies=[Depends(get_current_user)])
+async def list_reports():
+    return {"jobs": [_report_body(job) for job in _reports.list()], **_reports.stats()}
+
+@app.get("/reports/{job_id}", dependencies=[Depends(get_current_user)])
+async def get_report(job_id: str):
+    return _report_body(_report_job(job_id))
+
+@app.get("/reports/{job_id}/download", dependencies=[Depends(get_current_user)])
+async def download_report(job_id: str):
+    job = _report_job(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"El reporte todavía no está listo ({job.status})")
+    if not os.path.exists(job.path):
+        raise HTTPException(status_code=410, detail="El archivo del reporte ya no existe, pedilo de nuevo")
+    return FileResponse(
+        job.path,
+        media_type=REPORT_MEDIA_TYPES[job.format],
+        filename=f"reporte_sharepoint.{job.format}",
+        headers={"X-Data-Version": job.data_version or ""}
+    )
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def prometheus_metrics(request: Request):
+    """Histogramas y contadores del proceso en formato de texto de Prometheus."""
+    if _metrics is None:
+        raise HTTPException(status_code=404, detail="Métricas desactivadas (METRICS_ENABLED=false)")
+    authorization = request.headers.get("authorization") or ""
+    if METRICS_TOKEN:
+        if authorization != f"Bearer {METRICS_TOKEN}":
+            raise HTTPException(status_code=401, detail="Token de métricas inválido", headers={"WWW-Authenticate": "Bearer"})
+    else:
+        await get_current_user(authorization[len("Bearer "):] if authorization.startswith("Bearer ") else "")
+    return Response(_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/transport-stats", dependencies=[Depends(get_current_user)])
+async def transport_stats():
+    return {
+        "http": get_session().stats(),
+        "http_async": _reader.session.stats(),
+        "token": token_provider.stats(),
+        "graph_guard": tenant_guard().stats(),
+        "crawler": _reader.stats() if hasattr(_reader, "stats") else None,
+        "items_cache": AsyncGetFilteredItemsUseCase.shared_cache().stats(),
+        "cache_warmer": _warmer.stats(),
+        "cache_snapshot": _snapshotter.stats() if _snapshotter is not None else None,
+        "startup": _startup,
+        "stats_index": _stats_index.stats(),
+        "query_plans": shared_plans().stats(),
+        "query_planner": shared_planner().stats(),
+        "reports": _reports.stats(),
+    }
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
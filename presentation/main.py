@@ -1,13 +1,40 @@
+import asyncio
+import os
 from application.use_cases.generate_report import GenerateReportUseCase
-from infrastructure.sharepoint.graph_sharepoint_reader import GraphSharePointReader
-from infrastructure.reports.excel_report_writer import ExcelReportWriter
+from infrastructure.sharepoint.factory import create_async_reader, create_reader
+from infrastructure.reports.streaming_report_writer import StreamingReportWriter
+from infrastructure.storage.factory import create_item_store
+from application.services.replica_sync import ReplicaSync
+from application.services.query_plans import shared_plans
+from infrastructure.cache.plan_store import JsonPlanStore
+
+async def run(use_case: GenerateReportUseCase, reader) -> None:
+    try:
+        await use_case.execute()
+    finally:
+        await reader.aclose()
 
 def main():
-    reader = GraphSharePointReader()
-    writer = ExcelReportWriter()
+    # Las listas se bajan con el reader async (en paralelo); la réplica sincroniza con el síncrono
+    async_reader = create_async_reader()
+    # La extensión elige el formato: .xlsx, .csv o .parquet. En xlsx, solo el Dashboard salvo REPORT_INCLUDE_ROWS=true
+    writer = StreamingReportWriter(
+        os.getenv("REPORT_PATH", "reporte_sharepoint_summary.xlsx"),
+        include_rows=os.getenv("REPORT_INCLUDE_ROWS", "false").lower() == "true"
+    )
+
+    store = create_item_store()
+    replica = ReplicaSync(create_reader(), store) if store is not None else None
+
+    # Los mismos planes que usa el API: si la lista rechaza el filtro optimizado, no se vuelve a intentar
+    plan_path = os.getenv("QUERY_PLAN_PATH", "data/query-plans.json")
+    if plan_path:
+        shared_plans().use_store(JsonPlanStore(plan_path))
 
-    use_case = GenerateReportUseCase(reader, writer)
-    use_case.execute()
+    use_case = GenerateReportUseCase(async_reader, writer, replica=replica)
+    asyncio.run(run(use_case, async_reader))
+    if plan_path:
+        shared_plans().save()
 
     print("✅ Reporte generado correctamente")
 
@@ -0,0 +1,101 @@
+import base64
+import bisect
+import json
+from typing import List, Optional, Tuple
+
+from domain.entities.sharepoint_item import SharePointItem
+from presentation.serializers import item_status
+
+# Columnas por las que se puede ordenar en el servidor (mismas claves que el JSON de /items)
+SORT_KEYS = {
+    "created": lambda item: item.raw_fields.get("Created") or "",
+    "id": lambda item: _natural(item.id),
+    "title": lambda item: item.title.lower(),
+    "list": lambda item: item.source_list_display,
+    "status": item_status,
+    "tipo_baja": lambda item: item.tipo_baja_display,
+    "phone_number": lambda item: _natural(item.phone_number),
+}
+
+DEFAULT_SORT = "-created"
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def _natural(value: str):
+    # Los IDs y teléfonos son numéricos: "10" va después de "9"
+    return (0, int(value), "") if value.isdigit() else (1, 0, value)
+
+
+def parse_sort(sort: Optional[str]) -> Tuple[str, bool]:
+    """'created' → ascendente, '-created' → descendente."""
+    sort = (sort or DEFAULT_SORT).strip()
+    descending = sort.startswith("-")
+    key = sort.lstrip("-+")
+    if key not in SORT_KEYS:
+        raise PaginationError(f"No se puede ordenar por '{key}'. Opciones: {', '.join(SORT_KEYS)}")
+    return key, descending
+
+
+def _row_key(item: SharePointItem, key: str) -> list:
+    # El desempate por (lista, id) hace que el orden sea total y estable entre páginas
+    return [SORT_KEYS[key](item), item.source_list, _natural(item.id)]
+
+
+def _to_jsonable(value):
+    return [_to_jsonable(v) for v in value] if isinstance(value, (list, tuple)) else value
+
+
+def _from_jsonable(value):
+    return tuple(_from_jsonable(v) for v in value) if isinstance(value, list) else value
+
+
+def encode_cursor(sort: str, row_key: list) -> str:
+    payload = json.dumps({"s": sort, "k": _to_jsonable(row_key)}, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        row_key = [_from_jsonable(v) for v in payload["k"]]
+    except Exception:
+        raise PaginationError("Cursor inválido")
+    if payload.get("s") != sort:
+        raise PaginationError("El cursor pertenece a otro orden")
+    return row_key
+
+
+def paginate(items: List[SharePointItem], page_size: int, sort: Optional[str] = None, cursor: Optional[str] = None) -> dict:
+    """
+    Paginación por keyset: el cursor guarda la clave de orden de la última fila
+    entregada, así que la página siguiente empieza justo después de ella aunque
+    el caché se haya recargado y hayan entrado o salido items.
+    """
+    key, descending = parse_sort(sort)
+    sort_spec = ("-" if descending else "") + key
+
+    keyed = sorted(((_row_key(item, key), item) for item in items), key=lambda pair: pair[0], reverse=descending)
+    keys = [pair[0] for pair in keyed]
+
+    start = 0
+    if cursor:
+        after = decode_cursor(cursor, sort_spec)
+        if descending:
+            # keys está en orden descendente: buscamos la primera clave < after
+            start = len(keys) - bisect.bisect_left(keys[::-1], after)
+        else:
+            start = bisect.bisect_right(keys, after)
+
+    page = keyed[start:start + page_size]
+    has_more = start + page_size < len(keyed)
+    next_cursor = encode_cursor(sort_spec, page[-1][0]) if page and has_more else None
+    return {
+        "items": [item for _, item in page],
+        "total": len(keyed),
+        "next_cursor": next_cursor,
+        "sort": sort_spec,
+    }
@@ -0,0 +1,131 @@
+import json
+from typing import Iterable, List, Optional
+
+from fastapi.responses import Response
+
+from domain.entities.sharepoint_item import SharePointItem
+from domain.ports.metrics import timed
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json de la librería estándar
+    orjson = None
+
+# Claves de cada fila de /items, en el orden en que se serializan
+ITEM_KEYS = ("id", "title", "list", "created", "status", "tipo_baja", "phone_number", "fields")
+
+# Columnas con pocos valores distintos que se repiten en cada fila: en formato
+# columnar viajan como índices a un diccionario de valores
+DICTIONARY_KEYS = ("list", "status", "tipo_baja")
+
+# Prefijo para pedir un campo concreto de SharePoint: fields=id,fields.eEstado
+RAW_FIELD_PREFIX = "fields."
+
+FORMATS = ("rows", "columnar")
+
+
+class ProjectionError(ValueError):
+    pass
+
+
+def item_status(item: SharePointItem) -> str:
+    return item.status
+
+
+def _created(item: SharePointItem):
+    fecha_creacion = item.fecha_creacion
+    return fecha_creacion.isoformat() if fecha_creacion else None
+
+
+_GETTERS = {
+    "id": lambda item: item.id,
+    "title": lambda item: item.title,
+    "list": lambda item: item.source_list_display,
+    "created": _created,
+    "status": item_status,
+    "tipo_baja": lambda item: item.tipo_baja_display,
+    "phone_number": lambda item: item.phone_number,
+    "fields": lambda item: item.raw_fields,
+}
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    'id,title,status' → solo esas claves. 'fields.eEstado' elige un campo de
+    SharePoint sin arrastrar todo raw_fields. Sin parámetro se devuelve la fila completa.
+    """
+    if not fields or not fields.strip():
+        return list(ITEM_KEYS)
+    keys = []
+    for key in (k.strip() for k in fields.split(",")):
+        if not key or key in keys:
+            continue
+        if key not in _GETTERS and not (key.startswith(RAW_FIELD_PREFIX) and len(key) > len(RAW_FIELD_PREFIX)):
+            raise ProjectionError(f"Campo desconocido '{key}'. Opciones: {', '.join(ITEM_KEYS)} o fields.<Campo>")
+        keys.append(key)
+    if not keys:
+        raise ProjectionError("El parámetro fields está vacío")
+    return keys
+
+
+def _getter(key: str):
+    if key in _GETTERS:
+        return _GETTERS[key]
+    raw_key = key[len(RAW_FIELD_PREFIX):]
+    return lambda item: item.raw_fields.get(raw_key)
+
+
+def item_to_dict(item: SharePointItem, keys: Optional[List[str]] = None) -> dict:
+    if keys is None:
+        return {key: _GETTERS[key](item) for key in ITEM_KEYS}
+    return {key: _getter(key)(item) for key in keys}
+
+
+def items_to_columns(items: Iterable[SharePointItem], keys: Optional[List[str]] = None) -> dict:
+    """
+    Formato columnar: un arreglo por clave en lugar de un objeto por fila, y las
+    columnas repetitivas (lista, estado, tipo de baja) codificadas como índices a
+    `dictionaries`. Para reconstruir la fila i: columns[k][i], o
+    dictionaries[k][columns[k][i]] si k está en dictionaries.
+    """
+    keys = list(keys or ITEM_KEYS)
+    getters = [_getter(key) for key in keys]
+    columns = {key: [] for key in keys}
+    dictionaries = {key: {} for key in keys if key in DICTIONARY_KEYS}
+    count = 0
+    for item in items:
+        count += 1
+        for key, getter in zip(keys, getters):
+            value = getter(item)
+            codes = dictionaries.get(key)
+            if codes is not None:
+                value = codes.setdefault(value, len(codes))
+            columns[key].append(value)
+    return {
+        "format": "columnar",
+        "count": count,
+        "columns": columns,
+        "dictionaries": {key: list(codes) for key, codes in dictionaries.items()},
+    }
+
+
+def encode_items(items: List[SharePointItem], keys: Optional[List[str]] = None, fmt: str = "rows"):
+    with timed("serialize_seconds", {"stage": fmt}):
+        if fmt == "columnar":
+            return items_to_columns(items, keys)
+        return [item_to_dict(item, keys) for item in items]
+
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """Respuesta JSON serializada con orjson (si está instalado), sin pasar por jsonable_encoder."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        with timed("serialize_seconds", {"stage": "json"}):
+            return dumps(content)
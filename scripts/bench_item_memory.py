@@ -0,0 +1,203 @@
+"""
+Compara la representación anterior de SharePointItem (dataclass que recalcula
+estado, tipo de baja, teléfono y fechas en cada acceso) con la actual (slots,
+valores derivados calculados al construir, strings internados y solo los campos
+del $select).
+
+Simula lo que hace el reader: páginas de Graph en JSON (con @odata.etag e id
+dentro de fields, como las devuelve Graph) decodificadas y convertidas a items.
+Mide la memoria retenida por item, el tiempo de ingesta, el de clasificar por
+estado y el de serializar /items.
+
+Uso:
+    python -m scripts.bench_item_memory --items 50000
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from application.use_cases.get_filtered_items import LIST1_SELECT, LIST2_SELECT
+from domain.entities.sharepoint_item import SharePointItem, select_fields
+from presentation.serializers import dumps, encode_items, parse_fields
+from scripts.fake_graph_server import make_list1_fields, make_list2_fields
+
+PAGE_SIZE = 999
+
+
+@dataclass
+class LegacySharePointItem:
+    """La entidad tal como estaba antes: todo se deriva de raw_fields en cada acceso."""
+    id: str
+    title: str
+    raw_fields: Dict[str, Any] = field(default_factory=dict)
+    source_list: str = ""
+
+    @property
+    def source_list_display(self) -> str:
+        if self.source_list == "gestion_baja":
+            return "Lista 1 (Gestión Baja de Servicio Móvil u Hogar)"
+        elif self.source_list == "migracion_post_pre":
+            return "Lista 2 (Ejecución Migración PostPago a PrePago)"
+        return self.source_list
+
+    @property
+    def estado_baja(self) -> str:
+        fields = self.raw_fields
+        val = fields.get("eBajaRealizada") or fields.get("BajaRealizada") or fields.get("Baja_x0020_Realizada")
+        return str(val if val is not None else "").strip()
+
+    @property
+    def tipo_baja_display(self) -> str:
+        fields = self.raw_fields
+        val = fields.get("eTipoBaja") or fields.get("TipodeBaja") or fields.get("TipoBaja")
+        if val == "Pre Pago R":
+            return "Cambio de Post Pago a Pre Pago R"
+        return str(val if val is not None else "N/A")
+
+    @property
+    def phone_number(self) -> str:
+        fields = self.raw_fields
+        val = fields.get("nLineaContacto") or fields.get("sLineaContacto") or fields.get("Title")
+        if val is None:
+            return "N/A"
+        s_val = str(val).strip()
+        return s_val[:-2] if s_val.endswith(".0") else s_val
+
+    @property
+    def fecha_creacion(self) -> Optional[datetime]:
+        created = self.raw_fields.get("Created")
+        if created:
+            try:
+                return datetime.fromisoformat(created.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+        return None
+
+    @property
+    def status(self) -> str:
+        return "Pendiente" if self.es_pendiente() else "Procesado" if self.es_procesado() else "Desconocido"
+
+    def es_pendiente(self) -> bool:
+        fields = self.raw_fields
+        if self.source_list == "gestion_baja":
+            if self.tipo_baja_display != "Cambio de Post Pago a Pre Pago R":
+                return False
+            return (
+                fields.get("eServicio") in ("Móvil", "Móvil B2B") and
+                fields.get("eRetencionEfectiva") == "NO" and
+                fields.get("eTipoGestion") == "Se deriva para Baja" and
+                fields.get("eFormularioPendiente") == "Formulario Regularizado" and
+                fields.get("eDeudaPendiente") == "Sin Deuda" and
+                fields.get("eRegularizadoCompleto") == "Se deriva para RPA" and
+                self.estado_baja in (None, "", "None", "pendiente", "Pendiente")
+            )
+        elif self.source_list == "migracion_post_pre":
+            title = fields.get("Title")
+            return title is not None and str(title).isdigit() and self.estado_baja in (None, "", "None")
+        return False
+
+    def es_procesado(self) -> bool:
+        baja = self.estado_baja
+        return bool(baja and baja.lower() != "pendiente" and baja != "None")
+
+
+def graph_pages(n: int, seed: int = 7):
+    """Páginas de Graph serializadas, como llegan por la red (sin $select aplicado del lado del servidor)."""
+    rng = random.Random(seed)
+    end = datetime(2025, 6, 30)
+    pages = {"gestion_baja": [], "migracion_post_pre": []}
+    for i in range(n):
+        created = end - timedelta(minutes=i * 7)
+        if i % 3 == 2:
+            source, fields = "migracion_post_pre", make_list2_fields(rng, i, created)
+        else:
+            source, fields = "gestion_baja", make_list1_fields(rng, i, created)
+        fields.update({"@odata.etag": f'"{i:08x}-0000-4000-8000-{i:012x},3"', "id": str(i + 1)})
+        pages[source].append({"id": str(i + 1), "fields": fields})
+    encoded = []
+    for source, rows in pages.items():
+        for start in range(0, len(rows), PAGE_SIZE):
+            encoded.append((source, json.dumps({"value": rows[start:start + PAGE_SIZE]}).encode("utf-8")))
+    return encoded
+
+
+def ingest(pages, factory):
+    keep = {"gestion_baja": select_fields(LIST1_SELECT), "migracion_post_pre": select_fields(LIST2_SELECT)}
+    items = []
+    for source, body in pages:
+        for row in json.loads(body)["value"]:
+            fields = row["fields"]
+            items.append(factory(row["id"], str(fields.get("Title", "")).strip(), fields, source, keep[source]))
+    return items
+
+
+def legacy_factory(item_id, title, fields, source, keep):
+    return LegacySharePointItem(id=item_id, title=title, raw_fields=fields, source_list=source)
+
+
+def compact_factory(item_id, title, fields, source, keep):
+    return SharePointItem(id=item_id, title=title, raw_fields=fields, source_list=source, keep_fields=keep)
+
+
+def _best(fn, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def measure(label: str, pages, factory, repeat: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    items = ingest(pages, factory)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    _, ingest_time = _best(lambda: ingest(pages, factory), repeat)
+    _, classify_time = _best(lambda: [(i.es_pendiente(), i.es_procesado()) for i in items], repeat)
+    table = parse_fields("id,list,created,status,tipo_baja,phone_number")
+    _, table_time = _best(lambda: dumps(encode_items(items, table)), repeat)
+    _, full_time = _best(lambda: dumps(encode_items(items)), repeat)
+    return {
+        "label": label,
+        "bytes_per_item": retained / len(items),
+        "ingest_ms": ingest_time * 1000,
+        "classify_ms": classify_time * 1000,
+        "table_ms": table_time * 1000,
+        "full_ms": full_time * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria y serialización de SharePointItem")
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = graph_pages(args.items)
+    results = [
+        measure("dataclass (anterior)", pages, legacy_factory, args.repeat),
+        measure("slots + derivados", pages, compact_factory, args.repeat),
+    ]
+
+    print(f"📦 {args.items} items en {len(pages)} páginas de Graph\n")
+    print(f"{'representación':22} {'bytes/item':>11} {'ingesta ms':>11} {'clasificar ms':>14} {'tabla ms':>9} {'completo ms':>12}")
+    for r in results:
+        print(f"{r['label']:22} {r['bytes_per_item']:>11,.0f} {r['ingest_ms']:>11.1f} {r['classify_ms']:>14.1f} "
+              f"{r['table_ms']:>9.1f} {r['full_ms']:>12.1f}")
+    before, after = results
+    print(f"\nMemoria por item: {after['bytes_per_item'] / before['bytes_per_item']:.0%} de la anterior · "
+          f"serializar la tabla: {after['table_ms'] / before['table_ms']:.0%} del tiempo anterior")
+
+
+if __name__ == "__main__":
+    main()
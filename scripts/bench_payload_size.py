@@ -0,0 +1,79 @@
+"""
+Compara el tamaño y el tiempo de serialización de /items en sus distintos formatos.
+
+Genera items sintéticos con los mismos campos que las listas reales (los del
+servidor falso) y mide cada combinación de formato/proyección, en crudo y con gzip.
+
+Uso:
+    python -m scripts.bench_payload_size --items 20000
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from domain.entities.sharepoint_item import SharePointItem
+from presentation.serializers import dumps, encode_items, orjson, parse_fields
+from scripts.fake_graph_server import make_list1_fields, make_list2_fields
+
+
+def iter_synthetic_items(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    end = datetime(2025, 6, 30)
+    for i in range(n):
+        created = end - timedelta(minutes=i * 7)
+        if i % 3 == 2:
+            fields = make_list2_fields(rng, i, created)
+            source = "migracion_post_pre"
+        else:
+            fields = make_list1_fields(rng, i, created)
+            source = "gestion_baja"
+        yield SharePointItem(id=str(i + 1), title=fields["Title"], raw_fields=fields, source_list=source)
+
+
+def synthetic_items(n: int, seed: int = 7):
+    return list(iter_synthetic_items(n, seed))
+
+
+def _measure(encode, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return body, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tamaño de payload de /items")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    items = synthetic_items(args.items)
+    table = parse_fields("id,list,created,status,tipo_baja,phone_number")
+
+    cases = [
+        # Respuesta anterior: lista de dicts con raw_fields, serializada como lo hace FastAPI
+        ("filas, todo (json, anterior)", lambda: json.dumps(encode_items(items), ensure_ascii=False).encode("utf-8")),
+        ("filas, todo", lambda: dumps(encode_items(items))),
+        ("filas, columnas de la tabla", lambda: dumps(encode_items(items, table))),
+        ("columnar, todo", lambda: dumps(encode_items(items, fmt="columnar"))),
+        ("columnar, columnas de la tabla", lambda: dumps(encode_items(items, table, "columnar"))),
+    ]
+
+    print(f"📦 {len(items)} items sintéticos · encoder: {'orjson' if orjson else 'json (orjson no instalado)'}\n")
+    print(f"{'formato':34} {'bytes':>12} {'gzip':>10} {'vs anterior':>12} {'ms':>8}")
+    baseline = None
+    for label, encode in cases:
+        body, elapsed = _measure(encode, args.repeat)
+        compressed = len(gzip.compress(body, 6))
+        baseline = baseline or len(body)
+        print(f"{label:34} {len(body):>12,} {compressed:>10,} {len(body) / baseline:>11.0%} {elapsed * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Memoria pico y tiempo de generar el reporte con el writer anterior
+(ExcelReportWriter: tres DataFrames y openpyxl normal) y con el writer en
+streaming (StreamingReportWriter) en xlsx, csv y parquet.
+
+Cada caso corre en procesos aparte para que la memoria de uno no contamine al
+siguiente: uno mide el tiempo y el RSS máximo, otro el pico de memoria Python con
+tracemalloc (que hace todo varias veces más lento). El writer anterior necesita
+las listas completas; los de streaming reciben los items de un generador, como
+llegarían página a página. "solo Dashboard" es la comparación directa con el
+anterior, que no escribía las filas.
+
+Uso:
+    python -m scripts.bench_report_writer --items 100000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from scripts.bench_payload_size import iter_synthetic_items
+
+CASES = {
+    "excel (anterior)": "xlsx-legacy",
+    "xlsx solo Dashboard": "xlsx-summary",
+    "xlsx streaming": "xlsx",
+    "csv streaming": "csv",
+    "parquet streaming": "parquet",
+}
+
+
+def run_case(case: str, n: int, directory: str, trace: bool) -> dict:
+    """Corre un caso en este proceso y devuelve sus métricas."""
+    from contextlib import redirect_stdout
+    from io import StringIO
+
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        if case == "xlsx-legacy":
+            from infrastructure.reports.excel_report_writer import ExcelReportWriter
+            items = list(iter_synthetic_items(n))
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                ExcelReportWriter().write(items, [i for i in items if i.es_pendiente()], [i for i in items if i.es_procesado()])
+            finally:
+                os.chdir(cwd)
+            path = os.path.join(directory, "reporte_sharepoint_summary.xlsx")
+        else:
+            from infrastructure.reports.streaming_report_writer import StreamingReportWriter
+            fmt = case.split("-")[0]
+            path = os.path.join(directory, f"reporte.{fmt}")
+            StreamingReportWriter(path, include_rows=case != "xlsx-summary").write_stream(iter_synthetic_items(n))
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "seconds": elapsed,
+        "peak_mb": peak / 1024 / 1024 if peak is not None else None,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "bytes": os.path.getsize(path),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria y tiempo del reporte")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.items, args.dir, args.trace)))
+        return
+
+    print(f"📊 Reporte de {args.items} items sintéticos (un proceso por caso)\n")
+    print(f"{'writer':20} {'segundos':>9} {'pico Python MB':>15} {'RSS máx MB':>11} {'archivo KB':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, case in CASES.items():
+            try:
+                timed = _run(args.items, case, directory)
+                traced = _run(args.items, case, directory, "--trace")
+            except RuntimeError as e:
+                print(f"{label:20} falló: {e}")
+                continue
+            print(f"{label:20} {timed['seconds']:>9.1f} {traced['peak_mb']:>15.1f} "
+                  f"{timed['max_rss_mb']:>11.0f} {timed['bytes'] / 1024:>11,.0f}")
+
+
+def _run(n: int, case: str, directory: str, *extra) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-m", "scripts.bench_report_writer", "--items", str(n), "--case", case, "--dir", directory, *extra],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+Benchmarks de punta a punta contra el Graph falso, sin credenciales de producción.
+
+Levanta scripts/fake_graph_server.py en otro proceso (con el tamaño, la latencia y
+el throttling pedidos) y mide:
+
+- reader: GraphSharePointReader.get_items de la Lista 1 completa (página a página)
+- use_case_cold / use_case_warm: GetFilteredItemsUseCase.execute con un rango de
+  fechas, con el caché de /items vacío y con el caché lleno
+- api_items_*: /items servido por uvicorn en otro proceso, bajo carga concurrente
+  (latencias p50/p95/p99, requests/s y errores)
+- excel_report: ExcelReportWriter con items sintéticos
+
+Cada caso se repite --repeat veces (se guardan mediana, mínimo y máximo). El
+resultado se escribe en un JSON (--output) que sirve de línea base: con --compare
+se contrasta contra una corrida anterior y el proceso sale con error si algún caso
+empeoró más que --tolerance. Conviene comparar corridas con los mismos parámetros
+y en la misma máquina.
+
+Uso:
+    python -m scripts.bench_suite --items 50000 --output data/bench-baseline.json
+    python -m scripts.bench_suite --items 50000 --output data/bench-actual.json --compare data/bench-baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from io import StringIO
+
+import requests
+
+LIST1_ID = "lista-1"
+LIST2_ID = "lista-2"
+# Los datos del Graph falso terminan el 2025-06-30
+FROM_DATE = "2025-03-01"
+TO_DATE = "2025-05-31"
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench"
+
+CASES = ("reader", "use_case", "api", "excel")
+API_SCENARIOS = {
+    # Lo que pide el dashboard al abrir y una página de un rango con fechas
+    "api_items_dashboard": "/items",
+    "api_items_range_page": f"/items?from_date={FROM_DATE}&to_date={TO_DATE}&page_size=100",
+}
+# Métricas que se comparan con la línea base (en todas, menos es mejor)
+COMPARED_METRICS = ("median_s", "p95_ms")
+# Diferencias menores a esto son ruido (p. ej. el caso con caché, que tarda menos de un ms)
+NOISE_FLOOR = {"median_s": 0.005, "p95_ms": 5}
+
+
+def graph_env(base: str) -> dict:
+    """Variables para que el reader y el API apunten al Graph falso, sin estado heredado del .env."""
+    return {
+        "GRAPH_BASE_URL": f"{base}/v1.0",
+        "GRAPH_LOGIN_URL": base,
+        "TENANT_ID": "bench",
+        "CLIENT_ID": "bench",
+        "CLIENT_SECRET": "bench",
+        "SP_SITE_ID": "fake-site",
+        "SP_LIST_ID": LIST1_ID,
+        "SP_LIST_ID_2": LIST2_ID,
+        "CACHE_BACKEND": "memory",
+        "ITEM_STORE": "",
+        "CACHE_SNAPSHOT_PATH": "",
+        "QUERY_PLAN_PATH": "",
+        "CACHE_WARMING": "false",
+        "DASHBOARD_USER": BENCH_USER,
+        "DASHBOARD_PASSWORD": BENCH_PASSWORD,
+    }
+
+
+# --- Procesos auxiliares -----------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"El proceso de {url} terminó con código {proc.returncode}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} no respondió en {timeout:.0f}s")
+
+
+@contextmanager
+def _process(command: list, ready_url: str, env: dict = None, timeout: float = 300):
+    proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+    try:
+        _wait_ready(ready_url, proc, timeout)
+        yield proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+@contextmanager
+def fake_graph(args):
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    command = [
+        sys.executable, "-m", "scripts.fake_graph_server", "--port", str(port),
+        "--list1-size", str(args.items), "--list2-size", str(args.list2_items),
+        "--latency-ms", str(args.latency_ms), "--throttle-rate", str(args.throttle_rate),
+        "--retry-after", str(args.retry_after), "--seed", str(args.seed),
+    ]
+    # Generar 200k items lleva unos segundos: el servidor recién responde cuando terminó
+    with _process(command, f"{base}/_fake/stats"):
+        yield base
+
+
+def _graph_requests(base: str) -> int:
+    stats = requests.get(f"{base}/_fake/stats", timeout=5).json()
+    return sum(stats.get(key, 0) for key in ("items", "delta", "batch", "columns"))
+
+
+# --- Medición ----------------------------------------------------------------
+
+def _repeat(fn, repeat: int):
+    """Corre `fn` `repeat` veces con la salida silenciada; devuelve los segundos de cada una y el último resultado."""
+    samples, result = [], None
+    for _ in range(repeat):
+        with redirect_stdout(StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def _summary(samples: list) -> dict:
+    return {
+        "median_s": round(statistics.median(samples), 6),
+        "min_s": round(min(samples), 6),
+        "max_s": round(max(samples), 6),
+        "runs": len(samples),
+    }
+
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# --- Casos -------------------------------------------------------------------
+
+def bench_reader(args, base: str) -> dict:
+    from application.use_cases.get_filtered_items import LIST1_SELECT
+    from infrastructure.sharepoint.graph_sharepoint_reader import GraphSharePointReader
+
+    reader = GraphSharePointReader()
+
+    def run():
+        return reader.get_items(
+            LIST1_ID, "gestion_baja", select_query=LIST1_SELECT, orderby_query="fields/Created desc", max_items=args.items
+        )
+
+    before = _graph_requests(base)
+    samples, items = _repeat(run, args.repeat)
+    summary = _summary(samples)
+    return {
+        **summary,
+        "items": len(items),
+        "items_per_s": round(len(items) / summary["median_s"]),
+        "graph_requests_per_run": (_graph_requests(base) - before) // args.repeat,
+    }
+
+
+def bench_use_case(args, base: str) -> dict:
+    from application.use_cases.get_filtered_items import GetFilteredItemsUseCase
+    from infrastructure.sharepoint.factory import create_reader
+
+    use_case = GetFilteredItemsUseCase(create_reader())
+    cache = GetFilteredItemsUseCase.shared_cache()
+
+    def run():
+        return use_case.execute(from_date=FROM_DATE, to_date=TO_DATE, limit=50000)
+
+    def cold():
+        # Sin caché de /items; los planes de consulta y los índices de las listas quedan de la corrida anterior,
+        # como en un proceso que ya estaba andando
+        cache.clear()
+        return run()
+
+    before = _graph_requests(base)
+    cold_samples, items = _repeat(cold, args.repeat)
+    graph_requests = (_graph_requests(base) - before) // args.repeat
+    warm_samples, _ = _repeat(run, args.repeat)
+    return {
+        "use_case_cold": {**_summary(cold_samples), "items": len(items), "graph_requests_per_run": graph_requests},
+        "use_case_warm": {**_summary(warm_samples), "items": len(items)},
+    }
+
+
+def _load(url: str, headers: dict, total: int, concurrency: int) -> dict:
+    """`total` GET a `url` repartidos entre `concurrency` clientes; latencias en ms."""
+    per_client = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+
+    def client(count: int):
+        latencies, errors = [], 0
+        with requests.Session() as session:
+            for _ in range(count):
+                start = time.perf_counter()
+                try:
+                    response = session.get(url, headers=headers, timeout=120)
+                    response.content
+                    if response.status_code != 200:
+                        errors += 1
+                except requests.RequestException:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, per_client))
+    wall = time.perf_counter() - start
+    latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": sum(errors for _, errors in results),
+        "requests_per_s": round(len(latencies) / wall, 1),
+        "p50_ms": round(_percentile(latencies, 0.50), 1),
+        "p95_ms": round(_percentile(latencies, 0.95), 1),
+        "p99_ms": round(_percentile(latencies, 0.99), 1),
+        "max_ms": round(max(latencies), 1),
+    }
+
+
+def bench_api(args, base: str) -> dict:
+    port = _free_port()
+    api = f"http://127.0.0.1:{port}"
+    env = {**os.environ, **graph_env(base)}
+    command = [sys.executable, "-m", "uvicorn", "presentation.api:app", "--port", str(port), "--log-level", "warning"]
+    results = {}
+    with _process(command, f"{api}/health", env=env):
+        token = requests.post(f"{api}/login", data={"username": BENCH_USER, "password": BENCH_PASSWORD}, timeout=10).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for name, path in API_SCENARIOS.items():
+            # El primer request llena el caché (se informa aparte); la carga mide el estado estable
+            start = time.perf_counter()
+            first = requests.get(f"{api}{path}", headers=headers, timeout=300)
+            cold_ms = round((time.perf_counter() - start) * 1000, 1)
+            if first.status_code != 200:
+                raise RuntimeError(f"{path} respondió {first.status_code}: {first.text[:200]}")
+            results[name] = {"cold_ms": cold_ms, **_load(f"{api}{path}", headers, args.requests, args.concurrency)}
+    return results
+
+
+def bench_excel(args) -> dict:
+    from infrastructure.reports.excel_report_writer import ExcelReportWriter
+    from scripts.bench_payload_size import synthetic_items
+
+    items = synthetic_items(args.report_items)
+    pendientes = [i for i in items if i.es_pendiente()]
+    procesados = [i for i in items if i.es_procesado()]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # ExcelReportWriter escribe en el directorio actual
+        os.chdir(directory)
+        try:
+            samples, _ = _repeat(lambda: ExcelReportWriter().write(items, pendientes, procesados), args.repeat)
+            size = os.path.getsize("reporte_sharepoint_summary.xlsx")
+        finally:
+            os.chdir(cwd)
+    return {**_summary(samples), "items": len(items), "bytes": size}
+
+
+# --- Línea base ----------------------------------------------------------------
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def _params(args) -> dict:
+    return {
+        "items": args.items,
+        "list2_items": args.list2_items,
+        "latency_ms": args.latency_ms,
+        "throttle_rate": args.throttle_rate,
+        "repeat": args.repeat,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "report_items": args.report_items,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Imprime la comparación caso por caso y devuelve los (caso, métrica, cambio) que empeoraron más que `tolerance`."""
+    if current["meta"]["params"] != baseline["meta"].get("params"):
+        print("⚠️ La línea base se corrió con otros parámetros: la comparación no es directa")
+    print(f"\n{'caso':26} {'métrica':9} {'base':>10} {'actual':>10} {'cambio':>8}")
+    regressions = []
+    for case, result in current["results"].items():
+        previous = baseline["results"].get(case)
+        if not previous:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in result or not previous.get(metric):
+                continue
+            change = result[metric] / previous[metric] - 1
+            significant = abs(result[metric] - previous[metric]) >= NOISE_FLOOR[metric]
+            worse = significant and change > tolerance
+            flag = " 🔺" if worse else (" ✅" if significant and change < -tolerance else "")
+            print(f"{case:26} {metric:9} {previous[metric]:>10} {result[metric]:>10} {change:>+8.1%}{flag}")
+            if worse:
+                regressions.append((case, metric, change))
+    return regressions
+
+
+def _print_results(results: dict) -> None:
+    for case, result in results.items():
+        details = ", ".join(f"{key}={value}" for key, value in result.items())
+        print(f"  {case:26} {details}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de punta a punta contra el Graph falso")
+    parser.add_argument("--items", type=int, default=20000, help="Items de la Lista 1 (1000 a 200000)")
+    parser.add_argument("--list2-items", type=int, help="Items de la Lista 2 (por defecto, la quinta parte de --items)")
+    parser.add_argument("--latency-ms", type=int, default=20, help="Latencia simulada por request a Graph")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fracción de requests a Graph que responden 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultáneos contra /items")
+    parser.add_argument("--requests", type=int, default=200, help="Requests por escenario de /items")
+    parser.add_argument("--report-items", type=int, default=20000, help="Items del reporte Excel")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"Casos a correr (CSV de {', '.join(CASES)})")
+    parser.add_argument("--output", default="data/bench-baseline.json", help="JSON con los resultados (vacío = no guardar)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior contra el cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Empeoramiento admitido antes de fallar (0.15 = 15%%)")
+    args = parser.parse_args()
+    if args.list2_items is None:
+        args.list2_items = max(1, args.items // 5)
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"Casos desconocidos: {', '.join(sorted(unknown))}")
+
+    print(f"🧪 Graph falso: {args.items} + {args.list2_items} items, {args.latency_ms} ms de latencia, "
+          f"throttling {args.throttle_rate:.0%}")
+    results = {}
+    with fake_graph(args) as base:
+        # Los módulos del reader leen la configuración al importarse: primero el entorno
+        os.environ.update(graph_env(base))
+        if "reader" in cases:
+            print("⏱️ reader (GraphSharePointReader.get_items)...")
+            results["reader"] = bench_reader(args, base)
+        if "use_case" in cases:
+            print("⏱️ use case (GetFilteredItemsUseCase.execute)...")
+            results.update(bench_use_case(args, base))
+        if "api" in cases:
+            print(f"⏱️ /items con {args.concurrency} clientes simultáneos...")
+            results.update(bench_api(args, base))
+    if "excel" in cases:
+        print(f"⏱️ ExcelReportWriter con {args.report_items} items...")
+        results["excel_report"] = bench_excel(args)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "params": _params(args),
+        },
+        "results": results,
+    }
+    print("\n📊 Resultados:")
+    _print_results(results)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados en {args.output}")
+    if regressions:
+        print(f"🔺 {len(regressions)} métricas empeoraron más de {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,557 @@
+"""
+Servidor local que imita a Microsoft Graph para probar sin credenciales de producción.
+
+Expone el endpoint de token, `sites/{id}/lists/{id}/items` (con $filter, $orderby,
+$top y paginación por @odata.nextLink), `items/delta` y `columns`, con datos
+sintéticos que usan los nombres reales de los campos de Lista 1 y Lista 2
+(docs/sharepoint_headers.md). Aguanta listas de 200k items: el resultado de cada
+filtro/orden se guarda mientras la lista no cambie, así paginar no reordena todo.
+
+Uso:
+    python scripts/fake_graph_server.py --port 8765 --list1-size 5000 --list2-size 2000
+
+y en el .env:
+    GRAPH_BASE_URL=http://127.0.0.1:8765/v1.0
+    GRAPH_LOGIN_URL=http://127.0.0.1:8765
+    SP_SITE_ID=fake-site
+    SP_LIST_ID=lista-1
+    SP_LIST_ID_2=lista-2
+
+`POST /_fake/churn?list=lista-1&n=50` crea, modifica y borra items para ejercitar delta.
+`POST /v1.0/$batch` acepta hasta 20 GET de items/delta en un request, como Graph (cada
+sub-request puede salir throttled por su cuenta).
+
+Throttling (para probar reintentos y circuit breaker), al arrancar o en caliente:
+    --throttle-rate 0.2        una de cada cinco páginas responde 429 con Retry-After
+    --retry-after 1            segundos del Retry-After (0 = sin el header)
+    --max-concurrent 4         más requests simultáneos que esto → 429, como Graph
+    POST /_fake/throttle?rate=0.5&retry_after=2&max_concurrent=4&outage=30
+                               `outage`: todo responde 503 durante esos segundos
+"""
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+LIST1_ID = "lista-1"
+LIST2_ID = "lista-2"
+MAX_PAGE_SIZE = 999
+# Consultas (filtro + orden) cuyo resultado se guarda por lista, para no reordenar todo en cada página
+QUERY_MEMO_SIZE = 64
+
+
+# --- Datos sintéticos --------------------------------------------------------
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def make_list1_fields(rng: random.Random, n: int, created: datetime) -> dict:
+    pendiente = rng.random() < 0.3
+    return {
+        "Title": str(60000 + n),
+        "eServicio": rng.choice(["Móvil", "Móvil", "Móvil B2B", "Hogar"]),
+        "eRetencionEfectiva": "NO" if pendiente or rng.random() < 0.7 else "SI",
+        "eTipoGestion": "Se deriva para Baja" if pendiente else rng.choice(["Se deriva para Baja", "Baja Pendiente - Rellamada"]),
+        "eFormularioPendiente": "Formulario Regularizado",
+        "eDeudaPendiente": "Sin Deuda" if pendiente or rng.random() < 0.8 else "Con Deuda",
+        "eRegularizadoCompleto": "Se deriva para RPA",
+        "eBajaRealizada": None if pendiente else rng.choice(["Baja Procesada", "", None, "Pendiente"]),
+        "eTipoBaja": "Pre Pago R" if pendiente or rng.random() < 0.6 else "Baja Total",
+        "eEstado": rng.choice(["Finalizado", "En Proceso"]),
+        "eContactado": rng.choice(["Si", "No"]),
+        "nLineaContacto": f"{rng.randint(60000000, 79999999)}.0",
+        "nLineaCodigoHogar": str(rng.randint(1000000, 1999999)),
+        "sMigrado": "",
+        "sLinkViaFirma": f"https://firma.example.com/documentos/{rng.getrandbits(64):016x}/baja-{60000 + n}.pdf" if not pendiente else None,
+        "Created": _iso(created),
+        "Modified": _iso(created + timedelta(hours=rng.randint(0, 72))),
+        "dFechaFormRegularizado": _iso(created + timedelta(days=1)) if not pendiente else None,
+    }
+
+
+def make_list2_fields(rng: random.Random, n: int, created: datetime) -> dict:
+    return {
+        "Title": str(rng.randint(60000000, 79999999)) if rng.random() < 0.9 else f"Cliente {n}",
+        "BajaRealizada": rng.choice(["", "", None, "Realizada"]),
+        "TipodeBaja": rng.choice(["Pre Pago R", "Pre Pago"]),
+        "eEstado": rng.choice(["Finalizado", "En Proceso"]),
+        "eTipoGestion": "Agendar llamada CC",
+        "sNombreCompletoTitular": f"TITULAR {n}",
+        "nNumTitular": f"{rng.randint(60000000, 79999999)}.0",
+        "Created": _iso(created),
+        "Modified": _iso(created + timedelta(hours=rng.randint(0, 72))),
+    }
+
+
+class FakeList:
+    def __init__(self, list_id: str, size: int, factory, rng: random.Random, start: datetime, end: datetime):
+        self.list_id = list_id
+        self.factory = factory
+        self.rng = rng
+        self.items = {}
+        self.version = 0
+        # Registro de cambios para delta: version -> (item_id, deleted)
+        self.changes = []
+        self.next_id = 1
+        self.queries = OrderedDict()
+        span = (end - start).total_seconds()
+        for i in range(size):
+            created = start + timedelta(seconds=span * i / max(1, size))
+            self._put(factory(rng, i, created))
+
+    def _put(self, fields: dict, item_id: str = None) -> str:
+        if item_id is None:
+            item_id = str(self.next_id)
+            self.next_id += 1
+        fields = dict(fields, id=item_id)
+        self.version += 1
+        self.items[item_id] = fields
+        self.changes.append((self.version, item_id, False))
+        return item_id
+
+    def memo(self, key: tuple, compute):
+        """Resultado de una consulta para la versión actual de la lista (se recalcula si cambió)."""
+        cached = self.queries.get(key)
+        if cached is not None and cached[0] == self.version:
+            self.queries.move_to_end(key)
+            return cached[1]
+        rows = compute()
+        self.queries[key] = (self.version, rows)
+        if len(self.queries) > QUERY_MEMO_SIZE:
+            self.queries.popitem(last=False)
+        return rows
+
+    def delete(self, item_id: str) -> None:
+        if self.items.pop(item_id, None) is not None:
+            self.version += 1
+            self.changes.append((self.version, item_id, True))
+
+    def churn(self, n: int) -> dict:
+        created = updated = deleted = 0
+        ids = list(self.items)
+        for _ in range(n):
+            roll = self.rng.random()
+            if roll < 0.4 or not ids:
+                self._put(self.factory(self.rng, self.next_id, datetime.utcnow()))
+                created += 1
+            elif roll < 0.85:
+                item_id = self.rng.choice(ids)
+                fields = dict(self.items[item_id])
+                fields["Modified"] = _iso(datetime.utcnow())
+                for key in ("eBajaRealizada", "BajaRealizada"):
+                    if key in fields:
+                        fields[key] = "Baja Procesada"
+                self._put(fields, item_id)
+                updated += 1
+            else:
+                item_id = self.rng.choice(ids)
+                ids.remove(item_id)
+                self.delete(item_id)
+                deleted += 1
+        return {"created": created, "updated": updated, "deleted": deleted, "version": self.version}
+
+
+# --- Subconjunto de OData $filter ---------------------------------------------
+
+_TOKEN_RE = re.compile(r"\s*(\(|\)|'(?:[^']|'')*'|[A-Za-z_/][\w/]*|\S+)")
+
+
+class FilterError(ValueError):
+    pass
+
+
+def parse_filter(expr: str):
+    """Convierte un $filter (eq/ne/lt/le/gt/ge, and/or, paréntesis) en un predicado."""
+    tokens = _TOKEN_RE.findall(expr)
+    pos = [0]
+
+    def peek():
+        return tokens[pos[0]] if pos[0] < len(tokens) else None
+
+    def take():
+        tok = peek()
+        pos[0] += 1
+        return tok
+
+    def value(tok):
+        if tok is None:
+            raise FilterError("Expresión incompleta")
+        if tok == "null":
+            return None
+        if tok.startswith("'"):
+            return tok[1:-1].replace("''", "'")
+        return tok
+
+    def comparison():
+        if peek() == "(":
+            take()
+            node = disjunction()
+            if take() != ")":
+                raise FilterError("Falta ')'")
+            return node
+        field = take()
+        if not field or not field.startswith("fields/"):
+            raise FilterError(f"Campo no soportado: {field}")
+        op = take()
+        operand = value(take())
+        name = field[len("fields/"):]
+        ops = {
+            "eq": lambda a, b: a == b,
+            "ne": lambda a, b: a != b,
+            "lt": lambda a, b: a is not None and b is not None and a < b,
+            "le": lambda a, b: a is not None and b is not None and a <= b,
+            "gt": lambda a, b: a is not None and b is not None and a > b,
+            "ge": lambda a, b: a is not None and b is not None and a >= b,
+        }
+        if op not in ops:
+            raise FilterError(f"Operador no soportado: {op}")
+        fn = ops[op]
+        return ("cmp", name, lambda f: fn(f.get(name), operand))
+
+    def conjunction():
+        node = comparison()
+        while peek() == "and":
+            take()
+            left, right = node, comparison()
+            node = ("and", None, lambda f, l=left, r=right: l[2](f) and r[2](f))
+        return node
+
+    def disjunction():
+        node = conjunction()
+        while peek() == "or":
+            take()
+            left, right = node, conjunction()
+            node = ("or", None, lambda f, l=left, r=right: l[2](f) or r[2](f))
+        return node
+
+    node = disjunction()
+    if peek() is not None:
+        raise FilterError(f"Token inesperado: {peek()}")
+    fields_used = set(re.findall(r"fields/(\w+)", expr))
+    return node[2], fields_used
+
+
+# --- Servidor ---------------------------------------------------------------
+
+class FakeGraphState:
+    def __init__(self, args):
+        rng = random.Random(args.seed)
+        end = datetime(2025, 6, 30)
+        start = end - timedelta(days=args.days)
+        self.lists = {
+            LIST1_ID: FakeList(LIST1_ID, args.list1_size, make_list1_fields, rng, start, end),
+            LIST2_ID: FakeList(LIST2_ID, args.list2_size, make_list2_fields, rng, start, end),
+        }
+        self.latency = args.latency_ms / 1000.0
+        self.indexed = set(filter(None, args.indexed.split(","))) if args.indexed else None
+        self.view_threshold = args.view_threshold
+        self.lock = threading.Lock()
+        self.stats = {"token": 0, "items": 0, "delta": 0, "batch": 0, "columns": 0, "throttled": 0, "unavailable": 0}
+        self.throttle_rate = args.throttle_rate
+        self.retry_after = args.retry_after
+        self.max_concurrent = args.max_concurrent
+        self.outage_until = 0.0
+        self.in_flight = 0
+        self.throttle_rng = random.Random(args.seed)
+
+    def configure_throttle(self, query: dict) -> dict:
+        if "rate" in query:
+            self.throttle_rate = float(query["rate"])
+        if "retry_after" in query:
+            self.retry_after = float(query["retry_after"])
+        if "max_concurrent" in query:
+            self.max_concurrent = int(query["max_concurrent"])
+        if "outage" in query:
+            self.outage_until = time.time() + float(query["outage"])
+        return {
+            "rate": self.throttle_rate,
+            "retry_after": self.retry_after,
+            "max_concurrent": self.max_concurrent,
+            "outage_for": max(0.0, round(self.outage_until - time.time(), 1)),
+        }
+
+    def rejection(self):
+        """(status, código) con que hay que rechazar este request, o None si pasa."""
+        if time.time() < self.outage_until:
+            self.stats["unavailable"] += 1
+            return 503, "serviceNotAvailable"
+        with self.lock:
+            crowded = self.max_concurrent and self.in_flight > self.max_concurrent
+            unlucky = self.throttle_rate and self.throttle_rng.random() < self.throttle_rate
+        if crowded or unlucky:
+            self.stats["throttled"] += 1
+            return 429, "TooManyRequests"
+        return None
+
+
+class FakeGraphHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeGraph/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def state(self) -> FakeGraphState:
+        return self.server.state
+
+    def _send_json(self, payload, status: int = 200, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body, compresslevel=1)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        for key, val in (headers or {}).items():
+            self.send_header(key, str(val))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, code: str, message: str, headers: dict = None):
+        self._send_json(_error_body(code, message), status, headers)
+
+    def _base(self) -> str:
+        host = self.headers.get("Host", f"127.0.0.1:{self.server.server_port}")
+        return f"http://{host}"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+        url = urlparse(self.path)
+        if url.path == "/v1.0/$batch":
+            return self._batch(raw)
+        if url.path.endswith("/oauth2/v2.0/token"):
+            self.state.stats["token"] += 1
+            return self._send_json({"token_type": "Bearer", "expires_in": 3599, "access_token": "fake-token"})
+        if url.path == "/_fake/churn":
+            query = parse_qs(url.query)
+            fake_list = self.state.lists.get(query.get("list", [LIST1_ID])[0])
+            if fake_list is None:
+                return self._error(404, "itemNotFound", "Lista desconocida")
+            with self.state.lock:
+                result = fake_list.churn(int(query.get("n", ["10"])[0]))
+            return self._send_json(result)
+        if url.path == "/_fake/throttle":
+            return self._send_json(self.state.configure_throttle({k: v[0] for k, v in parse_qs(url.query).items()}))
+        self._error(404, "notFound", url.path)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/_fake/stats":
+            return self._send_json(self.state.stats)
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self._error(401, "InvalidAuthenticationToken", "Falta el token")
+        with self.state.lock:
+            self.state.in_flight += 1
+        try:
+            rejection = self.state.rejection()
+            if rejection is not None:
+                return self._send_json(*self._rejected(rejection))
+            if self.state.latency:
+                time.sleep(self.state.latency)
+            self._send_json(*self._graph_get(self.path))
+        finally:
+            with self.state.lock:
+                self.state.in_flight -= 1
+
+    def _batch(self, raw: bytes):
+        """JSON batching de Graph: cada sub-request se resuelve (o se rechaza) por separado."""
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self._error(401, "InvalidAuthenticationToken", "Falta el token")
+        try:
+            requests = json.loads(raw or b"{}").get("requests") or []
+        except ValueError:
+            return self._error(400, "BadRequest", "Cuerpo de $batch inválido")
+        if not requests or len(requests) > 20:
+            return self._error(400, "BadRequest", "Un $batch lleva entre 1 y 20 sub-requests")
+        self.state.stats["batch"] += 1
+        with self.state.lock:
+            self.state.in_flight += 1
+        try:
+            # Graph resuelve los sub-requests en paralelo: la latencia se paga una vez por $batch
+            if self.state.latency:
+                time.sleep(self.state.latency)
+            responses = []
+            for sub in requests:
+                rejection = self.state.rejection()
+                if rejection is not None:
+                    payload, status, headers = self._rejected(rejection)
+                elif sub.get("method", "GET").upper() != "GET":
+                    payload, status, headers = {"error": {"code": "BadRequest", "message": "Solo GET"}}, 400, None
+                else:
+                    payload, status, headers = self._graph_get("/v1.0" + sub.get("url", ""))
+                responses.append({"id": sub.get("id"), "status": status, "headers": headers or {}, "body": payload})
+        finally:
+            with self.state.lock:
+                self.state.in_flight -= 1
+        self._send_json({"responses": responses})
+
+    def _rejected(self, rejection):
+        status, code = rejection
+        headers = {"Retry-After": f"{self.state.retry_after:g}"} if self.state.retry_after else None
+        return _error_body(code, "Demasiados requests, reintentá más tarde"), status, headers
+
+    def _graph_get(self, path: str):
+        """(payload, status, headers) de un GET a items, delta o columns, sin enviarlo (sirve para GET y $batch)."""
+        url = urlparse(path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        match = re.match(r"^/v1\.0/sites/[^/]+/lists/([^/]+)/(items(/delta)?|columns)$", url.path)
+        if not match:
+            return _error_body("notFound", url.path), 404, None
+        fake_list = self.state.lists.get(match.group(1))
+        if fake_list is None:
+            return _error_body("itemNotFound", "Lista desconocida"), 404, None
+        if match.group(2) == "columns":
+            return self._columns(fake_list)
+        if match.group(3):
+            return self._delta(fake_list, url.path, query)
+        return self._items(fake_list, url.path, query)
+
+    def _columns(self, fake_list: FakeList):
+        # Las columnas salen de los campos de los items; con --indexed solo esas figuran indexadas
+        self.state.stats["columns"] += 1
+        with self.state.lock:
+            names = {}
+            for fields in fake_list.items.values():
+                names.update(dict.fromkeys(fields))
+        indexed = self.state.indexed
+        value = [
+            {"name": name, "indexed": indexed is None or name in indexed, "readOnly": name in ("Created", "Modified"), "text": {}}
+            for name in names if name != "id"
+        ]
+        return {"value": value}, 200, None
+
+    def _items(self, fake_list: FakeList, path: str, query: dict):
+        self.state.stats["items"] += 1
+        select = _parse_select(query.get("expand", ""))
+        filter_expr = query.get("$filter") or ""
+        predicate = None
+        if filter_expr:
+            try:
+                predicate, fields_used = parse_filter(filter_expr)
+            except FilterError as e:
+                return _error_body("invalidRequest", str(e)), 400, None
+            if self.state.indexed is not None and not fields_used <= self.state.indexed \
+                    and len(fake_list.items) > self.state.view_threshold:
+                # Igual que SharePoint con listas grandes: columnas sin índice no se pueden filtrar
+                return _error_body("invalidRequest", "Field(s) cannot be referenced in filter or orderby as they are not indexed."), 400, None
+        orderby = query.get("$orderby", "")
+
+        def compute():
+            rows = list(fake_list.items.values())
+            if predicate is not None:
+                rows = [f for f in rows if predicate(f)]
+            if orderby:
+                field, _, direction = orderby.partition(" ")
+                name = field.replace("fields/", "")
+                rows.sort(key=lambda f: (f.get(name) is not None, f.get(name) or ""), reverse=direction.strip() == "desc")
+            return rows
+
+        with self.state.lock:
+            rows = fake_list.memo((filter_expr, orderby), compute)
+        top = min(int(query.get("$top", MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        skip = int(query.get("$skiptoken", 0))
+        page = rows[skip:skip + top]
+        payload = {"value": [_as_list_item(f, select) for f in page]}
+        if skip + top < len(rows):
+            params = {k: v for k, v in query.items() if k != "$skiptoken"}
+            params["$skiptoken"] = str(skip + top)
+            payload["@odata.nextLink"] = f"{self._base()}{path}?" + "&".join(f"{k}={quote(v, safe='(),$/=')}" for k, v in params.items())
+        return payload, 200, None
+
+    def _delta(self, fake_list: FakeList, path: str, query: dict):
+        self.state.stats["delta"] += 1
+        select = _parse_select(query.get("expand", ""))
+        since = int(query.get("token", 0))
+        skip = int(query.get("$skiptoken", 0))
+        with self.state.lock:
+            if since > fake_list.version:
+                return _error_body("resyncRequired", "El token delta ya no es válido"), 410, None
+            latest = {}
+            for version, item_id, deleted in fake_list.changes:
+                if version > since:
+                    latest[item_id] = deleted
+            entries = []
+            for item_id, deleted in latest.items():
+                if deleted or item_id not in fake_list.items:
+                    entries.append({"id": item_id, "deleted": {"state": "deleted"}})
+                else:
+                    entries.append(_as_list_item(fake_list.items[item_id], select))
+            version = fake_list.version
+        page = entries[skip:skip + MAX_PAGE_SIZE]
+        payload = {"value": page}
+        params = {k: v for k, v in query.items() if k not in ("$skiptoken", "token")}
+        base = f"{self._base()}{path}?" + "".join(f"{k}={quote(v, safe='(),$/=')}&" for k, v in params.items())
+        if skip + MAX_PAGE_SIZE < len(entries):
+            payload["@odata.nextLink"] = f"{base}token={since}&$skiptoken={skip + MAX_PAGE_SIZE}"
+        else:
+            payload["@odata.deltaLink"] = f"{base}token={version}"
+        return payload, 200, None
+
+
+def _error_body(code: str, message: str) -> dict:
+    return {"error": {"code": code, "message": message}}
+
+
+def _parse_select(expand: str):
+    match = re.search(r"\(\$select=([^)]*)\)", expand)
+    return set(match.group(1).split(",")) if match else None
+
+
+def _as_list_item(fields: dict, select) -> dict:
+    if select is not None:
+        fields = {k: v for k, v in fields.items() if k in select or k == "id"}
+    return {"id": fields["id"], "fields": fields}
+
+
+def build_server(args) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((args.host, args.port), FakeGraphHandler)
+    server.daemon_threads = True
+    server.state = FakeGraphState(args)
+    return server
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Servidor Graph falso para pruebas locales")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--list1-size", type=int, default=5000)
+    parser.add_argument("--list2-size", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365, help="Rango de fechas Created de los datos")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Latencia simulada por página")
+    parser.add_argument("--indexed", default="", help="Columnas indexadas (CSV). Vacío = todas filtrables")
+    parser.add_argument(
+        "--view-threshold", type=int, default=5000,
+        help="Con --indexed, listas de hasta este tamaño aceptan filtros sobre columnas sin índice (como SharePoint)"
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fracción de requests que responden 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Segundos del Retry-After en 429/503 (0 = sin header)")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="Requests simultáneos antes de responder 429 (0 = sin tope)")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    server = build_server(args)
+    print(f"🧪 Graph falso escuchando en http://{args.host}:{args.port} "
+          f"({args.list1_size} + {args.list2_size} items)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
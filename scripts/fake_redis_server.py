@@ -0,0 +1,169 @@
+"""
+Servidor local que habla el protocolo de Redis (RESP2), para probar el backend
+de caché compartido sin instalar Redis.
+
+Implementa lo que usa RedisCacheBackend: PING, AUTH, SELECT, GET, SET (NX/XX,
+EX/PX), DEL, EXISTS, SCAN, KEYS, DBSIZE, FLUSHALL y EVAL del script de
+liberación de lock (comparar token y borrar).
+
+Uso:
+    python scripts/fake_redis_server.py --port 6380
+
+y en el .env:
+    CACHE_BACKEND=redis
+    REDIS_URL=redis://127.0.0.1:6380/0
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class FakeRedisState:
+    def __init__(self):
+        self.data = {}  # key -> (value, expires_at | None)
+        self.lock = threading.Lock()
+
+    def _alive(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Comando "inline" (p. ej. escrito a mano con telnet)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _write(self, reply) -> None:
+        self.wfile.write(self._encode(reply))
+
+    def _encode(self, reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return b"-ERR %s\r\n" % str(reply).encode("utf-8")
+        if isinstance(reply, str):
+            return b"+%s\r\n" % reply.encode("utf-8")
+        if isinstance(reply, bool):
+            reply = int(reply)
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        if isinstance(reply, list):
+            return b"*%d\r\n" % len(reply) + b"".join(self._encode(item) for item in reply)
+        raise TypeError(type(reply))
+
+    def handle(self):
+        state: FakeRedisState = self.server.state
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            command = args[0].upper().decode("utf-8")
+            with state.lock:
+                try:
+                    reply = self.dispatch(state, command, args[1:])
+                except Exception as e:
+                    reply = e
+            self._write(reply)
+
+    def dispatch(self, state: FakeRedisState, command: str, args):
+        if command == "PING":
+            return "PONG"
+        if command in ("AUTH", "SELECT"):
+            return "OK"
+        if command == "GET":
+            return state._alive(args[0])
+        if command == "SET":
+            return self._set(state, args)
+        if command == "DEL":
+            return sum(1 for key in args if state._alive(key) is not None and state.data.pop(key, None) is not None)
+        if command == "EXISTS":
+            return sum(1 for key in args if state._alive(key) is not None)
+        if command in ("KEYS", "SCAN"):
+            pattern = args[0] if command == "KEYS" else b"*"
+            if command == "SCAN" and b"MATCH" in [a.upper() for a in args]:
+                pattern = args[[a.upper() for a in args].index(b"MATCH") + 1]
+            keys = [k for k in list(state.data) if state._alive(k) is not None and fnmatch.fnmatchcase(k.decode(), pattern.decode())]
+            return keys if command == "KEYS" else [b"0", keys]
+        if command == "DBSIZE":
+            return sum(1 for k in list(state.data) if state._alive(k) is not None)
+        if command == "FLUSHALL":
+            state.data.clear()
+            return "OK"
+        if command == "EVAL":
+            return self._eval(state, args)
+        raise ValueError(f"comando no soportado '{command}'")
+
+    @staticmethod
+    def _set(state: FakeRedisState, args):
+        key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+        expires_at = None
+        if b"PX" in options:
+            expires_at = time.time() + int(args[2 + options.index(b"PX") + 1]) / 1000
+        elif b"EX" in options:
+            expires_at = time.time() + int(args[2 + options.index(b"EX") + 1])
+        exists = state._alive(key) is not None
+        if (b"NX" in options and exists) or (b"XX" in options and not exists):
+            return None
+        state.data[key] = (value, expires_at)
+        return "OK"
+
+    @staticmethod
+    def _eval(state: FakeRedisState, args):
+        script = args[0].decode("utf-8")
+        # Solo el script de liberación de lock: si GET KEYS[1] == ARGV[1], DEL KEYS[1]
+        if "redis.call('get', KEYS[1]) == ARGV[1]" not in script:
+            raise ValueError("solo se soporta el script de liberación de lock")
+        key, token = args[2], args[3]
+        if state._alive(key) == token:
+            del state.data[key]
+            return 1
+        return 0
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, RespHandler)
+        self.state = FakeRedisState()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local compatible con el protocolo de Redis")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+
+    server = FakeRedisServer((args.host, args.port))
+    print(f"🧪 Redis falso escuchando en redis://{args.host}:{args.port}/0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
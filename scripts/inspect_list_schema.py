@@ -1,7 +1,8 @@
 import os
-import requests
 from dotenv import load_dotenv
 from infrastructure.auth.graph_auth import get_access_token
+from infrastructure.http.graph_session import GRAPH_BASE_URL, get_session
+from infrastructure.sharepoint.graph_sharepoint_reader import GraphSharePointReader
 
 load_dotenv()
 
@@ -15,7 +16,7 @@ def debug_list_headers(list_name, list_id):
     site_id = os.getenv("SP_SITE_ID")
     
     url = (
-        f"https://graph.microsoft.com/v1.0/"
+        f"{GRAPH_BASE_URL}/"
         f"sites/{site_id}/lists/{list_id}/items"
         f"?expand=fields&$top=5"
     )
@@ -26,7 +27,7 @@ def debug_list_headers(list_name, list_id):
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = get_session().get(url, headers=headers, timeout=30)
         response.raise_for_status()
         data = response.json()
         
@@ -51,6 +52,23 @@ def debug_list_headers(list_name, list_id):
     except Exception as e:
         print(f"❌ Error al analizar la lista: {e}")
 
+    debug_list_columns(list_id)
+
+def debug_list_columns(list_id):
+    # Las columnas indexadas son las que se pueden usar en $filter en listas grandes (lo que usa el planificador)
+    try:
+        columns = GraphSharePointReader().get_columns(list_id)
+    except Exception as e:
+        print(f"❌ Error al leer las columnas: {e}")
+        return
+
+    indexed = [c for c in columns if c.indexed]
+    print(f"\n🗂️ {len(columns)} columnas, {len(indexed)} indexadas:")
+    for column in sorted(columns, key=lambda c: (not c.indexed, c.name)):
+        flags = "🔑 indexada" if column.indexed else "           "
+        read_only = " (solo lectura)" if column.read_only else ""
+        print(f"  {flags} {column.name.ljust(30)} | {column.kind or '?'}{read_only}")
+
 def main():
     # Listas que parecen más relevantes según el listado anterior
     relevant_lists = [
@@ -1,7 +1,7 @@
 import os
-import requests
 from dotenv import load_dotenv
 from infrastructure.auth.graph_auth import get_access_token
+from infrastructure.http.graph_session import GRAPH_BASE_URL, get_session
 
 load_dotenv()
 
@@ -10,7 +10,7 @@ def list_all_lists():
     token = get_access_token()
     site_id = os.getenv("SP_SITE_ID")
     
-    url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/lists"
+    url = f"{GRAPH_BASE_URL}/sites/{site_id}/lists"
 
     headers = {
         "Authorization": f"Bearer {token}",
@@ -18,7 +18,7 @@ def list_all_lists():
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = get_session().get(url, headers=headers, timeout=30)
         response.raise_for_status()
         data = response.json()
         